@@ -0,0 +1,91 @@
+"""
+Measure how long it takes to import the package's modules in a fresh interpreter.
+
+Each module is imported in a new Python process several times, and the median time is reported. The times are
+compared to the baseline in `benchmarks/baselines/import_time.json`, and the script exits with an error if any
+module got more than `--tolerance` times slower (ex. because a heavy dependency is imported at module load again).
+
+    python -m benchmarks.import_time                 # Compare to the baseline
+    python -m benchmarks.import_time --save-baseline # Record new baseline times
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASELINE = Path(__file__).parent / "baselines" / "import_time.json"
+
+MODULES = [
+    "pandas",  # For reference: most of the package's import time is pandas
+    "immigration_enforcement.borderpatrol.encounters",
+    "immigration_enforcement.detentions",
+    "immigration_enforcement.backend",
+]
+
+# Modules that should only be imported when a function that needs them is called
+HEAVY_MODULES = ["streamlit", "plotly", "requests"]
+
+_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module: str, repeat: int = 5) -> tuple[float, list[str]]:
+    """
+    Return the median time to import `module` in a fresh interpreter, and the heavy modules it imported.
+    """
+    times = []
+    heavy: list[str] = []
+    for _ in range(repeat):
+        script = _SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        times.append(result["seconds"])
+        heavy = result["heavy"]
+    return statistics.median(times), heavy
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    results = {}
+    failed = False
+    for module in MODULES:
+        seconds, heavy = measure(module, args.repeat)
+        results[module] = round(seconds, 4)
+
+        status = ""
+        if module.startswith("immigration_enforcement") and heavy:
+            status = f"  REGRESSION: imports {', '.join(heavy)}"
+            failed = True
+        elif module in baseline and seconds > baseline[module] * args.tolerance:
+            status = f"  REGRESSION: baseline {baseline[module]:.3f}s"
+            failed = True
+        print(f"{module:50} {seconds:7.3f}s{status}")
+
+    if args.save_baseline:
+        BASELINE.parent.mkdir(exist_ok=True)
+        BASELINE.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baseline to {BASELINE}")
+        return 0
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
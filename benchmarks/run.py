@@ -0,0 +1,376 @@
+"""
+Offline micro-benchmarks for each stage of the app: loading, transforming and charting the data.
+
+No network access is needed. TRAC's detention data is read from `fixtures/pop_agen_table.json` (refresh it with
+`--record`), and the Border Patrol data from the files bundled with the package.
+
+Each benchmark is run at several scales. At scale 10 or 100 the input is made that many times larger: detention
+data is extended further back in time, and the Border Patrol sources are repeated. Benchmarks whose input cannot
+be scaled only run at scale 1.
+
+The median time of each benchmark is compared to `baselines/benchmarks.json`. The script exits with an error if
+any benchmark is more than `--tolerance` times slower than its baseline.
+
+    python -m benchmarks.run                  # Run everything and compare to the baseline
+    python -m benchmarks.run -k chart         # Only benchmarks whose name contains "chart"
+    python -m benchmarks.run --save-baseline  # Record new baseline times
+    python -m benchmarks.run --record         # Download a new TRAC fixture
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from unittest.mock import patch
+import pandas as pd
+import immigration_enforcement.archive as archive
+import immigration_enforcement.backend as be
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.borderpatrol.sbo as sbo
+import immigration_enforcement.borderpatrol.workbook as workbook
+import immigration_enforcement.detentions as detentions
+import immigration_enforcement.rendering as rendering
+
+BENCHMARK_DIR = Path(__file__).parent
+FIXTURE = BENCHMARK_DIR / "fixtures" / "pop_agen_table.json"
+BASELINE = BENCHMARK_DIR / "baselines" / "benchmarks.json"
+
+SCALES = [1, 10, 100]
+
+# Differences smaller than this are noise, whatever the ratio to the baseline
+MIN_REGRESSION_SECONDS = 0.002
+
+
+# The function to time, or a pair of functions: `setup` (untimed, run before each timed call) and `run`, which is
+# passed the result of `setup`. Use the pair when `run` modifies its input.
+Timed = Callable[[], Any] | tuple[Callable[[], Any], Callable[[Any], Any]]
+
+
+@dataclass
+class Benchmark:
+    """
+    `prepare(scale)` builds the input at the given scale (untimed) and returns what to time.
+    """
+
+    name: str
+    prepare: Callable[[int], Timed]
+    scalable: bool = True
+
+
+# Synthetic inputs
+
+# Set by scratch_directory() while the benchmarks run
+_scratch_dir: Path | None = None
+
+
+@contextmanager
+def scratch_directory() -> Iterator[Path]:
+    """
+    Create a temporary directory for the files the benchmarks write (ex. scaled CSV files), and remove it on exit.
+    """
+    global _scratch_dir
+    with tempfile.TemporaryDirectory(prefix="benchmarks-") as directory:
+        _scratch_dir = Path(directory)
+        try:
+            yield _scratch_dir
+        finally:
+            _scratch_dir = None
+
+
+def _get_scratch_dir() -> Path:
+    if _scratch_dir is None:
+        raise RuntimeError("Prepare the benchmarks inside scratch_directory()")
+    return _scratch_dir
+
+
+def scale_detention_records(
+    records: list[dict[str, Any]], scale: int
+) -> list[dict[str, Any]]:
+    """
+    Return `scale` copies of TRAC's records, re-dated so that the dates stay unique and newest first. TRAC
+    publishes about every two weeks. The scaled records are closer together (down to a day apart), so that 100x
+    the data still fits in pandas' datetime range.
+    """
+    newest = pd.to_datetime(records[0]["date"], format="%m/%d/%Y")
+    step = timedelta(days=max(1, 14 // scale))
+
+    scaled = []
+    for i, record in enumerate(records * scale):
+        date = newest - i * step
+        scaled.append({**record, "date": date.strftime("%m/%d/%Y")})
+    return scaled
+
+
+def _load_fixture(scale: int) -> bytes:
+    records = json.loads(FIXTURE.read_bytes())
+    return json.dumps(scale_detention_records(records, scale)).encode()
+
+
+def _load_detention_dataset(scale: int) -> detentions.DetentionDataset:
+    with patch(
+        "immigration_enforcement.http_cache.fetch", return_value=_load_fixture(scale)
+    ):
+        return detentions.DetentionDataset(detentions.get_detention_data())
+
+
+def _write_scaled_sbo_csv(scale: int, directory: Path) -> Path:
+    path = directory / f"sbo-x{scale}.csv"
+    df = pd.read_csv(artifacts.SBO_CSV)
+    pd.concat([df] * scale, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+# Benchmarks
+
+
+def _get_detention_data(scale: int) -> Callable[[], Any]:
+    body = _load_fixture(scale)
+
+    def run() -> Any:
+        with patch("immigration_enforcement.http_cache.fetch", return_value=body):
+            return detentions.get_detention_data()
+
+    return run
+
+
+def _detention_dataset(scale: int) -> Callable[[], Any]:
+    df = _load_detention_dataset(scale).df
+    return lambda: detentions.DetentionDataset(df)
+
+
+def _melt(scale: int) -> Callable[[], Any]:
+    counts = _load_detention_dataset(scale).df.set_index("date")
+    labels = {f"{prefix}_all": label for prefix, label in detentions.AA_LABELS.items()}
+    return lambda: detentions._melt(counts, labels, "Arresting Authority", "count")
+
+
+def _chart(get_chart: Callable[..., Any], **kwargs: Any) -> Callable[[int], Timed]:
+    def prepare(scale: int) -> Callable[[], Any]:
+        dataset = _load_detention_dataset(scale)
+        return lambda: get_chart(dataset=dataset, **kwargs)
+
+    return prepare
+
+
+def _downsample(scale: int) -> Callable[[], Any]:
+    dataset = _load_detention_dataset(scale)
+    return lambda: rendering.downsample(
+        dataset.aa_count, "date", "count", "Arresting Authority", max_points=500
+    )
+
+
+def _style_detentions_graph(scale: int) -> Timed:
+    import plotly.express as px
+
+    dataset = _load_detention_dataset(scale)
+
+    df = dataset.aa_count
+    max_y = df["count"].max()
+
+    # Styling modifies the figure, so every run gets a new one. The charts draw it with the module's template.
+    def setup() -> Any:
+        return px.line(
+            df,
+            x="date",
+            y="count",
+            color="Arresting Authority",
+            template=detentions._get_template(),
+        )
+
+    return setup, lambda fig: detentions._style_detentions_graph(fig, max_y=max_y)
+
+
+def _region_encounters(scale: int) -> Callable[[], Any]:
+    # The app parses the workbook once per process (see encounters.py), so this is the work it does on a cache miss
+    df = artifacts.load_khsm_workbook()
+    scaled = pd.concat([df] * scale, ignore_index=True)
+    return lambda: workbook.KhsmWorkbook(scaled).region_encounters(
+        encounters.SOUTHWEST_LAND_BORDER
+    )
+
+
+def _aggregate_sbo_encounters(scale: int) -> Callable[[], Any]:
+    if scale == 1:
+        path = artifacts.SBO_CSV
+    else:
+        path = _write_scaled_sbo_csv(scale, _get_scratch_dir())
+    return lambda: sbo.aggregate_encounters(
+        path,
+        by=["Fiscal Year", "Month (abbv)"],
+        filters={"Component": ["U.S. Border Patrol"]},
+    )
+
+
+def _get_graph(
+    dataset: str, display: str | None, authority: str | None, cached: bool
+) -> Callable[[int], Timed]:
+    def prepare(scale: int) -> Callable[[], Any]:
+        detention_dataset = _load_detention_dataset(scale)
+
+        def run() -> Any:
+            if not cached:
+                be.clear_figure_cache()
+            with patch.object(
+                detentions.DetentionDataset, "load", return_value=detention_dataset
+            ):
+                return be.get_graph(dataset, display, authority)
+
+        return run
+
+    return prepare
+
+
+BENCHMARKS = [
+    Benchmark("detentions.get_detention_data", _get_detention_data),
+    Benchmark("detentions.DetentionDataset", _detention_dataset),
+    Benchmark("detentions._melt", _melt),
+    Benchmark("detentions.get_aa_count_chart", _chart(detentions.get_aa_count_chart)),
+    Benchmark("detentions.get_aa_pct_chart", _chart(detentions.get_aa_pct_chart)),
+    Benchmark(
+        "detentions.get_criminality_count_chart",
+        _chart(detentions.get_criminality_count_chart, authority="All"),
+    ),
+    Benchmark(
+        "detentions.get_criminality_pct_chart",
+        _chart(detentions.get_criminality_pct_chart, authority="All"),
+    ),
+    Benchmark("detentions._style_detentions_graph", _style_detentions_graph),
+    Benchmark("rendering.downsample", _downsample),
+    Benchmark("workbook.KhsmWorkbook.region_encounters", _region_encounters),
+    Benchmark("sbo.aggregate_encounters", _aggregate_sbo_encounters),
+    Benchmark(
+        "encounters.get_sw_border_encounters",
+        lambda scale: encounters.get_sw_border_encounters,
+        scalable=False,
+    ),
+    Benchmark(
+        "encounters.get_sw_border_encounters_graph",
+        lambda scale: encounters.get_sw_border_encounters_graph,
+        scalable=False,
+    ),
+    Benchmark(
+        "backend.get_graph[Criminality,Percent,ICE]",
+        _get_graph("Criminality", "Percent", "ICE", cached=False),
+    ),
+    Benchmark(
+        "backend.get_graph[Criminality,Percent,ICE] (cached)",
+        _get_graph("Criminality", "Percent", "ICE", cached=True),
+    ),
+]
+
+
+# Running
+
+
+def time_function(timed: Timed, repeat: int) -> float:
+    """
+    Return the median time of `repeat` calls, after one untimed warm-up call.
+    """
+    if isinstance(timed, tuple):
+        setup, run = timed
+    else:
+        setup, run = (lambda: None), (lambda _: timed())
+
+    run(setup())
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def is_regression(seconds: float, baseline: float, tolerance: float) -> bool:
+    return (
+        seconds > baseline * tolerance and seconds - baseline > MIN_REGRESSION_SECONDS
+    )
+
+
+def record_fixture() -> None:
+    from immigration_enforcement.http_client import get
+
+    response = get(detentions.DETENTION_DATA_URL)
+    response.raise_for_status()
+    FIXTURE.write_bytes(response.content)
+    print(f"Saved {len(response.json())} records to {FIXTURE}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-k",
+        dest="keyword",
+        default="",
+        help="Only run benchmarks whose name contains this",
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--record", action="store_true")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture()
+        return 0
+
+    # Streamlit warns about running outside of `streamlit run` on every cached call
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    # Keep the synthetic data out of the real archive of TRAC's data
+    with (
+        scratch_directory() as directory,
+        patch(
+            "immigration_enforcement.detentions.get_detention_archive",
+            return_value=archive.SnapshotArchive(directory / "archive"),
+        ),
+    ):
+        return _run(args)
+
+
+def _run(args: argparse.Namespace) -> int:
+    baseline: dict[str, float] = (
+        json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    )
+    results: dict[str, float] = {}
+    regressions = []
+    for benchmark in BENCHMARKS:
+        if args.keyword not in benchmark.name:
+            continue
+        for scale in args.scales if benchmark.scalable else [1]:
+            key = f"{benchmark.name} x{scale}"
+            seconds = time_function(benchmark.prepare(scale), args.repeat)
+            results[key] = round(seconds, 6)
+
+            status = ""
+            if key in baseline:
+                status = f"{seconds / baseline[key]:6.2f}x baseline"
+                if is_regression(seconds, baseline[key], args.tolerance):
+                    status += "  REGRESSION"
+                    regressions.append(key)
+            print(f"{key:60} {seconds * 1000:10.2f} ms  {status}")
+
+    if args.save_baseline:
+        BASELINE.parent.mkdir(exist_ok=True)
+        BASELINE.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"Saved baseline to {BASELINE}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+The presidential administrations marked on the graphs, and the Plotly templates that draw them.
+
+Every time-series graph in the app has a dashed vertical line on the day each administration started, labeled with
+the president's name. The lines and the rest of the shared styling do not depend on the data, so they are built
+once per set of administrations into a Plotly template, which is registered in `plotly.io.templates` under a name.
+Passing that name to Plotly Express builds the figure without validating and copying the template again, while adding
+each line with `add_vline` validates and rebuilds the figure's layout once per line. Each figure still embeds the
+whole template when it is serialized (ex. to JSON for the browser).
+
+plotly.js only draws the shapes of a template that have a `name` (other template array items are only defaults for
+the figure's own items), so each line is named after the day its administration started.
+
+Only the labels depend on the data (they sit at the top of the highest line), so annotate() adds them to each
+figure in one update:
+
+    template = administrations.get_template(since=datetime(2021, 1, 1), legend_on_top=True)
+    fig = px.line(df, x="date", y="count", template=template)
+    administrations.annotate(fig, template, max_y=df["count"].max())
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+
+class Administration(NamedTuple):
+    president: str
+    start: datetime
+
+
+# Clinton's administration (1993) is left out, because it did not start during any of the data periods
+ADMINISTRATIONS: tuple[Administration, ...] = (
+    Administration("George W. Bush", datetime(2001, 1, 20)),
+    Administration("Barack Obama", datetime(2009, 1, 20)),
+    Administration("Donald Trump", datetime(2017, 1, 20)),
+    Administration("Joe Biden", datetime(2021, 1, 20)),
+    Administration("Donald Trump", datetime(2025, 1, 20)),
+)
+
+# The labels of each registered template, keyed by template name
+_labels: dict[str, tuple[dict[str, Any], ...]] = {}
+
+
+def get_administrations(
+    since: datetime | None = None, label_latest: bool = True
+) -> tuple[Administration, ...]:
+    """
+    Return the administrations that started on or after `since` (by default, all of them), oldest first.
+
+    Parameters:
+    - since: Leave out the administrations that started before this date.
+    - label_latest: If False, the latest administration has an empty name, so its line is drawn without a label
+                    (ex. when there is no room for it at the right edge of the graph).
+    """
+    selected = [a for a in ADMINISTRATIONS if since is None or a.start >= since]
+    if selected and not label_latest:
+        selected[-1] = selected[-1]._replace(president="")
+    return tuple(selected)
+
+
+def get_template(
+    since: datetime | None = None,
+    label_latest: bool = True,
+    legend_on_top: bool = False,
+    base: str | None = None,
+) -> str:
+    """
+    Return the name of a Plotly template with a line at the start of each administration. The template is built
+    and registered the first time it is asked for.
+
+    Parameters:
+    - since, label_latest: Which administrations to mark (see get_administrations).
+    - legend_on_top: If True, the legend is laid out horizontally above the graph. Some of TRAC's labels are long,
+                     and the default placement (on the right, next to the lines) cuts significantly into the data
+                     portion of the graph. Especially on mobile, this makes the graph hard to read.
+    - base: The template to extend. Defaults to Plotly's current default template (Streamlit changes it).
+    """
+    import plotly.io as pio
+
+    return _build_template(
+        since, label_latest, legend_on_top, base or pio.templates.default or "plotly"
+    )
+
+
+@lru_cache
+def _build_template(
+    since: datetime | None, label_latest: bool, legend_on_top: bool, base: str
+) -> str:
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    administrations = get_administrations(since, label_latest)
+
+    template = go.layout.Template(pio.templates[base])
+    template.layout.shapes = [
+        dict(
+            type="line",
+            name=f"administration-{a.start:%Y-%m-%d}",
+            x0=a.start,
+            x1=a.start,
+            xref="x",
+            y0=0,
+            y1=1,
+            yref="y domain",
+            line=dict(color="black", dash="dash"),
+        )
+        for a in administrations
+    ]
+    if legend_on_top:
+        template.layout.legend = dict(
+            orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0
+        )
+        template.layout.margin = dict(t=100)  # Increase top margin to prevent overlap
+
+    since_name = since.date().isoformat() if since else "all"
+    # Without "+": Plotly reads "a+b" as the combination of templates "a" and "b"
+    name = f"{base.replace('+', '-')}-administrations-{since_name}"
+    name += "" if label_latest else "-unlabeled-latest"
+    name += "-legend-on-top" if legend_on_top else ""
+
+    pio.templates[name] = template
+    _labels[name] = tuple(
+        dict(
+            x=a.start,
+            text=a.president,
+            xanchor="left",
+            xshift=5,
+            showarrow=False,
+            yanchor="bottom",
+        )
+        for a in administrations
+    )
+    return name
+
+
+def annotate(fig: Figure, template: str, max_y: float) -> Figure:
+    """
+    Write the president's name next to each administration line of a figure drawn with a template from
+    get_template(). If the figure was drawn with another template, the template is applied first.
+
+    Parameters:
+    - fig: The figure. It is modified in place and returned.
+    - template: The name returned by get_template().
+    - max_y: The highest y value in the figure. The labels are placed just above it, or at 0 if it is NaN (ex. the
+             maximum of an empty frame, when the x range leaves no data).
+    """
+    import plotly.io as pio
+
+    registered = pio.templates[template]
+    if fig.layout.template.layout.shapes != registered.layout.shapes:
+        fig.update_layout(template=template)
+        if registered.layout.margin.t is not None:
+            # Plotly Express sets a top margin when the template has none, which would override the template's
+            fig.update_layout(margin_t=registered.layout.margin.t)
+
+    if math.isnan(max_y):
+        max_y = 0.0
+    labels = [{**label, "y": max_y} for label in _labels[template]]
+    fig.update_layout(annotations=[*fig.layout.annotations, *labels])
+    return fig
@@ -0,0 +1,453 @@
+"""
+A local HTTP service that serves the cleaned data and the app's figures, for dashboards that cannot import the package.
+
+    python -m immigration_enforcement.api --port 8502
+
+Endpoints (GET or HEAD):
+  * `/`: lists the tables and graphs, with their URLs.
+  * `/tables/<name>.json` and `/tables/<name>.csv`: a table, ex. `/tables/border-encounters-southwest-land-border.csv`.
+    The tables are TRAC's detention data as `get_detention_data` returns it ("detentions"), the long-format tables
+    the detention charts are drawn from (ex. "detentions-criminality-count-ice"), and the monthly Border Patrol
+    encounters of each border region. `?start=2024-01-01&end=2024-12-31` keeps only the rows in that date range. Both
+    ends are included, and either can be left out.
+  * `/graphs/<name>.json`: the Plotly JSON of a figure `backend.get_graph` draws, ex.
+    `/graphs/criminality-percent-ice.json`. The names are those of the files `prerender.py` writes.
+
+Polling clients should send back the ETag of the last response in `If-None-Match`. Every response has an ETag (a
+hash of its content, with "-gz" appended for the gzipped copy) and `Cache-Control: no-cache`, and the service
+answers with an empty 304 response while the data has not changed. Each response body is built once per version of
+the data and kept in memory, together with a gzipped copy that is sent to clients that accept gzip, so a 304 (or a
+200) serializes and compresses nothing.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Mapping, NamedTuple
+from urllib.parse import parse_qs, urlsplit
+import pandas as pd
+import immigration_enforcement.backend as be
+import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.detentions as detentions
+import immigration_enforcement.shared_cache as shared_cache
+import immigration_enforcement.tracing as tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8502
+FORMATS = {"json": "application/json", "csv": "text/csv; charset=utf-8"}
+
+# Bodies smaller than this are sent uncompressed: gzip would save little and can even make them larger
+MIN_GZIP_SIZE = 1024
+
+# The number of response bodies kept in memory
+MAX_CACHED_RESPONSES = 256
+
+
+class ApiError(Exception):
+    """
+    A request the service cannot answer, sent to the client as a JSON error with `status`.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Representation(NamedTuple):
+    body: bytes
+    content_type: str
+    etag: str
+    # The body, gzipped. None if it is too small to be worth compressing.
+    gzipped: bytes | None
+
+
+class Response(NamedTuple):
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+def _make_representation(body: bytes, content_type: str) -> Representation:
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    gzipped = None
+    if len(body) >= MIN_GZIP_SIZE:
+        # mtime=0, so that the same body is always compressed to the same bytes
+        gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+    return Representation(body, content_type, etag, gzipped)
+
+
+# (path and query) -> (the object the body was built from, the representation)
+_representations: OrderedDict[tuple[str, ...], tuple[object, Representation]] = (
+    OrderedDict()
+)
+_representations_lock = threading.Lock()
+
+
+def _get_representation(
+    key: tuple[str, ...],
+    source: object,
+    build: Callable[[], tuple[bytes, str]],
+) -> Representation:
+    """
+    Return the representation stored under `key` if it was built from `source`, otherwise build and store it.
+
+    The tables and figures are cached by their loaders, which return the same object for as long as the data has
+    not changed, so comparing the objects is enough to tell whether a stored body is current. Storing the object
+    also keeps it alive, so its identity cannot be reused by a new object.
+    """
+    with _representations_lock:
+        stored = _representations.get(key)
+        if stored is not None and stored[0] is source:
+            _representations.move_to_end(key)
+            return stored[1]
+
+    representation = _make_representation(*build())
+    with _representations_lock:
+        _representations[key] = (source, representation)
+        _representations.move_to_end(key)
+        while len(_representations) > MAX_CACHED_RESPONSES:
+            _representations.popitem(last=False)
+    return representation
+
+
+def clear_cache() -> None:
+    with _representations_lock:
+        _representations.clear()
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+@lru_cache(maxsize=1)
+def _get_border_table_names() -> Mapping[str, str]:
+    """
+    Return the name of the encounters table of each border region, mapped to the region. Listing the regions reads
+    the KHSM workbook's artifact, so they are only listed once.
+    """
+    return {
+        f"border-encounters-{_slugify(region)}": region
+        for region in encounters.get_border_regions()
+    }
+
+
+@lru_cache(maxsize=1)
+def get_table_names() -> tuple[str, ...]:
+    """
+    Return the name of every table served under /tables/.
+    """
+    names = ["detentions", "detentions-aa-count", "detentions-aa-pct"]
+    for display in ["count", "pct"]:
+        for authority in detentions.AUTHORITIES:
+            names.append(f"detentions-criminality-{display}-{authority.lower()}")
+    return (*names, *_get_border_table_names())
+
+
+@lru_cache(maxsize=8)
+def _load_border_encounters(region: str, data_version: str) -> pd.DataFrame:
+    # Shares the table built by the app's workers (see encounters._get_cached_border_encounters)
+    return shared_cache.get_or_compute_frame(
+        f"border_encounters-{region}-{data_version}",
+        lambda: encounters.get_border_encounters(region),
+    )
+
+
+def get_table(name: str) -> pd.DataFrame:
+    """
+    Return a table by name (see get_table_names). The same DataFrame is returned until the data changes, and it
+    should not be modified.
+    """
+    border_regions = _get_border_table_names()
+    if name in border_regions:
+        return _load_border_encounters(
+            border_regions[name], encounters.get_data_version()
+        )
+
+    if name not in get_table_names():
+        raise ApiError(404, f"No table {name!r}. Tables: {list(get_table_names())}")
+
+    dataset = detentions.DetentionDataset.load(use_cache=True)
+    tables = {
+        "detentions": dataset.df,
+        "detentions-aa-count": dataset.aa_count,
+        "detentions-aa-pct": dataset.aa_pct,
+    }
+    for authority in detentions.AUTHORITIES:
+        suffix = authority.lower()
+        tables[f"detentions-criminality-count-{suffix}"] = dataset.criminality_count[
+            authority
+        ]
+        tables[f"detentions-criminality-pct-{suffix}"] = dataset.criminality_pct[
+            authority
+        ]
+    return tables[name]
+
+
+@lru_cache(maxsize=1)
+def get_graph_names() -> Mapping[str, be.GraphSpec]:
+    """
+    Return the name of every graph served under /graphs/, mapped to its spec (see backend.get_graph_specs).
+    """
+    return {
+        _slugify("-".join(part for part in spec if part is not None)): spec
+        for spec in be.get_graph_specs()
+    }
+
+
+def _parse_date(query: dict[str, list[str]], key: str) -> date | None:
+    values = query.get(key)
+    if not values:
+        return None
+    try:
+        return date.fromisoformat(values[-1])
+    except ValueError:
+        raise ApiError(
+            400, f"{key} must be a date like 2025-01-31, got {values[-1]!r}"
+        ) from None
+
+
+def filter_dates(
+    df: pd.DataFrame, start: date | None, end: date | None
+) -> pd.DataFrame:
+    """
+    Return the rows of df whose date is between start and end, both included. Either can be None.
+    """
+    if start is None and end is None:
+        return df
+    dates = df["date"]
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= dates >= pd.Timestamp(start)
+    if end is not None:
+        keep &= dates <= pd.Timestamp(end)
+    return df[keep]
+
+
+def _serialize_table(df: pd.DataFrame, fmt: str) -> bytes:
+    df = df.assign(date=df["date"].dt.strftime("%Y-%m-%d"))
+    if fmt == "csv":
+        return df.to_csv(index=False).encode()
+    return df.to_json(orient="records").encode()
+
+
+def _get_table_representation(
+    name: str, fmt: str, query: dict[str, list[str]]
+) -> Representation:
+    start, end = _parse_date(query, "start"), _parse_date(query, "end")
+    if start and end and start > end:
+        raise ApiError(400, f"start ({start}) is after end ({end})")
+
+    df = get_table(name)
+    return _get_representation(
+        ("table", name, fmt, str(start), str(end)),
+        df,
+        lambda: (_serialize_table(filter_dates(df, start, end), fmt), FORMATS[fmt]),
+    )
+
+
+def _get_graph_representation(name: str) -> Representation:
+    graphs = get_graph_names()
+    if name not in graphs:
+        raise ApiError(404, f"No graph {name!r}. Graphs: {list(graphs)}")
+
+    # get_graph() returns the same figure until the data changes
+    fig = be.get_graph(*graphs[name])
+    return _get_representation(
+        ("graph", name), fig, lambda: (fig.to_json().encode(), FORMATS["json"])
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_index_representation() -> Representation:
+    index = {
+        "tables": {
+            name: {fmt: f"/tables/{name}.{fmt}" for fmt in FORMATS}
+            for name in get_table_names()
+        },
+        "graphs": {name: f"/graphs/{name}.json" for name in get_graph_names()},
+    }
+    return _make_representation(json.dumps(index, indent=2).encode(), FORMATS["json"])
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Return True if an If-None-Match header lists `etag` (compared weakly, as RFC 9110 requires), or is "*".
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    """
+    Return True if an Accept-Encoding header allows gzip, ex. "gzip, deflate, br" but not "gzip;q=0".
+    """
+    for coding in (accept_encoding or "").split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        if name.lower() not in ("gzip", "*"):
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _respond(
+    representation: Representation, request_headers: Mapping[str, str]
+) -> Response:
+    """
+    Return the response to a request for `representation`, given the request's headers with lower-case names.
+    """
+    body, etag = representation.body, representation.etag
+    gzipped = (
+        representation.gzipped
+        if _accepts_gzip(request_headers.get("accept-encoding"))
+        else None
+    )
+    if gzipped is not None:
+        # The gzipped copy has different bytes, so it has its own strong ETag (RFC 9110, section 8.8.3.3): a cache
+        # that stored one copy must not answer a conditional request for the other with it.
+        body, etag = gzipped, _get_gzip_etag(etag)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if _matches(request_headers.get("if-none-match"), etag):
+        return Response(304, headers, b"")
+
+    if gzipped is not None:
+        headers["Content-Encoding"] = "gzip"
+    headers["Content-Type"] = representation.content_type
+    return Response(200, headers, body)
+
+
+def _get_gzip_etag(etag: str) -> str:
+    """
+    Return the ETag of the gzipped copy of the representation with `etag`, ex. '"abc-gz"' for '"abc"'.
+    """
+    return etag[:-1] + '-gz"'
+
+
+def _error(status: int, message: str) -> Response:
+    body = json.dumps({"error": message}).encode()
+    return Response(status, {"Content-Type": FORMATS["json"]}, body)
+
+
+def handle(target: str, headers: Mapping[str, str]) -> Response:
+    """
+    Answer a GET request for `target` (a path and query string, ex. "/tables/detentions.csv?start=2025-01-01").
+
+    Parameters:
+    - target: The request target.
+    - headers: The request headers. If-None-Match and Accept-Encoding are used.
+    """
+    headers = {name.lower(): value for name, value in headers.items()}
+    url = urlsplit(target)
+    path = url.path.rstrip("/") or "/"
+    query = parse_qs(url.query)
+
+    with tracing.span("api.handle", path=path):
+        try:
+            if path == "/":
+                representation = _get_index_representation()
+            elif m := re.fullmatch(r"/tables/([a-z0-9-]+)\.(json|csv)", path):
+                representation = _get_table_representation(m[1], m[2], query)
+            elif m := re.fullmatch(r"/graphs/([a-z0-9-]+)\.json", path):
+                representation = _get_graph_representation(m[1])
+            else:
+                raise ApiError(404, f"Not found: {path}. See / for the endpoints.")
+        except ApiError as e:
+            return _error(e.status, e.message)
+
+        return _respond(representation, headers)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep connections open between polls
+    protocol_version = "HTTP/1.1"
+    server_version = "immigration-enforcement-api"
+
+    def do_GET(self) -> None:
+        self._send(self._handle(), include_body=True)
+
+    def do_HEAD(self) -> None:
+        self._send(self._handle(), include_body=False)
+
+    def _handle(self) -> Response:
+        try:
+            return handle(self.path, dict(self.headers.items()))
+        except Exception:
+            # Ex. TRAC is down and there is no cached copy of its data
+            logger.exception("Could not answer %s", self.path)
+            return _error(500, "Internal error. See the service's log.")
+
+    def _send(self, response: Response, include_body: bool) -> None:
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(response.body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def create_server(
+    host: str = "127.0.0.1", port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    """
+    Create the service's server, which handles each request in its own thread. Call serve_forever() to run it.
+    Port 0 picks a free port (see `server.server_address`).
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve the datasets and graphs as JSON and CSV over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    # The Border Patrol graphs use Streamlit's cache, which warns when there is no app running
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.basicConfig(level=logging.INFO)
+
+    server = create_server(args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host!s}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+An append-only local archive of the snapshots of TRAC's detention data.
+
+TRAC's JSON (see `detentions.get_detention_data`) has one row per date and only ever shows the latest numbers: a
+revised count replaces the old one, and rows can disappear. The archive keeps every version. Each fetch that
+returned different data is recorded as a snapshot, but only the rows that are new or revised since the previous
+snapshot are written, as a Parquet file. Rows that disappeared are listed in the manifest. Fetching the same
+response again adds nothing.
+
+This lets the app start from the last archived snapshot without the network (see
+`detentions.get_archived_detention_data`), and lets earlier snapshots be reloaded and compared:
+
+    archive = get_detention_archive()
+    archive.load()             # The latest snapshot, as get_detention_data() returned it
+    archive.load(snapshot=3)   # An earlier one
+    archive.diff(3, 4)         # The rows added, revised or removed between two snapshots
+
+To list the snapshots, or show what changed in the latest one:
+
+    python -m immigration_enforcement.archive
+"""
+
+import json
+import os
+import sys
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from immigration_enforcement.cache_dir import get_cache_dir
+
+KEY = "date"
+
+# The column added to each archived row, with the snapshot that wrote it
+SNAPSHOT_COLUMN = "snapshot"
+
+
+class SnapshotArchive:
+    """
+    Snapshots of a table with one row per `date`, stored as one Parquet file of changed rows per snapshot.
+
+    `manifest.json` lists the snapshots in the order they were added: when each was fetched, the hash of the
+    response it came from, its file (None if no rows changed), how many rows it had, and which dates were added,
+    revised and removed. It is only ever appended to.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = directory / "manifest.json"
+
+    @property
+    def snapshots(self) -> list[dict[str, Any]]:
+        if not self._manifest_path.exists():
+            return []
+        snapshots: list[dict[str, Any]] = json.loads(self._manifest_path.read_text())
+        return snapshots
+
+    def append(
+        self, df: pd.DataFrame, source_hash: str, fetched_at: datetime | None = None
+    ) -> dict[str, Any] | None:
+        """
+        Record df as a new snapshot, writing only its new and revised rows, and return the snapshot's manifest entry.
+        Returns None, and adds nothing, if the latest snapshot came from the same response.
+        """
+        snapshots = self.snapshots
+        if snapshots and snapshots[-1]["source_hash"] == source_hash:
+            return None
+
+        previous = self.load()
+        changed, added, revised = _find_changes(previous, df)
+        removed = sorted(set(_keys(previous)) - set(_keys(df)))
+
+        snapshot = len(snapshots)
+        entry: dict[str, Any] = {
+            "snapshot": snapshot,
+            "fetched_at": (fetched_at or datetime.now(timezone.utc)).isoformat(
+                timespec="seconds"
+            ),
+            "source_hash": source_hash,
+            "file": None,
+            "rows": len(df),
+            "added": len(added),
+            "revised": len(revised),
+            "removed": removed,
+        }
+        if not changed.empty:
+            entry["file"] = f"snapshot-{snapshot:05d}.parquet"
+            changed = changed.assign(**{SNAPSHOT_COLUMN: snapshot})
+            _write_atomically(
+                self.directory / entry["file"], changed.to_parquet(index=False)
+            )
+
+        # The manifest is written last, so a snapshot is never listed before its file exists
+        manifest = json.dumps([*snapshots, entry], indent=2)
+        _write_atomically(self._manifest_path, manifest.encode())
+
+        return entry
+
+    def _read_rows(self, snapshots: list[dict[str, Any]]) -> pd.DataFrame | None:
+        parts = [
+            pd.read_parquet(self.directory / s["file"])
+            for s in snapshots
+            if s["file"] is not None
+        ]
+        return pd.concat(parts, ignore_index=True) if parts else None
+
+    def load(self, snapshot: int | None = None) -> pd.DataFrame:
+        """
+        Return the table as of a snapshot (by default the latest), newest date first, as TRAC lists it, with the
+        dates as datetime64. Returns an empty table if the archive is empty.
+        """
+        snapshots = self.snapshots
+        if snapshot is None:
+            snapshot = len(snapshots) - 1
+        if not -1 <= snapshot < len(snapshots):
+            raise ValueError(
+                f"No snapshot {snapshot} in {self.directory} (it has {len(snapshots)})"
+            )
+
+        up_to = snapshots[: snapshot + 1]
+        rows = self._read_rows(up_to)
+        if rows is None:
+            return pd.DataFrame({KEY: pd.Series(dtype=object)})
+
+        # Snapshots archived before the detention data had a schema hold datetime.date keys, and later ones
+        # datetime64. A date never equals a Timestamp, so the keys are converted before they are compared.
+        rows[KEY] = pd.to_datetime(rows[KEY])
+
+        # The latest version of each row, unless the row was removed after it was written
+        rows = rows.drop_duplicates(KEY, keep="last")
+        removed_in: dict[str, int] = {}
+        for s in up_to:
+            for key in s["removed"]:
+                removed_in[key] = s["snapshot"]
+        removed = [
+            removed_in.get(key, -1) > written
+            for key, written in zip(_keys(rows), rows[SNAPSHOT_COLUMN])
+        ]
+        rows = rows[~pd.Series(removed, index=rows.index, dtype=bool)]
+
+        return (
+            rows.drop(columns=SNAPSHOT_COLUMN)
+            .sort_values(KEY, ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def diff(self, before: int, after: int) -> pd.DataFrame:
+        """
+        Return the rows that changed between two snapshots, with a "change" column that is "added", "revised" or
+        "removed". Added and revised rows have their values as of `after`, and removed rows as of `before`.
+        """
+        old, new = self.load(before), self.load(after)
+        changed, added, revised = _find_changes(old, new)
+        removed = old[~_keys(old).isin(set(_keys(new)))]
+
+        changed = changed.assign(
+            change=["added" if key in added else "revised" for key in _keys(changed)]
+        )
+        return pd.concat(
+            [changed, removed.assign(change="removed")], ignore_index=True
+        ).sort_values(KEY, ascending=False, ignore_index=True)
+
+
+def _keys(df: pd.DataFrame) -> "pd.Series[str]":
+    """
+    Return each row's date as an ISO string ("2025-06-01"), whether the column holds dates, datetimes or strings.
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=str)
+    return pd.to_datetime(df[KEY]).dt.strftime("%Y-%m-%d")
+
+
+def _find_changes(
+    old: pd.DataFrame, new: pd.DataFrame
+) -> tuple[pd.DataFrame, set[str], set[str]]:
+    """
+    Return the rows of `new` that are not in `old` or differ from it, and the keys of the added and revised rows.
+    """
+    old_keys = _keys(old)
+    new_keys = _keys(new)
+    added = set(new_keys) - set(old_keys)
+
+    columns = [c for c in new.columns if c != KEY]
+    old_values = old.set_axis(old_keys).reindex(columns=columns)
+    new_values = new.set_axis(new_keys)[columns]
+    common = pd.Index(new_keys[new_keys.isin(set(old_keys))])
+    a, b = new_values.loc[common], old_values.loc[common]
+    differs = ~((a == b) | (a.isna() & b.isna())).all(axis=1)
+    revised = set(common[differs.to_numpy()])
+
+    changed = new[new_keys.isin(added | revised).to_numpy()]
+    return changed, added, revised
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def get_detention_archive(directory: Path | None = None) -> SnapshotArchive:
+    """
+    Return the archive of TRAC's detention data (by default in the package's cache directory).
+    """
+    return SnapshotArchive(directory or get_cache_dir("archive") / "detentions")
+
+
+if __name__ == "__main__":
+    archive = get_detention_archive()
+    snapshots = archive.snapshots
+    for s in snapshots:
+        print(
+            f"{s['snapshot']:5}  {s['fetched_at']}  {s['rows']:4} rows  "
+            f"{s['added']} added, {s['revised']} revised, {len(s['removed'])} removed"
+        )
+    if len(snapshots) >= 2:
+        latest = len(snapshots) - 1
+        print(f"\nChanges in the latest snapshot:\n{archive.diff(latest - 1, latest)}")
+    sys.exit(0 if snapshots else 1)
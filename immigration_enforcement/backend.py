@@ -1,47 +1,316 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
 import immigration_enforcement.borderpatrol.encounters as encounters
 import immigration_enforcement.detentions as detentions
-from plotly.graph_objs import Figure
+import immigration_enforcement.tracing as tracing
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+    import immigration_enforcement.prerender as prerender
+
+logger = logging.getLogger(__name__)
+
+DATASETS = ["Arresting Authority", "Criminality", "Border Patrol"]
+DISPLAYS = ["Count", "Percent"]
+
+# Set this to a directory written by `python -m immigration_enforcement.prerender` to serve figures from it
+PRERENDERED_DIR_ENV_VAR = "IMMIGRATION_ENFORCEMENT_PRERENDERED_DIR"
+
+# (dataset, display, authority, region), with the parameters the dataset ignores set to None
+GraphSpec = tuple[str, str | None, str | None, str | None]
+
+# (dataset, display, authority, region, data version)
+GraphKey = tuple[str, str | None, str | None, str | None, str]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class FigureCache:
+    """
+    A thread-safe LRU cache of figures, with hit and miss counters (like functools.lru_cache).
+
+    Keys include a fingerprint of the data the figure was built from, so figures built from outdated data are never
+    returned. They are simply evicted once `maxsize` newer figures have been added.
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        self.maxsize = maxsize
+        self._figures: OrderedDict[GraphKey, Figure] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: GraphKey) -> Figure | None:
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._figures.move_to_end(key)
+            return fig
+
+    def put(self, key: GraphKey, fig: Figure) -> None:
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
+            self._hits = self._misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._figures))
+
+
+# There are about 9 distinct figures per data version, so this holds a few versions.
+_figure_cache = FigureCache(maxsize=32)
+
+
+def get_figure_cache_info() -> CacheInfo:
+    """
+    Return the hit and miss counts and the size of the figure cache used by get_graph().
+    """
+    return _figure_cache.info()
+
+
+def clear_figure_cache() -> None:
+    """
+    Empty the figure cache used by get_graph() and reset its counters.
+    """
+    _figure_cache.clear()
+
+
+def get_border_regions() -> list[str]:
+    """
+    Get the regions that can be passed to get_graph() for the "Border Patrol" dataset. The first is the default.
+    """
+    return encounters.get_border_regions()
+
+
+def normalize_graph_spec(
+    dataset: str,
+    display: str | None,
+    authority: str | None,
+    region: str | None = None,
+) -> GraphSpec:
+    """
+    Validate the parameters of get_graph(), and drop the ones the dataset ignores, so that equivalent requests
+    compare equal.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Cannot create graph for dataset={dataset}")
+    if dataset == "Criminality" and authority is None:
+        raise ValueError("Authority must be specified for Criminality dataset")
+
+    if dataset == "Border Patrol":
+        return (dataset, None, None, region or encounters.SOUTHWEST_LAND_BORDER)
+    if dataset == "Arresting Authority":
+        authority = None
+    return (dataset, display, authority, None)
+
+
+def get_detention_graph_specs() -> list[GraphSpec]:
+    """
+    Return every distinct graph of TRAC's detention data get_graph() can draw (see get_graph_specs).
+    """
+    specs: list[GraphSpec] = []
+    for display in DISPLAYS:
+        specs.append(("Arresting Authority", display, None, None))
+    for display in DISPLAYS:
+        for authority in detentions.AUTHORITIES:
+            specs.append(("Criminality", display, authority, None))
+    return specs
+
+
+def get_border_graph_specs() -> list[GraphSpec]:
+    """
+    Return the Border Patrol graph of each border region (see get_graph_specs). Listing the regions loads the KHSM
+    workbook's artifact, which is built first if needed.
+    """
+    return [("Border Patrol", None, None, region) for region in get_border_regions()]
+
+
+def get_graph_specs() -> list[GraphSpec]:
+    """
+    Return every distinct graph get_graph() can draw, as normalized (dataset, display, authority, region) tuples.
+    """
+    return get_detention_graph_specs() + get_border_graph_specs()
+
+
+def _get_prerendered_figures(directory: str) -> prerender.PrerenderedFigures | None:
+    """
+    Return the pre-rendered figures in `directory`, or None if it has no manifest (ex. it is still being written).
+    They are reloaded when its manifest changes.
+    """
+    import immigration_enforcement.prerender as prerender
+
+    manifest = Path(directory) / prerender.MANIFEST
+    try:
+        return _load_prerendered_figures(directory, manifest.stat().st_mtime_ns)
+    except FileNotFoundError:
+        _log_missing_manifest(str(manifest))
+        return None
+
+
+@lru_cache
+def _log_missing_manifest(manifest: str) -> None:
+    # Logged once per path, rather than on every request
+    logger.warning("%s does not exist, so graphs are built from the data", manifest)
+
+
+@lru_cache(maxsize=1)
+def _load_prerendered_figures(
+    directory: str, manifest_mtime: int
+) -> prerender.PrerenderedFigures:
+    import immigration_enforcement.prerender as prerender
+
+    figures = prerender.PrerenderedFigures(Path(directory))
+
+    # The figures are served as they are, but figures drawn from older data should be noticed and re-rendered
+    try:
+        current = _get_current_data_versions()
+    except Exception:
+        logger.warning(
+            "Could not check the data versions of %s", directory, exc_info=True
+        )
+        return figures
+    stale = {
+        name: version
+        for name, version in figures.data_versions.items()
+        if current.get(name) is not None and current[name] != version
+    }
+    if stale:
+        logger.warning(
+            "The figures in %s were drawn from older data (%s), rather than the current data (%s). "
+            "Run `python -m immigration_enforcement.prerender` to update them.",
+            directory,
+            ", ".join(f"{name} {version}" for name, version in stale.items()),
+            ", ".join(f"{name} {current[name]}" for name in stale),
+        )
+    return figures
+
+
+def _get_current_data_versions() -> dict[str, str | None]:
+    """
+    Return the versions of the data, keyed like prerender's manifest, without downloading TRAC's data: the detention
+    data is the last archived fetch (None if nothing has been archived).
+    """
+    return {
+        "detentions": detentions.get_archived_detention_data_version(),
+        "border_patrol": encounters.get_data_version(),
+    }
 
 
 def get_graph(
     dataset: str,
     display: str | None,
     authority: str | None,
+    region: str | None = None,
 ) -> Figure:
     """
     Get the graph specified by the dataset, display and authority.
 
+    Figures are cached, keyed by these parameters and by the version of the underlying data. The same figure object
+    may be returned to several callers, so callers should not modify it.
+
     Parameters
     ----------
     - dataset: one of "Arresting Authority", "Criminality" or "Border Patrol"
     - display: one of "Count" or "Percent"
     - authority: one of "CBP" (for "Customers and Border Protection"), "ICE" (for "Immigration and Customers
     Enforcement") or "All" (for the total number)
+    - region: for the "Border Patrol" dataset, one of get_border_regions(). Defaults to the Southwest Land Border.
+
+    If the IMMIGRATION_ENFORCEMENT_PRERENDERED_DIR environment variable is set, figures are read from that directory
+    (see prerender.py) instead, and no data is loaded. Graphs missing from it, or every graph if it has no manifest,
+    are built as usual.
 
     Returns
     -------
     - A plotly figure
     """
+    # Drop the parameters this dataset ignores, so that equivalent requests share a cache entry.
+    spec = normalize_graph_spec(dataset, display, authority, region)
+    dataset, display, authority, region = spec
+
+    prerendered_dir = os.environ.get(PRERENDERED_DIR_ENV_VAR)
+    if prerendered_dir:
+        with tracing.span("backend.get_prerendered_graph") as s:
+            figures = _get_prerendered_figures(prerendered_dir)
+            fig = None if figures is None else figures.get(spec)
+            s.cache = "miss" if fig is None else "hit"
+        if fig is not None:
+            return fig
+
+    with tracing.span(
+        "backend.get_graph", dataset=dataset, display=display, authority=authority
+    ) as s:
+        detention_dataset = None
+        if dataset == "Border Patrol":
+            data_version = encounters.get_data_version()
+        else:
+            detention_dataset = detentions.DetentionDataset.load(use_cache=True)
+            data_version = detention_dataset.version
+
+        key = (dataset, display, authority, region, data_version)
+        fig = _figure_cache.get(key)
+        s.cache = "miss" if fig is None else "hit"
+        if fig is None:
+            fig = _build_graph(dataset, display, authority, region, detention_dataset)
+            _figure_cache.put(key, fig)
+
+        return fig
+
+
+def _build_graph(
+    dataset: str,
+    display: str | None,
+    authority: str | None,
+    region: str | None,
+    detention_dataset: detentions.DetentionDataset | None,
+) -> Figure:
+    """
+    Build the graph for get_graph(), without caching.
+    """
     fig = None
     if dataset == "Arresting Authority":
         if display == "Count":
-            fig = detentions.get_aa_count_chart(use_cache=True)
+            fig = detentions.get_aa_count_chart(dataset=detention_dataset)
         elif display == "Percent":
-            fig = detentions.get_aa_pct_chart(use_cache=True)
+            fig = detentions.get_aa_pct_chart(dataset=detention_dataset)
     elif dataset == "Criminality":
         if authority is None:
             raise ValueError("Authority must be specified for Criminality dataset")
 
         if display == "Count":
             fig = detentions.get_criminality_count_chart(
-                authority=authority, use_cache=True
+                authority=authority, dataset=detention_dataset
             )
         elif display == "Percent":
             fig = detentions.get_criminality_pct_chart(
-                authority=authority, use_cache=True
+                authority=authority, dataset=detention_dataset
             )
     elif dataset == "Border Patrol":
-        fig = encounters.get_sw_border_encounters_graph()
+        fig = encounters.get_border_encounters_graph(
+            region or encounters.SOUTHWEST_LAND_BORDER, use_cache=True
+        )
 
     if not fig:
         raise ValueError(
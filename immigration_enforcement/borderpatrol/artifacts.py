@@ -0,0 +1,240 @@
+"""
+Compile the raw Border Patrol source files into cleaned columnar (Parquet) artifacts.
+
+Parsing the KHSM workbook with openpyxl takes several seconds, and used to happen every time the encounters data
+was loaded. Instead, each source file is parsed once, cleaned, and written to a Parquet file in the cache directory
+(see `immigration_enforcement.cache_dir`). Reading that file back takes milliseconds.
+
+Artifacts are keyed by a hash of the source file. If a source file is replaced (ex. with a newer download from DHS),
+its hash changes and the artifact is rebuilt automatically the next time it is loaded.
+
+To compile all artifacts ahead of time (ex. when building a deployment image), run:
+
+    python -m immigration_enforcement.borderpatrol.artifacts
+"""
+
+import hashlib
+import os
+import pandas as pd
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+import immigration_enforcement.borderpatrol.sbo as sbo
+import immigration_enforcement.shared_cache as shared_cache
+import immigration_enforcement.tracing as tracing
+import immigration_enforcement.validation as validation
+from immigration_enforcement.cache_dir import get_cache_dir
+
+MODULE_DIR = Path(__file__).parent
+KHSM_WORKBOOK = MODULE_DIR / "KHSM Encounters (USBP) fy25m11.xlsx"
+SBO_CSV = MODULE_DIR / "sbo-encounters-fy22-fy25-aug.csv"
+
+# Bump this when the cleaning logic below changes, so that existing artifacts are rebuilt.
+ARTIFACT_FORMAT_VERSION = 3
+
+# The breakdowns of the data in the KHSM workbook, in the order they appear in the sheet names
+KHSM_DIMENSIONS = ["region", "citizenship", "family_status", "sector"]
+
+# The raw headers every sheet of the KHSM workbook has. "Monthly" sheets also have KHSM_MONTH_COLUMN.
+KHSM_COLUMNS = ["Fiscal\nYear", "Quantity"]
+KHSM_MONTH_COLUMN = "Month"
+
+Builder = Callable[[Path], pd.DataFrame]
+
+
+def hash_file(path: Path) -> str:
+    """
+    Return the SHA-256 hex digest of the file at `path`.
+
+    The digest is kept in memory, keyed by the file's modification time and size, so that the data versions built
+    from it (ex. get_data_version(), computed for each graph and API request) do not re-read the file each time.
+    """
+    stat = os.stat(path)
+    return _hash_file(Path(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _hash_file(path: Path, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _get_artifact_path(source: Path, builder: Builder) -> Path:
+    """
+    The artifact's file name encodes the source file, the function that built it, and a hash of both the source
+    file's contents and the artifact format version.
+    """
+    key = f"{hash_file(source)}-v{ARTIFACT_FORMAT_VERSION}"
+    key_digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return (
+        get_cache_dir("artifacts")
+        / f"{source.stem}.{builder.__name__}.{key_digest}.parquet"
+    )
+
+
+def _write_artifact(df: pd.DataFrame, artifact: Path) -> None:
+    """
+    Write to a temporary file and then rename it, so that a concurrent reader never sees a partial artifact.
+    Artifacts for older versions of the same source file are deleted.
+    """
+    stale = artifact.parent.glob(artifact.name.rsplit(".", 2)[0] + ".*.parquet")
+    for old in stale:
+        old.unlink(missing_ok=True)
+
+    tmp = artifact.with_name(f"{artifact.name}.{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, artifact)
+
+
+def artifact_exists(source: Path, builder: Builder) -> bool:
+    """
+    Return True if the artifact that `builder` produces from `source` is built and up to date.
+    """
+    return _get_artifact_path(source, builder).exists()
+
+
+def load_artifact(source: Path, builder: Builder) -> pd.DataFrame:
+    """
+    Return the artifact that `builder` produces from `source`, building it first if it does not exist or is
+    out of date.
+    """
+    with tracing.span("artifacts.load", builder=builder.__name__) as s:
+        artifact = _get_artifact_path(source, builder)
+        if artifact.exists():
+            s.cache = "hit"
+            return pd.read_parquet(artifact)
+
+        # Only one process on the host builds the artifact. The others wait, and then read it.
+        with shared_cache.lock(f"artifact-{artifact.name}"):
+            if artifact.exists():
+                s.cache = "hit"
+                return pd.read_parquet(artifact)
+
+            s.cache = "miss"
+            df = builder(source)
+            _write_artifact(df, artifact)
+            return df
+
+
+def _clean_khsm_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean one sheet of the KHSM workbook: snake_case column names, "Quantity" renamed to "encounters", and months
+    converted from "01 October" to just "October".
+    """
+    df = df.rename(columns={"Quantity": "Encounters"})
+    df.columns = df.columns.str.lower().str.replace(r"\s+", "_", regex=True)
+
+    if "month" in df.columns:
+        df["month"] = df["month"].str.split().str[1]
+
+    return df
+
+
+def read_khsm_workbook(path: Path) -> pd.DataFrame:
+    """
+    Parse every sheet of the KHSM workbook in a single pass, and combine them into one long dataframe.
+
+    The workbook has one sheet per breakdown of the data (ex. "Monthly Region", "Annual Citizenship",
+    "Monthly Rgn and Sector"). The returned dataframe has the columns:
+      * sheet: the name of the sheet the row came from
+      * fiscal_year: int
+      * month: the full month name (ex. "October"). Missing for the "Annual" sheets.
+      * region, citizenship, family_status, sector: the breakdowns. Each is missing for sheets without it.
+      * encounters: int
+
+    Raises a ValidationError if any sheet is missing one of the expected headers.
+    """
+    sheets = pd.read_excel(path, sheet_name=None)
+
+    # Check every sheet's headers before cleaning them, so that all renamed columns are reported at once
+    problems = []
+    for name, sheet in sheets.items():
+        expected = KHSM_COLUMNS.copy()
+        if name.startswith("Monthly"):
+            expected.append(KHSM_MONTH_COLUMN)
+        problems += [
+            f"{name}: {problem}"
+            for problem in validation.find_column_problems(sheet.columns, expected)
+        ]
+    if problems:
+        raise validation.ValidationError(path.name, problems)
+
+    df = pd.concat(
+        [_clean_khsm_sheet(sheet).assign(sheet=name) for name, sheet in sheets.items()],
+        ignore_index=True,
+    )
+
+    # Every other column is a breakdown of the data. List the known ones first.
+    dimensions = [c for c in KHSM_DIMENSIONS if c in df.columns]
+    dimensions += [
+        c
+        for c in df.columns
+        if c not in ["sheet", "fiscal_year", "month", "encounters", *dimensions]
+    ]
+    for column in ["sheet", "month", *dimensions]:
+        df[column] = df[column].astype("category")
+
+    return df[["sheet", "fiscal_year", "month", *dimensions, "encounters"]]
+
+
+def read_sbo_encounters(path: Path) -> pd.DataFrame:
+    """
+    Parse a CBP "Southwest Land Border Encounters" CSV file.
+
+    The file is read in chunks and aggregated by every dimension column (see `sbo.aggregate_encounters`), so that
+    the much larger nationwide files can be compiled with bounded memory. The column names are kept as-is, and the
+    dimension columns are categoricals.
+    """
+    return sbo.aggregate_encounters(path)
+
+
+def load_khsm_workbook(path: Path = KHSM_WORKBOOK) -> pd.DataFrame:
+    """
+    Cached version of `read_khsm_workbook`.
+    """
+    return load_artifact(path, read_khsm_workbook)
+
+
+def load_khsm_monthly_region(path: Path = KHSM_WORKBOOK) -> pd.DataFrame:
+    """
+    Return the "Monthly Region" sheet of the KHSM workbook, with the columns fiscal_year, month, region and
+    encounters.
+    """
+    df = load_khsm_workbook(path)
+    df = df[df["sheet"] == "Monthly Region"]
+    return df[["fiscal_year", "month", "region", "encounters"]].reset_index(drop=True)
+
+
+def load_sbo_encounters(path: Path = SBO_CSV) -> pd.DataFrame:
+    """
+    Cached version of `read_sbo_encounters`.
+    """
+    return load_artifact(path, read_sbo_encounters)
+
+
+def get_data_version() -> str:
+    """
+    Return a short digest that changes whenever any bundled source file (or the artifact format) changes.
+    Months ingested into the store are not included: use encounters.get_data_version() as the cache key for
+    anything derived from the Border Patrol data.
+    """
+    key = "-".join(
+        [hash_file(KHSM_WORKBOOK), hash_file(SBO_CSV), f"v{ARTIFACT_FORMAT_VERSION}"]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def compile_all() -> None:
+    """
+    Build the artifacts for all bundled source files.
+    """
+    load_khsm_workbook()
+    load_sbo_encounters()
+
+
+if __name__ == "__main__":
+    compile_all()
+    print(f"Compiled artifacts in {get_cache_dir('artifacts')}")
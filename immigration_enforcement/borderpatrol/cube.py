@@ -0,0 +1,153 @@
+"""
+A pre-aggregated, multi-dimensional view of CBP encounter data.
+
+`encounters.get_sw_border_encounters` sums the CBP file down to a single number per month. The file has more
+detail than that: each row is also broken down by Component, Demographic, Citizenship Grouping, Title of Authority
+and Encounter Type. `EncountersCube` keeps those dimensions so that questions like "Title 8 apprehensions of Mexican
+nationals by month" can be answered without re-grouping the raw data:
+
+    cube = get_encounters_cube()
+    cube.query(
+        filters={
+            "Title of Authority": "Title 8",
+            "Encounter Type": "Apprehensions",
+            "Citizenship Grouping": "Mexico",
+        }
+    )
+
+When the cube is built, the encounters are summed over every combination of the dimensions (the "marginals"), and
+each marginal is stored as a Series with a sorted MultiIndex of (date, dimension values). A query picks the marginal
+with exactly the dimensions it filters or groups by, and selects rows from its index by binary search.
+"""
+
+import itertools
+import pandas as pd
+from functools import lru_cache
+from pathlib import Path
+from typing import cast
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.fiscal_calendar as fiscal_calendar
+from immigration_enforcement.borderpatrol.sbo import COUNT_COLUMN
+import immigration_enforcement.validation as validation
+
+# These columns are combined into the "date" dimension
+TIME_COLUMNS = ["Fiscal Year", "Month (abbv)"]
+
+
+class EncountersCube:
+    """
+    Monthly encounters, indexed by every dimension of a CBP encounters file.
+
+    Attributes:
+    - dimensions: The dimensions that can be used in `query` (ex. "Component", "Demographic").
+    - marginals: Maps each tuple of dimensions (in the order of `dimensions`) to a Series of encounters indexed by
+                 (date, *dimensions). Marginals with up to `max_precomputed_dimensions` dimensions are computed when
+                 the cube is built; larger ones are computed on first use.
+    """
+
+    def __init__(self, df: pd.DataFrame, max_precomputed_dimensions: int = 3) -> None:
+        """
+        Parameters:
+        - df: A CBP encounters file, as returned by `artifacts.load_sbo_encounters`.
+        - max_precomputed_dimensions: Build the marginals of up to this many dimensions up front. For a file with n
+                                      dimensions there are 2**n marginals in total.
+        """
+        validation.check_columns(df.columns, TIME_COLUMNS, "CBP encounters file")
+        self.dimensions = [
+            c for c in df.columns if c not in TIME_COLUMNS and c != COUNT_COLUMN
+        ]
+
+        cells = df[self.dimensions].copy()
+        cells.insert(
+            0,
+            "date",
+            fiscal_calendar.to_calendar_date(
+                fiscal_calendar.parse_fiscal_year(df["Fiscal Year"]),
+                fiscal_calendar.month_number(df["Month (abbv)"]),
+            ),
+        )
+        cells["encounters"] = df[COUNT_COLUMN]
+        self._cells = cells
+
+        self.marginals: dict[tuple[str, ...], pd.Series[int]] = {}
+        for n in range(min(max_precomputed_dimensions, len(self.dimensions)) + 1):
+            for dims in itertools.combinations(self.dimensions, n):
+                self._get_marginal(dims)
+
+    def _get_marginal(self, dims: tuple[str, ...]) -> "pd.Series[int]":
+        """
+        Return the encounters summed over every dimension not in `dims`, indexed by (date, *dims).
+        `dims` must be in the same order as `self.dimensions`.
+        """
+        if dims not in self.marginals:
+            marginal = self._cells.groupby(["date", *dims], observed=True)[
+                "encounters"
+            ].sum()
+            # A single-level index must still be a MultiIndex for the slicing in query()
+            if not isinstance(marginal.index, pd.MultiIndex):
+                marginal.index = pd.MultiIndex.from_arrays([marginal.index])
+            self.marginals[dims] = marginal.sort_index()
+        return self.marginals[dims]
+
+    def query(
+        self,
+        filters: dict[str, str | list[str]] | None = None,
+        by: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Return monthly encounters, optionally filtered and broken down by dimensions.
+
+        Parameters:
+        - filters: Maps dimensions to the value (or list of values) to keep.
+                   Ex. {"Component": "U.S. Border Patrol", "Demographic": ["UAC", "FMUA"]}.
+        - by: Dimensions to break the encounters down by, in addition to date.
+
+        Returns a dataframe with the columns "date", the `by` dimensions, and "encounters".
+        Raises ValueError for unknown dimensions.
+        """
+        filters = filters or {}
+        by = by or []
+
+        unknown = [d for d in [*filters, *by] if d not in self.dimensions]
+        if unknown:
+            raise ValueError(
+                f"Unknown dimensions {unknown}. Valid dimensions: {self.dimensions}"
+            )
+
+        dims = tuple(d for d in self.dimensions if d in filters or d in by)
+        marginal = self._get_marginal(dims)
+
+        if filters:
+            selector: list[slice | list[str]] = [slice(None)]  # All dates
+            for level, dim in enumerate(dims, start=1):
+                if dim not in filters:
+                    selector.append(slice(None))
+                    continue
+
+                values = filters[dim]
+                values = [values] if isinstance(values, str) else values
+                # Drop values that do not occur, so they give an empty result instead of a KeyError
+                existing = cast(pd.MultiIndex, marginal.index).levels[level]
+                values = [v for v in values if v in existing]
+                if not values:
+                    return pd.DataFrame(columns=["date", *by, "encounters"])
+                selector.append(values)
+
+            marginal = marginal.loc[tuple(selector)]
+
+        result = marginal.groupby(level=["date", *by], observed=True).sum()
+        return result.reset_index()
+
+
+@lru_cache(maxsize=4)
+def _build_cube(path: Path, source_hash: str) -> EncountersCube:
+    return EncountersCube(artifacts.load_sbo_encounters(path))
+
+
+def get_encounters_cube(path: Path = artifacts.SBO_CSV) -> EncountersCube:
+    """
+    Return the encounters cube for a CBP encounters file (by default, the bundled Southwest Land Border file).
+
+    The cube is built once per version of the file and kept in memory for the lifetime of the process.
+    """
+    return _build_cube(path, artifacts.hash_file(path))
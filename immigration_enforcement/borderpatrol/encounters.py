@@ -10,20 +10,43 @@ The data is sourced from two official Department of Homeland Security (DHS) data
 The above datasets were downloaded from the above websites and are stored in this directory.
 
 Although Border Patrol encounters are reported across three regions - Southwest Land Border, Northern Land Border,
-and Coastal Border - this module focuses exclusively on the Southwest Land Border.
+and Coastal Border - this module focuses on the Southwest Land Border.
 
 The `encounters` module has two functions external users will want to call:
   * `get_sw_border_encounters`: returns a cleaned, merged, dataset of monthly encounters at the Southwest Land Border.
   * `get_sw_border_encounters_graph`: returns a preformatted graph of those encounters,
     suitable for display or analysis.
+
+`get_border_encounters` and `get_border_encounters_graph` do the same for any region, using only the historic dataset
+for the Northern Land Border and Coastal Border.
+
+To break the FYTD data down by Demographic, Citizenship Grouping, Title of Authority or Encounter Type,
+use `cube.get_encounters_cube()`.
+
+Streamlit and Plotly are only imported when a graph or the Streamlit cache is used, so data-only code that imports
+this module starts quickly.
 """
 
+from __future__ import annotations
+
 import pandas as pd
 from datetime import datetime
-import plotly.express as px
-from pathlib import Path
-from plotly.graph_objs import Figure
-from typing import cast, Any, TypedDict
+from typing import Any, TYPE_CHECKING
+import immigration_enforcement.administrations as administrations
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.fiscal_calendar as fiscal_calendar
+import immigration_enforcement.borderpatrol.sbo as sbo
+import immigration_enforcement.borderpatrol.store as store
+import immigration_enforcement.borderpatrol.workbook as workbook
+import immigration_enforcement.rendering as rendering
+import immigration_enforcement.shared_cache as shared_cache
+import immigration_enforcement.tracing as tracing
+import immigration_enforcement.validation as validation
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+SOUTHWEST_LAND_BORDER = "Southwest Land Border"
 
 
 def _convert_fiscal_date_to_calendar_date(fiscal_date: datetime) -> datetime:
@@ -34,6 +57,8 @@ def _convert_fiscal_date_to_calendar_date(fiscal_date: datetime) -> datetime:
     dates in October through December are considered part of the following
     fiscal year. This function adjusts those dates by subtracting one year
     to align them with the calendar year.
+
+    This converts a single date. To convert a whole Series, use `fiscal_calendar.fiscal_to_calendar_date`.
     """
     if fiscal_date.month >= 10:
         return datetime(fiscal_date.year - 1, fiscal_date.month, fiscal_date.day)
@@ -41,9 +66,19 @@ def _convert_fiscal_date_to_calendar_date(fiscal_date: datetime) -> datetime:
         return fiscal_date
 
 
+def _get_fytd_fiscal_year() -> int:
+    """
+    Get the fiscal year the year-to-date dataset covers, ex. 2025 for the file with "2025 (FYTD)" data.
+    """
+    fiscal_years = artifacts.load_sbo_encounters()["Fiscal Year"]
+    label = sbo.get_fytd_label(fiscal_years)
+    return int(label.split()[0])  # I.e. the "2025" from "2025 (FYTD)"
+
+
+@tracing.traced("encounters._get_historic_sw_border_encounters")
 def _get_historic_sw_border_encounters() -> pd.DataFrame:
     """
-    Read in the "Monthly Region" sheet from the "USBP Encounters" Spreadsheet. The file comes from:
+    Get the "Monthly Region" sheet from the "USBP Encounters" Spreadsheet. The file comes from:
     https://ohss.dhs.gov/khsm/cbp-encounters ("CBP Encounters - USBP - November 2024")
 
     This dataset lists dates using Fiscal Years, and those must be converted to Calendar Years
@@ -57,42 +92,20 @@ def _get_historic_sw_border_encounters() -> pd.DataFrame:
     duplicates.
     """
 
-    # Read in data
-    # By using Path to construct the path, this function works if imported from a notebook in the same directory
-    # or a module in another directory (ex. the streamlit app a directory above)
-    module_dir = Path(__file__).parent
-    file_path = module_dir / "KHSM Encounters (USBP) fy25m11.xlsx"
-    df = pd.read_excel(file_path, sheet_name="Monthly Region")
-
-    # Rename columns
-    df = df.rename(columns={"Fiscal\nYear": "Fiscal_Year", "Quantity": "Encounters"})
-    df.columns = df.columns.str.lower()
-
-    # Create a FiscalDate column that is a datetime object that is a combination of the FiscalYear and Month columns.
-    df.month = df.month.str.split().str[1]  # Convert "01 October" to just "October"
-    df["fiscal_date"] = df.fiscal_year.astype(str) + " " + df.month
-    df.fiscal_date = pd.to_datetime(df.fiscal_date, format="%Y %B")  # Day defaults to 1
-
-    # Convert Fiscal Year to Calendar Year
-    df["date"] = df.fiscal_date.apply(_convert_fiscal_date_to_calendar_date)
-
-    # Subset by region
-    region_mask = df["region"] == "Southwest Land Border"
-    df = df[region_mask]
+    # The workbook is parsed once per process and split by region, so this is a lookup.
+    df = workbook.get_khsm_workbook().region_encounters(SOUTHWEST_LAND_BORDER)
 
-    # Subset to the last fiscal year.
+    # Subset to the last full fiscal year, i.e. the one before the year-to-date data starts.
     # We get that on the current fiscal year from another source, and want to avoid duplicates when we merge.
-    LAST_FISCAL_YEAR = 2024
-    last_fiscal_date = datetime(LAST_FISCAL_YEAR, 9, 30)
+    last_fiscal_year = _get_fytd_fiscal_year() - 1
+    last_fiscal_date = datetime(last_fiscal_year, 9, 30)
     fiscal_year_mask = df["date"] <= last_fiscal_date
     df = df[fiscal_year_mask]
 
-    # Now subset columns
-    df = df[["date", "encounters"]]
-
-    return df
+    return df.reset_index(drop=True)
 
 
+@tracing.traced("encounters._get_ytd_sw_border_encounters")
 def _get_ytd_sw_border_encounters() -> pd.DataFrame:
     """
     Data comes from https://www.cbp.gov/document/stats/southwest-land-border-encounters.
@@ -104,29 +117,20 @@ def _get_ytd_sw_border_encounters() -> pd.DataFrame:
 
     This dates here are listed as fiscal years, and must be converted to calendar dates.
     """
-    # By using Path to construct the path, this function works if imported from a notebook in the same directory
-    # or a module in another directory (ex. the streamlit app a directory above)
-    module_dir = Path(__file__).parent
-    file_path = module_dir / "sbo-encounters-fy22-fy25-aug.csv"
-    df = pd.read_csv(file_path)
+    df = artifacts.load_sbo_encounters()
+    validation.check_columns(df.columns, sbo.REQUIRED_COLUMNS, artifacts.SBO_CSV.name)
 
-    # Subset to the latest year for Border Patrol
-    mask = (df["Fiscal Year"] == "2025 (FYTD)") & (
+    # Subset to the latest year (ex. "2025 (FYTD)") for Border Patrol
+    mask = (df["Fiscal Year"] == sbo.get_fytd_label(df["Fiscal Year"])) & (
         df["Component"] == "U.S. Border Patrol"
     )
     df = df[mask]
 
-    # Extract just the year. Note that .str has two different meanings here:
-    # string accessor (.split()) and also as a getter for elements in a list ([0]).
-    # I.e. the "2025" from "2025 (FYTD)".
-    df["Year"] = df["Fiscal Year"].str.split().str[0]
-
-    # Now get the calendar date for each row
-    df["fiscal_date"] = df["Year"] + " " + df["Month (abbv)"]
-    df["fiscal_date"] = pd.to_datetime(
-        df.fiscal_date, format="%Y %b"
-    )  # Day defaults to 1
-    df["date"] = df.fiscal_date.apply(_convert_fiscal_date_to_calendar_date)
+    # Get the calendar date for each row. "Fiscal Year" has values like "2025 (FYTD)".
+    df["date"] = fiscal_calendar.to_calendar_date(
+        fiscal_calendar.parse_fiscal_year(df["Fiscal Year"]),
+        fiscal_calendar.month_number(df["Month (abbv)"]),
+    )
 
     # There are multiple rows for each demographic (ex. citizenship). Sum for each date.
     df = df.groupby("date")["Encounter Count"].sum().reset_index()
@@ -137,90 +141,178 @@ def _get_ytd_sw_border_encounters() -> pd.DataFrame:
     return df
 
 
-def _assert_monthly_date_integrity(df: pd.DataFrame) -> None:
+def _get_bundled_sw_border_encounters() -> pd.DataFrame:
     """
-    Ensure that all dates in the df are unique, and that none are missing from start to end.
+    Merge the two bundled datasets: one historic, and one year-to-date. Ensure no dates are missing or duplicate.
     """
+    historic = _get_historic_sw_border_encounters()
+    ytd = _get_ytd_sw_border_encounters()
+    df = pd.concat([historic, ytd], ignore_index=True)
 
-    start = df["date"].min()
-    end = df["date"].max()
-
-    # Generate expected monthly dates (always first of month)
-    expected_dates = pd.date_range(start=start, end=end, freq="MS")
-
-    # Assert uniqueness and completeness
-    actual_dates = pd.Series(df["date"].unique()).sort_values()
+    validation.check_monthly_dates(df["date"], f"{SOUTHWEST_LAND_BORDER} encounters")
 
-    assert len(actual_dates) == len(expected_dates), "Date count mismatch or duplicates"
-    assert actual_dates.equals(pd.Series(expected_dates)), (
-        "Dates are missing or misaligned"
-    )
+    return df
 
 
+@tracing.traced("encounters.get_sw_border_encounters")
 def get_sw_border_encounters() -> pd.DataFrame:
     """
     Get all available data on Southwest Border Encounters by US Border Patrol.
 
-    This data is in two datasets: one historic, and one year-to-date. Merge them, and ensure no dates
-    are missing or duplicate.
+    This data is in two bundled datasets: one historic, and one year-to-date. Any later months ingested from newer
+    CBP releases (see store.py) are added after them. Ensure no dates are missing or duplicate.
     """
-    historic = _get_historic_sw_border_encounters()
-    ytd = _get_ytd_sw_border_encounters()
-    df = pd.concat([historic, ytd], ignore_index=True)
+    df = _get_bundled_sw_border_encounters()
+    ingested = store.load_sw_border_months_after(df["date"].max())
+    if ingested.empty:
+        return df
 
-    _assert_monthly_date_integrity(df)
+    df = pd.concat([df, ingested], ignore_index=True)
+    validation.check_monthly_dates(df["date"], f"{SOUTHWEST_LAND_BORDER} encounters")
 
     return df
 
 
-def get_sw_border_encounters_graph(annotate_administrations: bool = True) -> Figure:
-    df = get_sw_border_encounters()
+def get_border_regions() -> list[str]:
+    """
+    Get the border regions there is data for, starting with the Southwest Land Border.
+    """
+    regions = workbook.get_khsm_workbook().regions
+    return sorted(regions, key=lambda region: region != SOUTHWEST_LAND_BORDER)
+
+
+def get_data_version() -> str:
+    """
+    Return a short digest that changes whenever the Border Patrol data changes: when a bundled source file is
+    replaced, or when months are ingested into the store (see store.py). Use it as the cache key for anything derived
+    from get_border_encounters().
+    """
+    store_version = store.get_sw_border_version()
+    bundled_version = artifacts.get_data_version()
+    return f"{bundled_version}-{store_version}" if store_version else bundled_version
+
+
+def get_border_encounters(region: str = SOUTHWEST_LAND_BORDER) -> pd.DataFrame:
+    """
+    Get all available data on Border Patrol encounters at one border region (see get_border_regions()).
+
+    For the Southwest Land Border this is get_sw_border_encounters(). For the other regions only the historic
+    dataset is available, and it is used as-is (including the first months of the latest fiscal year).
+    """
+    if region == SOUTHWEST_LAND_BORDER:
+        return get_sw_border_encounters()
+
+    df = workbook.get_khsm_workbook().region_encounters(region).copy()
+    validation.check_monthly_dates(df["date"], f"{region} encounters")
+
+    return df
+
+
+def _get_cached_border_encounters(region: str) -> pd.DataFrame:
+    """
+    Cached version of get_border_encounters(), intended for use inside the Streamlit app.
+    Not recommended for use in notebooks due to runtime warnings.
+
+    The cache lives for the lifetime of the process, and the table is also stored in the shared cache, so that it is
+    built once per host rather than once per worker. It is keyed by the version of the source files, so replacing a
+    source file invalidates it.
+    """
+
+    # Streamlit's @cache_data decorator triggers runtime setup at import time,
+    # which causes distracting warnings in notebooks — even if the cached function is never called.
+    # To avoid this, we define the decorated function inside _get_cached_border_encounters(),
+    # so the decorator is only evaluated when explicitly invoked from the app.
+    # This keeps the module clean and warning-free for notebook users,
+    # while still enabling caching in the Streamlit context. Streamlit itself is imported here for the same reason.
+    import streamlit as st
+
+    @st.cache_data
+    def _inner(region: str, data_version: str) -> pd.DataFrame:
+        tracing.set_cache("miss")  # Only runs on a cache miss
+        # Built by one worker on the host and read by the others (see shared_cache.py)
+        return shared_cache.get_or_compute_frame(
+            f"border_encounters-{region}-{data_version}",
+            lambda: get_border_encounters(region),
+        )
+
+    with tracing.span("encounters.cached_border_encounters", region=region) as s:
+        s.cache = "hit"
+        return _inner(region, get_data_version())
+
+
+def get_sw_border_encounters_graph(
+    annotate_administrations: bool = True,
+    use_cache: bool = False,
+    max_points: int | None = None,
+    x_range: rendering.XRange | None = None,
+) -> Figure:
+    """
+    Get a graph of monthly Border Patrol encounters at the Southwest Land Border.
+
+    Parameters:
+    - annotate_administrations: If True, administration changes are annotated on the graph.
+    - use_cache: If True, uses Streamlit caching (only relevant in app context).
+                 Defaults to False for notebook use.
+    - max_points: If given, the line is downsampled to at most this many points (see rendering.downsample).
+    - x_range: If given, a (start, end) pair of dates: only that window is drawn and downsampled.
+    """
+    return get_border_encounters_graph(
+        SOUTHWEST_LAND_BORDER, annotate_administrations, use_cache, max_points, x_range
+    )
+
+
+@tracing.traced("encounters.get_border_encounters_graph")
+def get_border_encounters_graph(
+    region: str = SOUTHWEST_LAND_BORDER,
+    annotate_administrations: bool = True,
+    use_cache: bool = False,
+    max_points: int | None = None,
+    x_range: rendering.XRange | None = None,
+) -> Figure:
+    """
+    Get a graph of monthly Border Patrol encounters at one border region (see get_border_regions()).
+
+    Parameters:
+    - region: The border region, ex. "Northern Land Border".
+    - annotate_administrations: If True, administration changes are annotated on the graph.
+    - use_cache: If True, uses Streamlit caching (only relevant in app context).
+                 Defaults to False for notebook use.
+    - max_points: If given, the line is downsampled to at most this many points (see rendering.downsample).
+    - x_range: If given, a (start, end) pair of dates: only that window is drawn and downsampled.
+    """
+    df = (
+        _get_cached_border_encounters(region)
+        if use_cache
+        else get_border_encounters(region)
+    )
+    df, render_mode = rendering.prepare(
+        df, "date", "encounters", max_points=max_points, x_range=x_range
+    )
+
+    import plotly.express as px
 
-    fig = px.line(
-        df,
-        x="date",
-        y="encounters",
-        title="Border Patrol Encounters at the Southwest Land Border",
-        labels={"date": "Date", "encounters": "Encounters"},
+    # Trump's second term is marked with a line, but not named, because there is not room for it on the graph.
+    # Any: plotly's stub only accepts the names of its built-in templates.
+    template: Any = (
+        administrations.get_template(label_latest=False)
+        if annotate_administrations
+        else None
     )
+    with tracing.span("px.line"):
+        fig = px.line(
+            df,
+            x="date",
+            y="encounters",
+            title=f"Border Patrol Encounters at the {region}",
+            labels={"date": "Date", "encounters": "Encounters"},
+            render_mode=render_mode,
+            template=template,
+        )
 
     if annotate_administrations:
+        # The template draws a line on the date each administration started. Write the president's name on top.
+        administrations.annotate(fig, template, max_y=df["encounters"].max())
 
-        class Administration(TypedDict):
-            President: str
-            Start: datetime
-
-        administrations: list[Administration] = [
-            # Include Clinton for reference, but comment out bc his administration did not start during the data period
-            # {"President": "Bill Clinton", "Start": datetime(1993, 1, 20)},
-            {"President": "George W. Bush", "Start": datetime(2001, 1, 20)},
-            {"President": "Barack Obama", "Start": datetime(2009, 1, 20)},
-            {"President": "Donald Trump", "Start": datetime(2017, 1, 20)},
-            {"President": "Joe Biden", "Start": datetime(2021, 1, 20)},
-            # Add a line for Trump's second term. But do not include a name, because there is not room for it
-            # on the graph.
-            {"President": "", "Start": datetime(2025, 1, 20)},
-        ]
-
-        # Add a vertical line on the date the administration started, and write the presdient's name on the top
-        max_y = df["encounters"].max()
-
-        for one_administration in administrations:
-            fig.add_vline(
-                x=cast(
-                    Any, one_administration["Start"]
-                ),  # cast: plotly stub expects numbers but runtime accepts datetimes
-                line_color="black",
-                line_dash="dash",
-            )
-            fig.add_annotation(
-                x=one_administration["Start"],
-                y=max_y,
-                text=one_administration["President"],
-                xanchor="left",
-                xshift=5,
-                showarrow=False,
-                yanchor="bottom",
-            )
+    rendering.set_x_range(fig, x_range)
 
     return fig
@@ -0,0 +1,140 @@
+"""
+Vectorized conversions between the federal fiscal calendar and the calendar year.
+
+The U.S. federal fiscal year begins in October: October through December belong to the following fiscal year
+(ex. October 2024 is in Fiscal Year 2025). DHS datasets list months by fiscal year, so they must be converted to
+calendar dates before they can be graphed.
+
+Every function here works on whole Series or arrays at once, without a Python call per row. Dates are handled as
+integer month ordinals (months since January 1970), which is also the unit numpy uses for "datetime64[M]".
+"""
+
+import calendar
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from typing import Any
+
+# Fiscal years start in this calendar month
+FISCAL_YEAR_START_MONTH = 10
+
+
+def _get_month_numbers() -> dict[str, int]:
+    """
+    Map every spelling of a month used in the DHS datasets to its calendar month number (1-12):
+    "October", "OCT", "Oct" and "01 October" (the workbook numbers months in fiscal order) all map to 10.
+    """
+    month_numbers = {}
+    for month in range(1, 13):
+        name = calendar.month_name[month]
+        abbr = calendar.month_abbr[month]
+        fiscal_index = (month - FISCAL_YEAR_START_MONTH) % 12 + 1
+        for spelling in [name, abbr, abbr.upper(), f"{fiscal_index:02d} {name}"]:
+            month_numbers[spelling] = month
+    return month_numbers
+
+
+MONTH_NUMBERS = _get_month_numbers()
+
+
+def month_number(months: "pd.Series[Any]") -> "pd.Series[int]":
+    """
+    Convert month names (ex. "October", "OCT" or "01 October") to calendar month numbers (1-12).
+
+    For categorical Series only the categories are looked up, so the cost does not depend on the number of rows.
+    Raises ValueError if any month is not recognized.
+    """
+    numbers = months.map(MONTH_NUMBERS)
+    if numbers.isna().any():
+        unknown = months[numbers.isna()].unique()
+        raise ValueError(f"Unknown month names: {list(unknown)}")
+    return numbers.astype("int64")
+
+
+def parse_fiscal_year(fiscal_years: "pd.Series[Any]") -> "pd.Series[int]":
+    """
+    Convert fiscal year labels (ex. 2024, "2024" or "2025 (FYTD)") to integers.
+
+    Only the distinct labels are parsed, so the cost barely depends on the number of rows.
+    """
+    codes, labels = pd.factorize(fiscal_years)
+    years = (
+        pd.Series(labels.astype(str))
+        .str.extract(r"^\s*(\d{4})", expand=False)
+        .astype("int64")
+    )
+    result: pd.Series[int] = pd.Series(
+        years.to_numpy()[codes], index=fiscal_years.index
+    )
+    return result
+
+
+def _to_month_ordinals(dates: "pd.Series[pd.Timestamp]") -> npt.NDArray[np.int64]:
+    """
+    Convert dates to month ordinals (months since January 1970).
+    """
+    return (
+        dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype("int64")
+    )
+
+
+def _ordinals_to_dates(ordinals: npt.NDArray[np.int64]) -> npt.NDArray[np.datetime64]:
+    """
+    Convert month ordinals (months since January 1970) to datetime64[ns] values on the first of the month.
+    """
+    return ordinals.astype("datetime64[M]").astype("datetime64[ns]")
+
+
+def to_calendar_date(
+    fiscal_year: "pd.Series[int]", month: "pd.Series[int]"
+) -> "pd.Series[pd.Timestamp]":
+    """
+    Return the calendar date (the first of the month) of each (fiscal year, calendar month number) pair.
+
+    Ex. fiscal year 2025, month 10 (October) is 2024-10-01, and fiscal year 2025, month 1 (January) is 2025-01-01.
+    """
+    years = fiscal_year.to_numpy(dtype="int64")
+    months = month.to_numpy(dtype="int64")
+
+    years = years - (months >= FISCAL_YEAR_START_MONTH)
+    ordinals = (years - 1970) * 12 + (months - 1)
+    return pd.Series(_ordinals_to_dates(ordinals), index=fiscal_year.index)
+
+
+def fiscal_to_calendar_date(
+    fiscal_dates: "pd.Series[pd.Timestamp]",
+) -> "pd.Series[pd.Timestamp]":
+    """
+    Convert dates whose year is a fiscal year (ex. 2025-10-01 for October of Fiscal Year 2025) to calendar dates
+    (2024-10-01). The vectorized equivalent of `encounters._convert_fiscal_date_to_calendar_date`.
+    """
+    values = fiscal_dates.to_numpy(dtype="datetime64[ns]")
+    ordinals = _to_month_ordinals(fiscal_dates)
+    time_in_month = values - _ordinals_to_dates(ordinals)
+
+    months = ordinals % 12 + 1
+    ordinals = ordinals - 12 * (months >= FISCAL_YEAR_START_MONTH)
+    return pd.Series(
+        _ordinals_to_dates(ordinals) + time_in_month, index=fiscal_dates.index
+    )
+
+
+def fiscal_year(dates: "pd.Series[pd.Timestamp]") -> "pd.Series[int]":
+    """
+    Return the fiscal year of each calendar date.
+    """
+    return dates.dt.year + (dates.dt.month >= FISCAL_YEAR_START_MONTH).astype("int64")
+
+
+def fytd_month_index(dates: "pd.Series[pd.Timestamp]") -> "pd.Series[int]":
+    """
+    Return the position of each date's month within its fiscal year: 1 for October through 12 for September.
+    """
+    return (dates.dt.month - FISCAL_YEAR_START_MONTH) % 12 + 1
+
+
+def fiscal_quarter(dates: "pd.Series[pd.Timestamp]") -> "pd.Series[int]":
+    """
+    Return the fiscal quarter (1-4) of each calendar date. Q1 is October through December.
+    """
+    return (fytd_month_index(dates) - 1) // 3 + 1
@@ -0,0 +1,119 @@
+"""
+Memory-bounded ingestion of CBP encounter CSV files.
+
+CBP publishes its encounter data as CSV files with one row per combination of month, component, demographic,
+citizenship, etc. (ex. "Southwest Land Border Encounters",
+https://www.cbp.gov/document/stats/southwest-land-border-encounters).
+The nationwide files are many times larger than the Southwest Land Border file bundled with this package.
+
+`aggregate_encounters` reads such a file in chunks. Only the columns that are needed are read, the repeated string
+fields are read as categoricals, rows are filtered as each chunk is read, and each chunk is aggregated into a
+running total before the next one is read. Peak memory therefore depends on the chunk size and on the number of
+distinct groups, not on the size of the file.
+"""
+
+import pandas as pd
+from pathlib import Path
+from typing import Any
+import immigration_enforcement.validation as validation
+
+COUNT_COLUMN = "Encounter Count"
+
+# "Month Grouping" ("FYTD" or "Remaining") is derived from the month, so it is not useful as a dimension
+IGNORED_COLUMNS = ["Month Grouping"]
+
+# The columns the encounters module and the cube rely on. A file without them has most likely had them renamed.
+REQUIRED_COLUMNS = ["Fiscal Year", "Month (abbv)", "Component", COUNT_COLUMN]
+
+
+def _read_columns(path: Path, expected: list[str]) -> list[str]:
+    """
+    Read just the header of a CBP encounters file, and check that it has the count column and `expected`.
+    """
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    validation.check_columns(columns, [*expected, COUNT_COLUMN], path.name)
+    return columns
+
+
+def get_dimensions(path: Path) -> list[str]:
+    """
+    Return the dimension columns of a CBP encounters file: every column except the count and the ignored columns.
+    Only the header is read. Raises a ValidationError if the file has no count column.
+    """
+    columns = _read_columns(path, [])
+    return [c for c in columns if c != COUNT_COLUMN and c not in IGNORED_COLUMNS]
+
+
+def get_fytd_label(fiscal_years: "pd.Series[Any]") -> str:
+    """
+    Return the label of the fiscal year-to-date year (ex. "2025 (FYTD)") among the values of a "Fiscal Year" column.
+    CBP files have at most one such year: the latest one.
+    """
+    labels = [str(label) for label in pd.unique(fiscal_years) if "FYTD" in str(label)]
+    if len(labels) != 1:
+        raise ValueError(f"Expected exactly one FYTD fiscal year, found {labels}")
+    return labels[0]
+
+
+def _combine(partials: list["pd.Series[int]"], n_levels: int) -> "pd.Series[int]":
+    """
+    Sum several partial aggregates (Series indexed by the group keys) into one.
+    """
+    combined = pd.concat(partials)
+    return combined.groupby(
+        level=list(range(n_levels)), observed=True, sort=False
+    ).sum()
+
+
+def aggregate_encounters(
+    path: Path,
+    by: list[str] | None = None,
+    filters: dict[str, list[str]] | None = None,
+    chunksize: int = 100_000,
+) -> pd.DataFrame:
+    """
+    Sum the "Encounter Count" column of a CBP encounters CSV file by the columns in `by`.
+
+    Parameters:
+    - path: The CSV file.
+    - by: The columns to group by. Defaults to every dimension in the file (see get_dimensions), which removes
+          duplicate rows without losing any detail.
+    - filters: Only rows where each column has one of the listed values are counted.
+               Ex. {"Fiscal Year": ["2025 (FYTD)"], "Component": ["U.S. Border Patrol"]}.
+    - chunksize: The number of rows read at a time.
+
+    Returns a dataframe with the `by` columns (as categoricals) followed by "Encounter Count".
+    Raises a ValidationError if the count column, or a column in `by` or `filters`, is missing from the file.
+    """
+    by = by if by is not None else get_dimensions(path)
+    filters = filters or {}
+
+    dimensions = list(dict.fromkeys([*by, *filters]))
+    _read_columns(path, dimensions)
+
+    reader = pd.read_csv(
+        path,
+        usecols=[*dimensions, COUNT_COLUMN],
+        dtype={column: "category" for column in dimensions},
+        chunksize=chunksize,
+    )
+
+    total: pd.Series[int] | None = None
+    for chunk in reader:
+        for column, values in filters.items():
+            chunk = chunk[chunk[column].isin(values)]
+        if chunk.empty:
+            continue
+
+        partial = chunk.groupby(by, observed=True, sort=False)[COUNT_COLUMN].sum()
+        total = partial if total is None else _combine([total, partial], len(by))
+
+    if total is None or total.empty:
+        empty = pd.DataFrame({column: pd.Categorical([]) for column in by})
+        empty[COUNT_COLUMN] = pd.Series(dtype="int64")
+        return empty
+
+    df = total.reset_index()
+    for column in by:
+        df[column] = df[column].astype("category")
+    return df
@@ -0,0 +1,233 @@
+"""
+An append-only store of monthly Southwest Land Border encounters, for incremental monthly refreshes.
+
+CBP publishes a new "Southwest Land Border Encounters" CSV every month
+(https://www.cbp.gov/document/stats/southwest-land-border-encounters). Each file repeats every month since FY2022,
+so re-parsing everything, plus 25 years of historic data, each month is wasted work. Instead, the store keeps the
+months it already has as Parquet files, and ingesting a new CSV only:
+  1. Skips the file if it was ingested before (by content hash).
+  2. Aggregates the file's Border Patrol encounters by month (see `sbo.aggregate_encounters`).
+  3. Keeps only the months after the last stored month, and checks that those months are complete, unique and
+     continue directly from the stored ones.
+  4. Writes them as a new Parquet file, and records it in the store's manifest.
+
+Months that a new file revises, but that are already in the store, keep their stored values. They are logged, and
+listed in the manifest.
+
+The first time the store is used it is seeded with the bundled data. `encounters.get_sw_border_encounters()` adds
+the stored months after the bundled ones to the data it returns, so ingested months reach the graphs without
+replacing the bundled CSV file.
+
+To ingest a newly downloaded file:
+
+    python -m immigration_enforcement.borderpatrol.store path/to/new-file.csv
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import pandas as pd
+from pathlib import Path
+from typing import Any
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.fiscal_calendar as fiscal_calendar
+import immigration_enforcement.borderpatrol.sbo as sbo
+import immigration_enforcement.validation as validation
+from immigration_enforcement.cache_dir import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+
+class EncountersStore:
+    """
+    Monthly encounters (columns "date" and "encounters"), stored as one Parquet file per ingested release.
+
+    `manifest.json` lists the releases in the order they were added, with the hash of their source file and the
+    range of months they added, and the stored months they revised (which were not changed). It is only ever
+    appended to.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = directory / MANIFEST
+
+    @property
+    def releases(self) -> list[dict[str, Any]]:
+        if not self._manifest_path.exists():
+            return []
+        releases: list[dict[str, Any]] = json.loads(self._manifest_path.read_text())
+        return releases
+
+    def last_date(self) -> pd.Timestamp | None:
+        """
+        Return the last month in the store, or None if it is empty. Only the manifest is read.
+        """
+        ends = [r["end"] for r in self.releases if r["end"] is not None]
+        return pd.Timestamp(max(ends)) if ends else None
+
+    def has_source(self, source_hash: str) -> bool:
+        return any(r["source_hash"] == source_hash for r in self.releases)
+
+    def append(self, df: pd.DataFrame, source: str, source_hash: str) -> int:
+        """
+        Add the months in df that are after the last stored month, and return how many were added.
+
+        Months already in the store keep their stored values. Those that df revises are logged and listed in the
+        manifest. Only the new months are validated, together with the last stored month so that a gap between the
+        two is caught.
+        """
+        last = self.last_date()
+        new = df[["date", "encounters"]]
+        revised: list[str] = []
+        if last is not None:
+            revised = self._find_revised(new[new["date"] <= last])
+            new = new[new["date"] > last]
+        new = new.sort_values("date").reset_index(drop=True)
+
+        if not new.empty:
+            boundary = [] if last is None else [last]
+            validation.check_monthly_dates(
+                pd.Series([*boundary, *new["date"]]), f"New months for {self.directory}"
+            )
+
+        release = {
+            "source": source,
+            "source_hash": source_hash,
+            "file": None,
+            "start": None,
+            "end": None,
+            "rows": len(new),
+            "revised": revised,
+        }
+        if not new.empty:
+            part = f"part-{len(self.releases):05d}.parquet"
+            _write_atomically(self.directory / part, new.to_parquet(index=False))
+            release.update(
+                file=part,
+                start=new["date"].min().isoformat(),
+                end=new["date"].max().isoformat(),
+            )
+
+        manifest = json.dumps([*self.releases, release], indent=2)
+        _write_atomically(self._manifest_path, manifest.encode())
+
+        if revised:
+            logger.warning(
+                "%s revises %d months that are already stored in %s, which keep their stored values: %s",
+                source,
+                len(revised),
+                self.directory,
+                ", ".join(revised),
+            )
+        return len(new)
+
+    def _find_revised(self, df: pd.DataFrame) -> list[str]:
+        """
+        Return the months (ex. "2024-06") of df that are in the store with a different count.
+        """
+        if df.empty:
+            return []
+        stored = self.load().set_index("date")["encounters"]
+        counts = df.set_index("date")["encounters"]
+        common = counts.index.intersection(stored.index)
+        differs = counts[common] != stored[common]
+        return sorted(date.strftime("%Y-%m") for date in common[differs.to_numpy()])
+
+    def ingest_sbo_csv(self, path: Path) -> int:
+        """
+        Add the new months of Border Patrol encounters in a CBP "Southwest Land Border Encounters" CSV file, and
+        return how many were added. A file that was already ingested is skipped.
+        """
+        source_hash = artifacts.hash_file(path)
+        if self.has_source(source_hash):
+            return 0
+
+        df = sbo.aggregate_encounters(
+            path,
+            by=["Fiscal Year", "Month (abbv)"],
+            filters={"Component": ["U.S. Border Patrol"]},
+        )
+        df["date"] = fiscal_calendar.to_calendar_date(
+            fiscal_calendar.parse_fiscal_year(df["Fiscal Year"]),
+            fiscal_calendar.month_number(df["Month (abbv)"]),
+        )
+        df = df.groupby("date")[sbo.COUNT_COLUMN].sum().reset_index()
+        df = df.rename(columns={sbo.COUNT_COLUMN: "encounters"})
+
+        return self.append(df, path.name, source_hash)
+
+    def load(self) -> pd.DataFrame:
+        """
+        Return every month in the store, in date order.
+        """
+        parts = [
+            pd.read_parquet(self.directory / r["file"])
+            for r in self.releases
+            if r["file"] is not None
+        ]
+        if not parts:
+            return pd.DataFrame(
+                {"date": pd.Series(dtype="datetime64[ns]"), "encounters": []}
+            )
+        return pd.concat(parts, ignore_index=True)
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _get_sw_border_directory() -> Path:
+    return get_cache_dir("store") / "sw_border"
+
+
+def get_sw_border_store(directory: Path | None = None) -> EncountersStore:
+    """
+    Return the store of Southwest Land Border encounters, seeding it with the bundled data if it is empty.
+    """
+    # Imported here, because encounters imports this module
+    import immigration_enforcement.borderpatrol.encounters as encounters
+
+    store = EncountersStore(directory or _get_sw_border_directory())
+    if not store.releases:
+        store.append(
+            encounters._get_bundled_sw_border_encounters(),
+            source="bundled",
+            source_hash=artifacts.get_data_version(),
+        )
+    return store
+
+
+def load_sw_border_months_after(date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Return the months after `date` in the store of Southwest Land Border encounters, in date order. Returns an
+    empty table if nothing was ingested. Unlike get_sw_border_store(), this never seeds the store.
+    """
+    df = EncountersStore(_get_sw_border_directory()).load()
+    return df[df["date"] > date].reset_index(drop=True)
+
+
+def get_sw_border_version() -> str:
+    """
+    Return a short digest of the store's manifest, which changes whenever months are ingested, or "" if the store
+    was never used.
+    """
+    manifest = _get_sw_border_directory() / MANIFEST
+    try:
+        return hashlib.sha256(manifest.read_bytes()).hexdigest()[:16]
+    except FileNotFoundError:
+        return ""
+
+
+if __name__ == "__main__":
+    store = get_sw_border_store()
+    for arg in sys.argv[1:]:
+        added = store.ingest_sbo_csv(Path(arg))
+        print(f"{arg}: added {added} months")
+    print(f"The store has data through {store.last_date():%B %Y}")
@@ -0,0 +1,94 @@
+"""
+Sheet- and region-indexed access to the KHSM "CBP Encounters - USBP" workbook
+(https://ohss.dhs.gov/khsm/cbp-encounters).
+
+The workbook is parsed once, in a single pass over all of its sheets (see `artifacts.read_khsm_workbook`).
+`KhsmWorkbook` splits the result by sheet and by region up front, so that getting any one sheet, or the monthly
+encounters at any one border, is a dictionary lookup rather than another parse of the file:
+
+    wb = get_khsm_workbook()
+    wb.sheet_names       # ["Annual Citizenship", ..., "Monthly Sector"]
+    wb.regions           # ["Coastal Border", "Northern Land Border", "Southwest Land Border"]
+    wb.sheet("Monthly Family Status")
+    wb.region_encounters("Northern Land Border")
+"""
+
+import pandas as pd
+from functools import lru_cache
+from pathlib import Path
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.fiscal_calendar as fiscal_calendar
+
+REGION_SHEET = "Monthly Region"
+
+
+class KhsmWorkbook:
+    """
+    The sheets of the KHSM workbook, indexed by sheet name, and the monthly encounters of each region.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        """
+        Parameters:
+        - df: The combined sheets, as returned by `artifacts.load_khsm_workbook`.
+        """
+        df = df.copy()
+        monthly = df["month"].notna()
+        df["date"] = pd.NaT
+        df.loc[monthly, "date"] = fiscal_calendar.to_calendar_date(
+            df.loc[monthly, "fiscal_year"],
+            fiscal_calendar.month_number(df.loc[monthly, "month"]),
+        )
+
+        # Only keep the columns each sheet actually has
+        self._sheets: dict[str, pd.DataFrame] = {}
+        for name, sheet in df.groupby("sheet", observed=True, sort=True):
+            sheet = sheet.drop(columns="sheet").dropna(axis="columns", how="all")
+            for column in sheet.select_dtypes("category").columns:
+                sheet[column] = sheet[column].cat.remove_unused_categories()
+            self._sheets[str(name)] = sheet.reset_index(drop=True)
+
+        self._regions: dict[str, pd.DataFrame] = {
+            str(region): rows[["date", "encounters"]].reset_index(drop=True)
+            for region, rows in self._sheets[REGION_SHEET].groupby(
+                "region", observed=True, sort=True
+            )
+        }
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self._sheets)
+
+    @property
+    def regions(self) -> list[str]:
+        return list(self._regions)
+
+    def sheet(self, name: str) -> pd.DataFrame:
+        """
+        Return one sheet of the workbook. Monthly sheets also have a "date" column with the calendar date.
+        """
+        if name not in self._sheets:
+            raise ValueError(f"Unknown sheet {name}. Valid sheets: {self.sheet_names}")
+        return self._sheets[name]
+
+    def region_encounters(self, region: str) -> pd.DataFrame:
+        """
+        Return the monthly encounters at one border region, with the columns "date" and "encounters".
+        """
+        if region not in self._regions:
+            raise ValueError(f"Unknown region {region}. Valid regions: {self.regions}")
+        return self._regions[region]
+
+
+@lru_cache(maxsize=2)
+def _build_workbook(path: Path, source_hash: str) -> KhsmWorkbook:
+    return KhsmWorkbook(artifacts.load_khsm_workbook(path))
+
+
+def get_khsm_workbook(path: Path = artifacts.KHSM_WORKBOOK) -> KhsmWorkbook:
+    """
+    Return the KHSM workbook (by default, the one bundled with this package).
+
+    It is built once per version of the file and kept in memory for the lifetime of the process.
+    """
+    return _build_workbook(path, artifacts.hash_file(path))
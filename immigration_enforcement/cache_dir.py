@@ -0,0 +1,24 @@
+"""
+Location of the on-disk cache shared by the modules in this package.
+
+By default files are stored in `~/.cache/immigration_enforcement`. Set the environment variable
+`IMMIGRATION_ENFORCEMENT_CACHE_DIR` to use a different directory (ex. in tests, or on a host where the home
+directory is read-only).
+"""
+
+import os
+from pathlib import Path
+
+CACHE_DIR_ENV_VAR = "IMMIGRATION_ENFORCEMENT_CACHE_DIR"
+
+
+def get_cache_dir(name: str) -> Path:
+    """
+    Return the cache subdirectory `name`, creating it if it does not exist.
+    """
+    root = os.environ.get(CACHE_DIR_ENV_VAR)
+    base = Path(root) if root else Path.home() / ".cache" / "immigration_enforcement"
+
+    cache_dir = base / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
@@ -1,15 +1,37 @@
 """
 Functions to scrape and graph data from TRAC's "ICE Detainees" page
 (https://tracreports.org/immigration/detentionstats/pop_agen_table.html).
+
+Plotly and the HTTP client are imported by the functions that use them, so that importing this module
+(ex. to work with the data in a batch job) does not pay for importing them.
 """
 
-import streamlit as st
-import requests
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import numpy as np
 import pandas as pd
-import plotly.express as px
-from plotly.graph_objs import Figure
-from typing import cast, Sequence, Any, TypedDict
+from types import MappingProxyType
+from typing import Final, Mapping, Any, TYPE_CHECKING
 from datetime import datetime
+import immigration_enforcement.administrations as administrations
+import immigration_enforcement.rendering as rendering
+import immigration_enforcement.shared_cache as shared_cache
+import immigration_enforcement.tracing as tracing
+import immigration_enforcement.validation as validation
+from immigration_enforcement.archive import get_detention_archive
+from immigration_enforcement.refresh import RefreshingValue
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+logger = logging.getLogger(__name__)
+
+DETENTION_DATA_URL = (
+    "https://tracreports.org/immigration/detentionstats/pop_agen_table.json"
+)
 
 colorblind_palette = colorblind_palette = [
     "#377eb8",  # blue
@@ -18,7 +40,11 @@ colorblind_palette = colorblind_palette = [
     "#999999",  # gray
 ]
 
+# TRAC's data starts in 2019, so only the administrations since then are marked on the graphs
+ADMINISTRATIONS_SINCE = datetime(2019, 1, 1)
+
 
+@tracing.traced("detentions.get_detention_data")
 def get_detention_data() -> pd.DataFrame:
     """
     Get the data which powers TRAC's "ICE Detainees" page and return it as a dataframe.
@@ -33,16 +59,80 @@ def get_detention_data() -> pd.DataFrame:
     5. The JSON which populates the Detention Quick Facts page:
        https://tracreports.org/immigration/detentionstats/pop_agen_table.json
 
-    This function gets the data from (5), does some light processing, and returns it.
+    This function gets the data from (5), checks that it has the expected columns and no duplicate dates (raising a
+    ValidationError otherwise), and returns it with the dtypes in DETENTION_SCHEMA. The response is cached on
+    disk and revalidated with a conditional GET, so if TRAC has not updated the data it is not downloaded again.
+    Each new version of the data is also added to the local archive (see archive.py).
+    """
+    import immigration_enforcement.http_cache as http_cache
+
+    body = http_cache.fetch(DETENTION_DATA_URL)
+    df = parse_detention_data(body)
+    _archive_detention_data(df, hashlib.sha256(body).hexdigest())
+    return df
+
+
+def parse_detention_data(body: bytes) -> pd.DataFrame:
     """
-    response = requests.get(
-        "https://tracreports.org/immigration/detentionstats/pop_agen_table.json"
+    Parse the JSON returned by TRAC (see get_detention_data()).
+    """
+    with tracing.span("detentions.parse"):
+        df = pd.DataFrame(json.loads(body))
+        validation.check_columns(df.columns, TRAC_COLUMNS, "TRAC detention data")
+        validation.check_unique_dates(df["date"], "TRAC detention data")
+        validation.check_integers(df, COUNT_COLUMNS, COUNT_DTYPE, "TRAC detention data")
+        df["date"] = pd.to_datetime(df["date"], format="%m/%d/%Y")
+
+    return apply_detention_schema(df)
+
+
+def apply_detention_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return df with the dtypes in DETENTION_SCHEMA, ex. for data archived before the schema was introduced. Columns
+    that are not in the schema are kept as they are.
+    """
+    counts = [column for column in COUNT_COLUMNS if column in df.columns]
+    if (df[counts].dtypes == COUNT_DTYPE).all() and df[
+        "date"
+    ].dtype == "datetime64[ns]":
+        return df
+
+    # The counts are converted as one block: converting them one column at a time is several times slower
+    others = df.drop(columns=counts).assign(date=pd.to_datetime(df["date"]))
+    block = pd.DataFrame(
+        df[counts].to_numpy(dtype=COUNT_DTYPE), columns=counts, index=df.index
     )
+    return pd.concat([others, block], axis=1)[list(df.columns)]
 
-    df = pd.DataFrame(response.json())
-    df.date = pd.to_datetime(df.date).dt.date
 
-    return df
+def _archive_detention_data(df: pd.DataFrame, source_hash: str) -> None:
+    # Nothing is written if the response is the same as the last archived one, which is the common case
+    try:
+        with tracing.span("detentions.archive"), shared_cache.lock("detention-archive"):
+            get_detention_archive().append(df, source_hash)
+    except Exception:
+        # The archive is a convenience. The data itself was fetched, so it is still returned, whatever went wrong
+        # (ex. a full disk, or an archive file that can't be parsed).
+        logger.warning("Could not archive TRAC's detention data", exc_info=True)
+
+
+def get_archived_detention_data() -> pd.DataFrame | None:
+    """
+    Return TRAC's data as of the last fetch that was archived, without using the network, or None if nothing
+    has been archived.
+    """
+    with tracing.span("detentions.load_archive"):
+        df = get_detention_archive().load()
+    return None if df.empty else apply_detention_schema(df)
+
+
+def get_archived_detention_data_version() -> str | None:
+    """
+    Return the version (see DetentionDataset.version) of the last fetch of TRAC's data that was archived, without
+    using the network, or None if nothing has been archived.
+    """
+    df = get_archived_detention_data()
+    return None if df is None else _get_data_version(df)
 
 
 def _get_cached_detention_data() -> pd.DataFrame:
@@ -50,48 +140,259 @@ def _get_cached_detention_data() -> pd.DataFrame:
     Cached version of get_detention_data(), intended for use inside the Streamlit app.
     Not recommended for use in notebooks due to runtime warnings.
     """
+    return _get_cached_detention_dataset().df
+
+
+# TRAC updates its data about every two weeks, so a copy up to 15 minutes old is fine. It is reloaded in the
+# background a minute before then, so no request waits on TRAC after the first one (see refresh.py).
+CACHE_TTL = 15 * 60
+CACHE_REFRESH_AHEAD = 60
+
+
+def _load_detention_dataset() -> "DetentionDataset":
+    # Shared by the workers on a host, so that only one of them downloads the data when it is due (see
+    # shared_cache.py). A copy is fresh until the next scheduled refresh.
+    df = shared_cache.get_or_compute_frame(
+        "detentions", get_detention_data, ttl=CACHE_TTL - CACHE_REFRESH_AHEAD
+    )
+    return DetentionDataset(df).freeze()
+
+
+def _load_archived_detention_dataset() -> "DetentionDataset | None":
+    df = get_archived_detention_data()
+    return None if df is None else DetentionDataset(df).freeze()
+
+
+# On startup the last archived copy is served right away, while the data is refreshed in the background
+_detention_dataset = RefreshingValue(
+    _load_detention_dataset,
+    load_stale=_load_archived_detention_dataset,
+    ttl=CACHE_TTL,
+    refresh_ahead=CACHE_REFRESH_AHEAD,
+    name="detention data",
+)
+
+
+def _get_cached_detention_dataset() -> "DetentionDataset":
+    """
+    Cached version of DetentionDataset.load(), intended for use inside the Streamlit app.
+
+    The dataset is shared by every session in the process, without copying, and is refreshed in the background
+    before it is 15 minutes old. It is frozen (see DetentionDataset.freeze()), so it cannot be modified.
+    """
+    with tracing.span("detentions.cached_dataset") as s:
+        s.cache = "hit" if _detention_dataset.is_loaded() else "miss"
+        return _detention_dataset.get()
+
+
+def _get_data_version(df: pd.DataFrame) -> str:
+    """
+    Return a short digest of the contents of df. It changes whenever TRAC publishes new or revised data.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()[:16]
+
+
+# Maps column prefixes / suffixes in TRAC's data to the labels used in the charts
+AA_LABELS = {"ice": "ICE", "cbp": "CBP", "total": "Total"}
+CRIMINALITY_LABELS = {
+    "conv": "Convicted Criminal",
+    "pend": "Pending Criminal Charges",
+    "other": "Other Immigration Violator",
+    "all": "Total",
+}
+AUTHORITIES = ["All", "ICE", "CBP"]
+
+# The population counts in TRAC's data, ex. "ice_all" and "cbp_conv"
+COUNT_COLUMNS = [
+    f"{prefix}_{suffix}" for prefix in AA_LABELS for suffix in CRIMINALITY_LABELS
+]
+
+# Every column in TRAC's data
+TRAC_COLUMNS = ["date", *COUNT_COLUMNS]
+
+# Populations are in the tens of thousands, which is too large for int16. int32 is half the size of the int64 that
+# pandas infers, and percentages do not need more precision than float32.
+COUNT_DTYPE: Final = "int32"
+PERCENT_DTYPE: Final = "float32"
+DETENTION_SCHEMA = {
+    "date": "datetime64[ns]",
+    **{column: COUNT_DTYPE for column in COUNT_COLUMNS},
+}
+
+
+def _make_read_only(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a copy of df whose columns are NumPy arrays marked as read-only, so that modifying its values in place
+    raises a ValueError.
+    """
+    # Only public APIs: with copy=False, pandas keeps each array as it is (one block per column), read-only flag
+    # included. tests/test_detentions.py checks that every column stays read-only.
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy(copy=True)
+        values.flags.writeable = False
+        columns[name] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _melt(
+    wide: pd.DataFrame, labels: dict[str, str], var_name: str, value_name: str
+) -> pd.DataFrame:
+    """
+    Convert the columns of `wide` (which is indexed by date) listed in `labels` from wide to long format.
+    The columns are renamed to their labels, and appear in the long table in the order of `labels`.
+    """
+    df = wide[list(labels)].rename(columns=labels).reset_index()
+    return df.melt(id_vars="date", var_name=var_name, value_name=value_name)
+
+
+class DetentionDataset:
+    """
+    TRAC's detention data, loaded once, together with every table the charts in this module need.
 
-    # Streamlit's @cache_data decorator triggers runtime setup at import time,
-    # which causes distracting warnings in notebooks — even if the cached function is never called.
-    # To avoid this, we define the decorated function inside _get_cached_detention_data(),
-    # so the decorator is only evaluated when explicitly invoked from the app.
-    # This keeps the module clean and warning-free for notebook users,
-    # while still enabling caching in the Streamlit context.
+    The tables are computed when the object is created, and are in long format, ready to pass to px.line:
+      * aa_count, aa_pct: columns "date", "Arresting Authority" and "count" / "percent".
+      * criminality_count, criminality_pct: dicts keyed by authority ("All", "ICE" or "CBP"). Each value has the
+        columns "date", "Criminal Status" and "count" / "percent".
 
-    @st.cache_data(ttl="15m")
-    def _inner() -> pd.DataFrame:
-        return get_detention_data()
+    Pass a dataset to the chart functions to draw several charts from a single download:
 
-    return _inner()
+        dataset = DetentionDataset.load()
+        detentions.get_aa_count_chart(dataset=dataset)
+        detentions.get_criminality_pct_chart("ICE", dataset=dataset)
 
+    The chart functions never modify a dataset. The app shares one frozen dataset (see freeze()) between all of
+    its sessions, rather than giving each a copy.
+    """
 
-def get_aa_count_chart(use_cache: bool = False) -> Figure:
+    _frozen = False
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        with tracing.span("detentions.transform"):
+            self.df = df
+            self.version = _get_data_version(df)
+
+            counts = df.set_index("date")
+
+            # Compute every percentage the charts use in one vectorized pass. Each numerator column is divided by the
+            # denominator column at the same position.
+            numerators = ["ice_all", "cbp_all"]
+            denominators = ["total_all", "total_all"]
+            for prefix in AA_LABELS:
+                for suffix in ["conv", "pend", "other"]:
+                    numerators.append(f"{prefix}_{suffix}")
+                    denominators.append(f"{prefix}_all")
+            pcts = (
+                (counts[numerators].div(counts[denominators].to_numpy()) * 100)
+                .round()  # Rounding is in the original
+                .astype(PERCENT_DTYPE)
+            )
+
+            self.aa_count = _melt(
+                counts,
+                {f"{prefix}_all": label for prefix, label in AA_LABELS.items()},
+                "Arresting Authority",
+                "count",
+            )
+            self.aa_pct = _melt(
+                pcts,
+                {"ice_all": "ICE", "cbp_all": "CBP"},
+                "Arresting Authority",
+                "percent",
+            )
+
+            criminality_count = {}
+            criminality_pct = {}
+            for authority in AUTHORITIES:
+                prefix = _get_col_prefix(authority)
+                labels = {
+                    f"{prefix}_{suffix}": label
+                    for suffix, label in CRIMINALITY_LABELS.items()
+                }
+                criminality_count[authority] = _melt(
+                    counts, labels, "Criminal Status", "count"
+                )
+                del labels[
+                    f"{prefix}_all"
+                ]  # The percent chart does not have a "Total" line
+                criminality_pct[authority] = _melt(
+                    pcts, labels, "Criminal Status", "percent"
+                )
+            self.criminality_count: Mapping[str, pd.DataFrame] = criminality_count
+            self.criminality_pct: Mapping[str, pd.DataFrame] = criminality_pct
+
+    def freeze(self) -> "DetentionDataset":
+        """
+        Make the dataset read-only, in place, and return it. Afterwards, modifying the values of any of its tables
+        in place raises a ValueError, and its attributes cannot be reassigned. This is what lets the app share one
+        dataset between concurrent sessions without copying it for each. Each table is replaced by a read-only copy,
+        so the frames the dataset was created from are not affected. Derived tables (ex. `dataset.aa_count[mask]`)
+        are new objects and can be modified as usual.
+        """
+        for name in ["df", "aa_count", "aa_pct"]:
+            object.__setattr__(self, name, _make_read_only(getattr(self, name)))
+        for name in ["criminality_count", "criminality_pct"]:
+            tables = {
+                key: _make_read_only(df) for key, df in getattr(self, name).items()
+            }
+            object.__setattr__(self, name, MappingProxyType(tables))
+        object.__setattr__(self, "_frozen", True)
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self._frozen:
+            raise AttributeError(f"Cannot set {name!r}: the dataset is frozen")
+        super().__setattr__(name, value)
+
+    @classmethod
+    def load(cls, use_cache: bool = False) -> "DetentionDataset":
+        """
+        Download the data and compute all tables.
+
+        Parameters:
+        - use_cache: If True, uses the in-memory cache shared by the app, which is refreshed in the background.
+                     Defaults to False for notebook use.
+        """
+        if use_cache:
+            return _get_cached_detention_dataset()
+        return cls(get_detention_data())
+
+
+@tracing.traced("detentions.get_aa_count_chart")
+def get_aa_count_chart(
+    use_cache: bool = False,
+    dataset: DetentionDataset | None = None,
+    max_points: int | None = None,
+    x_range: rendering.XRange | None = None,
+) -> Figure:
     """
     Get a chart that shows detentions by arresting authority as a count.
 
     Parameters:
-    - use_cache: If True, uses Streamlit caching (only relevant in app context).
+    - use_cache: If True, uses the in-memory cache shared by the app, which is refreshed in the background.
                  Defaults to False for notebook use.
+    - dataset: A previously loaded DetentionDataset. If None, the data is loaded.
+    - max_points: If given, each line is downsampled to at most this many points (see rendering.downsample).
+    - x_range: If given, a (start, end) pair of dates: only that window is drawn and downsampled.
     """
-    df = _get_cached_detention_data() if use_cache else get_detention_data()
-
-    df = df.rename(columns={"ice_all": "ICE", "cbp_all": "CBP", "total_all": "Total"})
+    dataset = dataset or DetentionDataset.load(use_cache)
 
-    # Converts df from wide to long
-    df_melted = df.melt(
-        id_vars="date",
-        value_vars=["ICE", "CBP", "Total"],
-        var_name="Arresting Authority",
-        value_name="count",
-    )
+    import plotly.express as px
 
-    fig = px.line(
-        df_melted,
-        x="date",
-        y="count",
-        color="Arresting Authority",
-        color_discrete_sequence=colorblind_palette,
+    df, render_mode = rendering.prepare(
+        dataset.aa_count, "date", "count", "Arresting Authority", max_points, x_range
     )
+    with tracing.span("px.line"):
+        fig = px.line(
+            df,
+            x="date",
+            y="count",
+            color="Arresting Authority",
+            render_mode=render_mode,
+            color_discrete_sequence=colorblind_palette,
+            template=_get_template(),
+        )
 
     fig.update_layout(
         xaxis_title="Date",
@@ -99,37 +400,43 @@ def get_aa_count_chart(use_cache: bool = False) -> Figure:
         title="ICE Detainees by Date* and Arresting Authority",
     )
 
-    return _style_detentions_graph(fig)
+    return _style_detentions_graph(fig, x_range, max_y=df["count"].max())
 
 
-def get_aa_pct_chart(use_cache: bool = False) -> Figure:
+@tracing.traced("detentions.get_aa_pct_chart")
+def get_aa_pct_chart(
+    use_cache: bool = False,
+    dataset: DetentionDataset | None = None,
+    max_points: int | None = None,
+    x_range: rendering.XRange | None = None,
+) -> Figure:
     """
     Get a chart that shows detentions by arresting authority as a percent.
 
     Parameters:
-    - use_cache: If True, uses Streamlit caching (only relevant in app context).
+    - use_cache: If True, uses the in-memory cache shared by the app, which is refreshed in the background.
                  Defaults to False for notebook use.
+    - dataset: A previously loaded DetentionDataset. If None, the data is loaded.
+    - max_points: If given, each line is downsampled to at most this many points (see rendering.downsample).
+    - x_range: If given, a (start, end) pair of dates: only that window is drawn and downsampled.
     """
-    df = _get_cached_detention_data() if use_cache else get_detention_data()
+    dataset = dataset or DetentionDataset.load(use_cache)
 
-    df["ICE"] = (df.ice_all / df.total_all * 100).round()  # Rounding is in the original
-    df["CBP"] = (df.cbp_all / df.total_all * 100).round()
+    import plotly.express as px
 
-    # Converts df from wide to long
-    df_melted = df.melt(
-        id_vars="date",
-        value_vars=["ICE", "CBP"],
-        var_name="Arresting Authority",
-        value_name="percent",
-    )
-
-    fig = px.line(
-        df_melted,
-        x="date",
-        y="percent",
-        color="Arresting Authority",
-        color_discrete_sequence=colorblind_palette,
+    df, render_mode = rendering.prepare(
+        dataset.aa_pct, "date", "percent", "Arresting Authority", max_points, x_range
     )
+    with tracing.span("px.line"):
+        fig = px.line(
+            df,
+            x="date",
+            y="percent",
+            color="Arresting Authority",
+            render_mode=render_mode,
+            color_discrete_sequence=colorblind_palette,
+            template=_get_template(),
+        )
 
     fig.update_layout(
         xaxis_title="Date",
@@ -137,7 +444,7 @@ def get_aa_pct_chart(use_cache: bool = False) -> Figure:
         title="ICE Detainees by Date* and Arresting Authority",
     )
 
-    return _style_detentions_graph(fig)
+    return _style_detentions_graph(fig, x_range, max_y=df["percent"].max())
 
 
 def _get_col_prefix(authority: str) -> str:
@@ -169,46 +476,47 @@ def _get_criminality_chart_title(authority: str) -> str:
         return f"ICE Detainees (Detained by {authority}) by Date* and Criminality**"
 
 
-def get_criminality_count_chart(authority: str, use_cache: bool = False) -> Figure:
+@tracing.traced("detentions.get_criminality_count_chart")
+def get_criminality_count_chart(
+    authority: str,
+    use_cache: bool = False,
+    dataset: DetentionDataset | None = None,
+    max_points: int | None = None,
+    x_range: rendering.XRange | None = None,
+) -> Figure:
     """
     Get a chart that shows the criminality of detainees by arresting authority as a count.
 
     Parameters:
-    - use_cache: If True, uses Streamlit caching (only relevant in app context).
+    - use_cache: If True, uses the in-memory cache shared by the app, which is refreshed in the background.
                  Defaults to False for notebook use.
+    - dataset: A previously loaded DetentionDataset. If None, the data is loaded.
+    - max_points: If given, each line is downsampled to at most this many points (see rendering.downsample).
+    - x_range: If given, a (start, end) pair of dates: only that window is drawn and downsampled.
     """
-    df = _get_cached_detention_data() if use_cache else get_detention_data()
-
-    # Converts df from wide to long
-    prefix = _get_col_prefix(authority)
-    df = df.rename(
-        columns={
-            f"{prefix}_all": "Total",
-            f"{prefix}_conv": "Convicted Criminal",
-            f"{prefix}_pend": "Pending Criminal Charges",
-            f"{prefix}_other": "Other Immigration Violator",
-        }
-    )
-
-    df_melted = df.melt(
-        id_vars="date",
-        value_vars=[
-            "Convicted Criminal",
-            "Pending Criminal Charges",
-            "Other Immigration Violator",
-            "Total",
-        ],
-        var_name="Criminal Status",
-        value_name="count",
-    )
-
-    fig = px.line(
-        df_melted,
-        x="date",
-        y="count",
-        color="Criminal Status",
-        color_discrete_sequence=colorblind_palette,
+    _get_col_prefix(authority)  # Validate authority before loading any data
+    dataset = dataset or DetentionDataset.load(use_cache)
+
+    import plotly.express as px
+
+    df, render_mode = rendering.prepare(
+        dataset.criminality_count[authority],
+        "date",
+        "count",
+        "Criminal Status",
+        max_points,
+        x_range,
     )
+    with tracing.span("px.line"):
+        fig = px.line(
+            df,
+            x="date",
+            y="count",
+            color="Criminal Status",
+            render_mode=render_mode,
+            color_discrete_sequence=colorblind_palette,
+            template=_get_template(),
+        )
 
     fig.update_layout(
         xaxis_title="Date",
@@ -216,50 +524,50 @@ def get_criminality_count_chart(authority: str, use_cache: bool = False) -> Figu
         title=_get_criminality_chart_title(authority),
     )
 
-    return _style_detentions_graph(fig)
+    return _style_detentions_graph(fig, x_range, max_y=df["count"].max())
 
 
-def get_criminality_pct_chart(authority: str, use_cache: bool = False) -> Figure:
+@tracing.traced("detentions.get_criminality_pct_chart")
+def get_criminality_pct_chart(
+    authority: str,
+    use_cache: bool = False,
+    dataset: DetentionDataset | None = None,
+    max_points: int | None = None,
+    x_range: rendering.XRange | None = None,
+) -> Figure:
     """
     Get a chart that shows the criminality of detainees by arresting authority as a percent.
 
     Parameters:
-    - use_cache: If True, uses Streamlit caching (only relevant in app context).
+    - use_cache: If True, uses the in-memory cache shared by the app, which is refreshed in the background.
                  Defaults to False for notebook use.
+    - dataset: A previously loaded DetentionDataset. If None, the data is loaded.
+    - max_points: If given, each line is downsampled to at most this many points (see rendering.downsample).
+    - x_range: If given, a (start, end) pair of dates: only that window is drawn and downsampled.
     """
-    df = _get_cached_detention_data() if use_cache else get_detention_data()
-
-    prefix = _get_col_prefix(authority)
-    all_col = f"{prefix}_all"
-    conv_col = f"{prefix}_conv"
-    pend_col = f"{prefix}_pend"
-    other_col = f"{prefix}_other"
-
-    df["Convicted Criminal"] = (
-        df[conv_col] / df[all_col] * 100
-    ).round()  # Rounding is in the original
-    df["Pending Criminal Charges"] = (df[pend_col] / df[all_col] * 100).round()
-    df["Other Immigration Violator"] = (df[other_col] / df[all_col] * 100).round()
-
-    # Converts df from wide to long
-    df_melted = df.melt(
-        id_vars="date",
-        value_vars=[
-            "Convicted Criminal",
-            "Pending Criminal Charges",
-            "Other Immigration Violator",
-        ],
-        var_name="Criminal Status",
-        value_name="percent",
-    )
-
-    fig = px.line(
-        df_melted,
-        x="date",
-        y="percent",
-        color="Criminal Status",
-        color_discrete_sequence=colorblind_palette,
+    _get_col_prefix(authority)  # Validate authority before loading any data
+    dataset = dataset or DetentionDataset.load(use_cache)
+
+    import plotly.express as px
+
+    df, render_mode = rendering.prepare(
+        dataset.criminality_pct[authority],
+        "date",
+        "percent",
+        "Criminal Status",
+        max_points,
+        x_range,
     )
+    with tracing.span("px.line"):
+        fig = px.line(
+            df,
+            x="date",
+            y="percent",
+            color="Criminal Status",
+            render_mode=render_mode,
+            color_discrete_sequence=colorblind_palette,
+            template=_get_template(),
+        )
 
     fig.update_layout(
         xaxis_title="Date",
@@ -267,59 +575,52 @@ def get_criminality_pct_chart(authority: str, use_cache: bool = False) -> Figure
         title=_get_criminality_chart_title(authority),
     )
 
-    return _style_detentions_graph(fig)
+    return _style_detentions_graph(fig, x_range, max_y=df["percent"].max())
 
 
 def _get_max_y_value_from_figure(fig: Figure) -> float:
-    values: list[float] = []
-    for trace in fig.data:
-        seq = cast(Sequence[float], trace.y)  # type: ignore[attr-defined]
-        values.extend(float(v) for v in seq if v is not None)
+    """
+    Return the highest y value of any trace in a figure, or 0 if it has none. Used when the frame the figure was
+    drawn from is not available.
+    """
+    arrays = [
+        np.asarray(trace.y, dtype=np.float64).ravel()  # type: ignore[attr-defined]
+        for trace in fig.data
+        if trace.y is not None  # type: ignore[attr-defined]
+    ]
+    values = np.concatenate(arrays) if arrays else np.empty(0)
+    values = values[~np.isnan(values)]
+
+    return float(values.max()) if values.size else 0.0
 
-    return max(values) if values else 0.0
+
+# Any: plotly's stub only accepts the names of its built-in templates
+def _get_template() -> Any:
+    """
+    Return the name of the Plotly template every graph in this module is drawn with (see _style_detentions_graph).
+    """
+    return administrations.get_template(since=ADMINISTRATIONS_SINCE, legend_on_top=True)
 
 
-def _style_detentions_graph(fig: Figure) -> Figure:
+@tracing.traced("detentions._style_detentions_graph")
+def _style_detentions_graph(
+    fig: Figure, x_range: rendering.XRange | None = None, max_y: float | None = None
+) -> Figure:
     """
-    Each graph in this module should have a similar style:
+    Each graph in this module should have a similar style, set by its template (see _get_template):
     1. A vertical line showing when presidential administrations changed.
     2. The legend should appear on the top. This is because some of the labels from TRAC are long and so
        the default placement (on the right, next to the lines) cuts significantly into the data portion of
        the graph. Especially on mobile, this makes the graph hard to read.
-    """
-
-    class Administration(TypedDict):
-        President: str
-        Start: datetime
-
-    administrations: list[Administration] = [
-        {"President": "Joe Biden", "Start": datetime(2021, 1, 20)},
-        {"President": "Donald Trump", "Start": datetime(2025, 1, 20)},
-    ]
-
-    max_y = _get_max_y_value_from_figure(fig)
 
-    for one_administration in administrations:
-        fig.add_vline(
-            x=cast(
-                Any, one_administration["Start"]
-            ),  # cast: plotly stub expects numbers but runtime accepts datetimes
-            line_color="black",
-            line_dash="dash",
-        )
-        fig.add_annotation(
-            x=one_administration["Start"],
-            y=max_y,
-            text=one_administration["President"],
-            xanchor="left",
-            xshift=5,
-            showarrow=False,
-            yanchor="bottom",
-        )
+    This function labels the administration lines, applying the template first if the figure was drawn without it.
+    Pass the highest y value of the frame the figure was drawn from as max_y, otherwise it is read from the figure.
+    If x_range is given, the x axis is limited to it (otherwise the administration lines would widen it).
+    """
+    if max_y is None:
+        max_y = _get_max_y_value_from_figure(fig)
 
-    fig.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
-        margin=dict(t=100),  # Increase top margin to prevent overlap
-    )
+    administrations.annotate(fig, _get_template(), max_y)
+    rendering.set_x_range(fig, x_range)
 
     return fig
@@ -0,0 +1,114 @@
+"""
+A small on-disk cache for HTTP GET requests.
+
+Each cached response is stored as two files in the cache directory (see `immigration_enforcement.cache_dir`):
+the body, and a JSON file with the `ETag` and `Last-Modified` headers the server sent with it. On the next request
+those headers are sent back as `If-None-Match` and `If-Modified-Since`. If the resource has not changed the server
+replies "304 Not Modified" with no body, and the cached body is returned instead of downloading it again.
+
+Unlike `st.cache_data`, the cache survives restarts of the app. If upstream cannot be reached, or fails with a 5xx
+error, the cached copy is returned rather than raising an error.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import requests
+from pathlib import Path
+import immigration_enforcement.http_client as http_client
+import immigration_enforcement.tracing as tracing
+from immigration_enforcement.cache_dir import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+def _get_cache_paths(url: str, cache_dir: Path) -> tuple[Path, Path]:
+    """
+    Return the paths of the body and metadata files for `url`.
+    """
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    return cache_dir / f"{key}.body", cache_dir / f"{key}.json"
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read_metadata(body_path: Path, meta_path: Path) -> dict[str, str]:
+    """
+    Return the cached metadata for a response, or an empty dict if nothing usable is cached.
+    """
+    if not (body_path.exists() and meta_path.exists()):
+        return {}
+
+    try:
+        meta = json.loads(meta_path.read_text())
+    except ValueError:
+        return {}
+
+    return {k: str(v) for k, v in meta.items()}
+
+
+@tracing.traced("http_cache.fetch")
+def fetch(url: str, cache_dir: Path | None = None) -> bytes:
+    """
+    Return the body of `url`, revalidating any cached copy with a conditional GET.
+
+    Parameters:
+    - url: The URL to get.
+    - cache_dir: Where to store the cached responses. Defaults to the "http" subdirectory of the package's
+                 cache directory.
+    """
+    cache_dir = cache_dir or get_cache_dir("http")
+    body_path, meta_path = _get_cache_paths(url, cache_dir)
+    meta = _read_metadata(body_path, meta_path)
+
+    headers = {}
+    if "etag" in meta:
+        headers["If-None-Match"] = meta["etag"]
+    if "last_modified" in meta:
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = http_client.get(url, headers=headers)
+    except requests.RequestException:
+        # Upstream is down (or its circuit breaker is open). A stale copy is better than no data.
+        if not meta:
+            raise
+        logger.warning("Could not revalidate %s, serving the cached copy", url)
+        tracing.set_cache("hit")
+        return body_path.read_bytes()
+
+    if response.status_code >= 500 and meta:
+        # Upstream failed even after http_client's retries. As when it cannot be reached, serve the stale copy.
+        logger.warning(
+            "Could not revalidate %s (HTTP %d), serving the cached copy",
+            url,
+            response.status_code,
+        )
+        tracing.set_cache("hit")
+        return body_path.read_bytes()
+
+    if response.status_code == 304 and meta:
+        tracing.set_cache("hit")
+        return body_path.read_bytes()
+
+    tracing.set_cache("miss")
+
+    response.raise_for_status()
+
+    new_meta = {"url": url}
+    if "ETag" in response.headers:
+        new_meta["etag"] = response.headers["ETag"]
+    if "Last-Modified" in response.headers:
+        new_meta["last_modified"] = response.headers["Last-Modified"]
+
+    # Write the body before the metadata: a body without metadata is ignored, but metadata without its body
+    # would cause a 304 we cannot serve.
+    _write_atomically(body_path, response.content)
+    _write_atomically(meta_path, json.dumps(new_meta).encode())
+
+    return response.content
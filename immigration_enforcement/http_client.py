@@ -0,0 +1,178 @@
+"""
+The HTTP client used for every scraped data source (ex. TRAC's detention data).
+
+Compared to a bare `requests.get`, requests made through this module:
+  * Reuse pooled keep-alive connections, so repeated fetches do not each pay for a new TLS handshake.
+  * Have connect and read timeouts, so a slow upstream cannot block a Streamlit script thread indefinitely.
+  * Retry connection errors and 429/5xx responses a bounded number of times, with jittered exponential backoff.
+  * Go through a per-host circuit breaker. After several consecutive failures the breaker "opens" and requests fail
+    immediately with `CircuitOpenError`, instead of waiting on an upstream that is down. After a cool-down period
+    one trial request is let through; if it succeeds the breaker closes again.
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 15.0)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of making a request while the circuit breaker for its host is open."""
+
+
+class CircuitBreaker:
+    """
+    Track consecutive failures to a host and decide whether a request should be attempted.
+
+    States:
+      * "closed": requests are made normally.
+      * "open": the last `failure_threshold` requests failed. Requests fail fast until `reset_timeout` seconds
+        have passed.
+      * "half-open": the cool-down has passed. The next request is a trial: success closes the breaker,
+        failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._get_state()
+
+    def _get_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self, host: str) -> None:
+        """
+        Raise CircuitOpenError if a request to `host` should not be attempted right now.
+        """
+        with self._lock:
+            state = self._get_state()
+            if state == "open":
+                raise CircuitOpenError(
+                    f"Circuit breaker for {host} is open after {self._failures} consecutive failures"
+                )
+            if state == "half-open":
+                # Let this request through as the trial, and keep failing fast for everyone else until it finishes
+                self._opened_at = self._clock()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+def make_session(
+    total_retries: int = 3,
+    backoff_factor: float = 0.5,
+    backoff_jitter: float = 0.5,
+    pool_maxsize: int = 10,
+) -> requests.Session:
+    """
+    Create a requests Session with connection pooling and a bounded retry policy.
+
+    Retries only apply to idempotent methods. The delay before retry n is roughly
+    `backoff_factor * 2 ** (n - 1)` seconds, plus up to `backoff_jitter` seconds of random jitter so that
+    several app processes do not retry in lockstep.
+    """
+    retry = Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Return the last response, so the circuit breaker can see it
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_lock = threading.Lock()
+_session: requests.Session | None = None
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_session() -> requests.Session:
+    """
+    Return the Session shared by all requests made through this module, creating it on first use.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """
+    Return the circuit breaker for `host`, creating it on first use.
+    """
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def get(
+    url: str,
+    headers: dict[str, str] | None = None,
+    timeout: tuple[float, float] = DEFAULT_TIMEOUT,
+    session: requests.Session | None = None,
+) -> requests.Response:
+    """
+    Make a GET request to `url` through the shared session and the circuit breaker for its host.
+
+    Raises CircuitOpenError without making a request if the breaker is open. Connection errors, timeouts, and 429
+    and 5xx responses (after retries) count as failures. The response is returned as-is; callers should check its
+    status code.
+    """
+    host = urlsplit(url).netloc
+    breaker = get_circuit_breaker(host)
+    breaker.before_call(host)
+
+    session = session or get_session()
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+
+    # A 429 left after retries means upstream is still throttling us, which is no time to reset the failure count
+    if response.status_code == 429 or response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return response
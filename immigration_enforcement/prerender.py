@@ -0,0 +1,220 @@
+"""
+Render every graph the app can show ahead of time.
+
+Each distinct graph that `backend.get_graph` can draw (see `backend.get_graph_specs`) is rendered in a process pool
+to Plotly JSON and, with kaleido, to PNG and SVG. The files are written to an artifact directory together with
+`manifest.json`, which lists every graph, its files, and the versions of the data it was drawn from, and
+`index.html`, a static page with every graph that can serve as a fallback site.
+
+    python -m immigration_enforcement.prerender --out prerendered/
+    python -m immigration_enforcement.prerender --formats json --workers 2
+
+To have the app serve these figures instead of loading the data on each request, set the
+IMMIGRATION_ENFORCEMENT_PRERENDERED_DIR environment variable to the artifact directory (see `backend.get_graph`).
+"""
+
+import argparse
+import html
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Sequence
+from plotly.graph_objs import Figure
+import immigration_enforcement.backend as be
+import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.detentions as detentions
+from immigration_enforcement.cache_dir import get_cache_dir
+
+MANIFEST = "manifest.json"
+FORMATS = ["json", "png", "svg"]
+
+# Set in each worker process by _init_worker(), so the detention data is sent to each worker once
+_worker_dataset: detentions.DetentionDataset | None = None
+
+
+def get_slug(spec: be.GraphSpec) -> str:
+    """
+    Return a file name for a graph, ex. "criminality-percent-ice".
+    """
+    parts = [part for part in spec if part is not None]
+    return re.sub(r"[^a-z0-9]+", "-", "-".join(parts).lower()).strip("-")
+
+
+def _init_worker(dataset: detentions.DetentionDataset) -> None:
+    global _worker_dataset
+    _worker_dataset = dataset
+
+    # The Border Patrol graphs use Streamlit's cache, which warns when there is no app running
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+
+def _render(
+    spec: be.GraphSpec, out_dir: Path, formats: Sequence[str]
+) -> dict[str, Any]:
+    """
+    Draw one graph, write it in each format, and return its manifest entry.
+    """
+    dataset, display, authority, region = spec
+    fig = be._build_graph(dataset, display, authority, region, _worker_dataset)
+
+    slug = get_slug(spec)
+    files = {}
+    for fmt in formats:
+        path = out_dir / "figures" / f"{slug}.{fmt}"
+        if fmt == "json":
+            path.write_text(fig.to_json())
+        else:
+            fig.write_image(path, format=fmt)  # Requires kaleido
+        files[fmt] = path.relative_to(out_dir).as_posix()
+
+    return {
+        "dataset": dataset,
+        "display": display,
+        "authority": authority,
+        "region": region,
+        "title": fig.layout.title.text,
+        "files": files,
+    }
+
+
+def _write_index(out_dir: Path, entries: list[dict[str, Any]]) -> None:
+    """
+    Write a static page that shows every graph, as an image if one was rendered and otherwise as a link.
+    """
+    sections = []
+    for entry in entries:
+        title = html.escape(entry["title"] or get_slug(_get_spec(entry)))
+        files = entry["files"]
+        image = files.get("svg") or files.get("png")
+        body = f'<img src="{image}" alt="{title}">' if image else ""
+        links = " ".join(f'<a href="{path}">{fmt}</a>' for fmt, path in files.items())
+        sections.append(f"<section><h2>{title}</h2>{body}<p>{links}</p></section>")
+
+    (out_dir / "index.html").write_text(
+        "<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+        "<title>How Has U.S. Immigration Enforcement Changed?</title></head>\n<body>\n"
+        + "\n".join(sections)
+        + "\n</body></html>\n"
+    )
+
+
+def _get_spec(entry: dict[str, Any]) -> be.GraphSpec:
+    return (entry["dataset"], entry["display"], entry["authority"], entry["region"])
+
+
+def prerender(
+    out_dir: Path,
+    formats: Sequence[str] = FORMATS,
+    workers: int | None = None,
+    specs: list[be.GraphSpec] | None = None,
+) -> dict[str, Any]:
+    """
+    Render graphs to `out_dir`, and return the manifest.
+
+    Parameters:
+    - out_dir: The artifact directory. It is created if needed.
+    - formats: Any of "json", "png" and "svg". PNG and SVG require kaleido.
+    - workers: The number of processes. Defaults to the number of CPUs.
+    - specs: The graphs to render. Defaults to every graph (see backend.get_graph_specs).
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown formats {unknown}. Valid formats: {FORMATS}")
+
+    specs = specs or be.get_graph_specs()
+    (out_dir / "figures").mkdir(parents=True, exist_ok=True)
+
+    # Download TRAC's data once, rather than once per worker
+    dataset = detentions.DetentionDataset.load()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(dataset,)
+    ) as pool:
+        entries = list(
+            pool.map(
+                _render,
+                specs,
+                [out_dir] * len(specs),
+                [list(formats)] * len(specs),
+            )
+        )
+
+    manifest = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "data_versions": {
+            "detentions": dataset.version,
+            "border_patrol": encounters.get_data_version(),
+        },
+        "figures": entries,
+    }
+
+    _write_index(out_dir, entries)
+
+    # The manifest is written last, and atomically, so the app never sees one that lists missing files
+    tmp = out_dir / f"{MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, out_dir / MANIFEST)
+
+    return manifest
+
+
+class PrerenderedFigures:
+    """
+    The figures in an artifact directory written by prerender(), keyed by normalized graph spec.
+    Each figure is read from disk the first time it is requested.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        manifest = json.loads((directory / MANIFEST).read_text())
+        self.data_versions: dict[str, str] = manifest["data_versions"]
+        self._paths = {
+            _get_spec(entry): directory / entry["files"]["json"]
+            for entry in manifest["figures"]
+            if "json" in entry["files"]
+        }
+        self._figures: dict[be.GraphSpec, Figure] = {}
+
+    @property
+    def specs(self) -> list[be.GraphSpec]:
+        return list(self._paths)
+
+    def get(self, spec: be.GraphSpec) -> Figure | None:
+        """
+        Return the pre-rendered figure for a graph, or None if it was not pre-rendered.
+        """
+        if spec not in self._paths:
+            return None
+        if spec not in self._figures:
+            import plotly.io as pio
+
+            self._figures[spec] = pio.from_json(self._paths[spec].read_text())
+        return self._figures[spec]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Render every graph the app can show to an artifact directory."
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=get_cache_dir("prerendered"),
+        help="The artifact directory (default: the package's cache directory)",
+    )
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    manifest = prerender(args.out, args.formats, args.workers)
+    print(f"Rendered {len(manifest['figures'])} graphs to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
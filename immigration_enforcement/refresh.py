@@ -0,0 +1,163 @@
+"""
+An in-memory cache that refreshes its value in the background before it expires (stale-while-revalidate).
+
+With a plain TTL cache such as `st.cache_data(ttl=...)`, the first request after the value expires has to wait
+while it is loaded again. A RefreshingValue instead reloads the value on a background thread `refresh_ahead` seconds
+before it expires, and swaps the new value in once it has loaded. Until then, callers keep getting the current
+value. Only the very first call, when there is no value yet, waits for a load. If `load_stale` is given, that
+call instead serves what it returns (ex. a copy saved on disk) and starts a background refresh right away.
+
+If a background load fails, the current value is kept and the load is retried every `retry_interval` seconds. A
+stale value is better than no page: `http_cache` already falls back to the last good response when TRAC is down.
+
+    dataset = RefreshingValue(load_dataset, ttl=15 * 60, name="detentions")
+    dataset.get()
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RefreshingValue(Generic[T]):
+    """
+    A value returned by `load`, reloaded in the background every `ttl - refresh_ahead` seconds.
+
+    Parameters:
+    - load: Returns a fresh value. Called on a background thread, except for the first load.
+    - ttl: How long a value is considered fresh, in seconds.
+    - refresh_ahead: How long before the value expires to start loading the next one, in seconds.
+    - retry_interval: How long to wait before retrying a failed background load, in seconds.
+    - name: Used in log messages and as the name of the background threads.
+    - load_stale: Returns a possibly outdated value that can be served right away (ex. from disk), or None. Used
+                  for the first value if given.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], T],
+        ttl: float,
+        refresh_ahead: float = 60,
+        retry_interval: float = 60,
+        name: str = "value",
+        load_stale: Callable[[], T | None] | None = None,
+    ) -> None:
+        if not 0 <= refresh_ahead < ttl:
+            raise ValueError(
+                f"refresh_ahead must be between 0 and ttl ({ttl}), got {refresh_ahead}"
+            )
+        self.load = load
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+        self.name = name
+        self.load_stale = load_stale
+
+        # (value, time it was loaded). Replaced as a whole, so readers never see a value with the wrong time.
+        self._current: tuple[T, float] | None = None
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._generation = 0
+
+    def get(self) -> T:
+        """
+        Return the current value, loading it first if there is none.
+        """
+        current = self._current
+        if current is None:
+            with self._lock:
+                # Another thread may have loaded it while this one waited for the lock
+                if self._current is None:
+                    self._load_first()
+                current = self._current
+            assert current is not None
+        return current[0]
+
+    def age(self) -> float | None:
+        """
+        Return how many seconds ago the current value was loaded, or None if there is none.
+        """
+        current = self._current
+        return None if current is None else time.monotonic() - current[1]
+
+    def is_loaded(self) -> bool:
+        return self._current is not None
+
+    def refresh(self) -> None:
+        """
+        Load a new value now, on the calling thread, and swap it in. The current value is served until then.
+        """
+        value = self.load()
+        with self._lock:
+            self._set(value)
+
+    def clear(self) -> None:
+        """
+        Drop the current value and cancel the scheduled refresh. The next get() loads a new value.
+        """
+        with self._lock:
+            self._current = None
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _load_first(self) -> None:
+        # Must be called with the lock held
+        stale = None
+        if self.load_stale is not None:
+            try:
+                stale = self.load_stale()
+            except Exception:
+                logger.warning("Could not load a stale %s", self.name, exc_info=True)
+
+        if stale is None:
+            self._set(self.load())
+        else:
+            self._current = (stale, time.monotonic())
+            self._schedule(0)
+
+    def _set(self, value: T) -> None:
+        # Must be called with the lock held
+        self._current = (value, time.monotonic())
+        self._schedule(self.ttl - self.refresh_ahead)
+
+    def _schedule(self, delay: float) -> None:
+        # Must be called with the lock held
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(
+            delay, self._refresh_in_background, args=(self._generation,)
+        )
+        self._timer.name = f"refresh-{self.name}"
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self, generation: int) -> None:
+        if generation != self._generation:
+            return  # clear() was called after this refresh was scheduled
+
+        try:
+            value = self.load()
+        except Exception:
+            logger.warning(
+                "Refreshing %s failed, serving the current value (%.0f s old) and retrying in %.0f s",
+                self.name,
+                self.age() or 0,
+                self.retry_interval,
+                exc_info=True,
+            )
+            with self._lock:
+                if generation == self._generation:
+                    self._schedule(self.retry_interval)
+            return
+
+        with self._lock:
+            if generation == self._generation:
+                self._set(value)
+        logger.info("Refreshed %s", self.name)
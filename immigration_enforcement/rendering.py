@@ -0,0 +1,180 @@
+"""
+Keep line charts responsive as series get longer.
+
+Two techniques, used by the chart builders in `detentions` and `encounters`:
+  * WebGL: Plotly draws lines with SVG by default, which slows down the browser with more than a few thousand
+    points. Above WEBGL_THRESHOLD points, charts are drawn with WebGL (`scattergl` traces) instead.
+  * Downsampling: when `max_points` is given, each line is reduced to at most that many points with the Largest
+    Triangle Three Buckets (LTTB) algorithm (Steinarsson, 2013), which keeps the visual shape of the line. The
+    highest and lowest points of each line are always kept, so that peaks (ex. the 2022-2023 encounter highs) do
+    not disappear. When `x_range` is given, only that window (the "viewport") is downsampled, so zooming in on a
+    window and redrawing shows more detail.
+
+    df, render_mode = rendering.prepare(df, "date", "encounters", max_points=500, x_range=(start, end))
+    px.line(df, x="date", y="encounters", render_mode=render_mode)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Any, Literal, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+# Plotly's own "auto" render mode switches to WebGL at 1000 points
+WEBGL_THRESHOLD = 1000
+
+RenderMode = Literal["svg", "webgl"]
+XRange = tuple[Any, Any]
+
+
+def get_render_mode(n_points: int, threshold: int = WEBGL_THRESHOLD) -> RenderMode:
+    """
+    Return "webgl" if a chart with `n_points` points should be drawn with WebGL, otherwise "svg".
+    """
+    return "webgl" if n_points > threshold else "svg"
+
+
+def _to_numeric(x: "pd.Series[Any]") -> "np.ndarray[Any, np.dtype[np.float64]]":
+    """
+    Convert x values (numbers, datetimes or datetime.date objects) to floats that preserve their spacing.
+    """
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=np.float64)
+    dates = pd.to_datetime(x).to_numpy(dtype="datetime64[ns]")
+    return dates.astype(np.int64).astype(np.float64)
+
+
+def lttb(
+    x: "np.ndarray[Any, np.dtype[np.float64]]",
+    y: "np.ndarray[Any, np.dtype[np.float64]]",
+    n_out: int,
+) -> "np.ndarray[Any, np.dtype[np.intp]]":
+    """
+    Return the sorted indices of at most `n_out` points that keep the shape of the line (x, y), using Largest
+    Triangle Three Buckets. x must be sorted. The first and last points, and the highest and lowest, are always
+    included.
+
+    Points with a missing (NaN) or infinite value are left out of the buckets, except for the first point of each
+    gap, which is kept on top of the `n_out` points so that the line is still broken there.
+    """
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 5:
+        raise ValueError(f"Cannot downsample to fewer than 5 points (got {n_out})")
+
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        # A NaN area would be the largest, as far as argmax is concerned
+        points = np.flatnonzero(finite)
+        gaps = np.flatnonzero(~finite & np.concatenate([[True], finite[:-1]]))
+        return np.union1d(points[lttb(x[points], y[points], n_out)], gaps)
+
+    # Leave room for the first and last points, and for the extremes, which are added at the end
+    n_buckets = n_out - 4
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.intp)
+
+    selected = np.empty(n_buckets + 2, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(n_buckets):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        # The average of the next bucket (or the last point, for the last bucket)
+        if i + 1 < n_buckets:
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            next_x = x[next_start:next_end].mean()
+            next_y = y[next_start:next_end].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        # Pick the point that forms the largest triangle with the previous pick and the next bucket's average
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    extremes = [int(np.argmax(y)), int(np.argmin(y))]
+    return np.unique(np.concatenate([selected, extremes]))
+
+
+def downsample(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str | None = None,
+    max_points: int | None = None,
+    x_range: XRange | None = None,
+) -> pd.DataFrame:
+    """
+    Return the rows of a long-format table that are needed to draw it.
+
+    Parameters:
+    - df: The table, with one row per point.
+    - x, y: The columns with each point's coordinates.
+    - color: The column that splits the rows into separate lines, if any.
+    - max_points: Keep at most this many points in each line (at least 5). None keeps every point.
+    - x_range: Only keep points with x in [start, end] (either can be None). Downsampling is applied to this window.
+    """
+    if not df.index.is_unique:
+        df = df.reset_index(drop=True)
+
+    if x_range is not None:
+        xs = _to_numeric(df[x])
+        start, end = (
+            _to_numeric(pd.Series([bound]))[0] if bound is not None else np.nan
+            for bound in x_range
+        )
+        df = df[~(xs < start) & ~(xs > end)]  # Comparisons with NaN are False
+
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    groups = [df] if color is None else [g for _, g in df.groupby(color, sort=False)]
+    keep = []
+    for group in groups:
+        group = group.sort_values(x)
+        values = group[y].to_numpy(dtype=np.float64)
+        indices = lttb(_to_numeric(group[x]), values, max_points)
+        keep.append(group.index[indices])
+
+    # Keep the rows in their original order, so line colors are assigned as before
+    return df.loc[df.index.isin(np.concatenate(keep))]
+
+
+def prepare(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str | None = None,
+    max_points: int | None = None,
+    x_range: XRange | None = None,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+) -> tuple[pd.DataFrame, RenderMode]:
+    """
+    Downsample a table (see downsample()) and pick the render mode for the points that are left.
+    """
+    df = downsample(df, x, y, color, max_points, x_range)
+    return df, get_render_mode(len(df), webgl_threshold)
+
+
+def set_x_range(fig: "Figure", x_range: XRange | None) -> None:
+    """
+    Limit the x axis of a figure to x_range, if it is given. Missing bounds are taken from the data.
+    """
+    if x_range is None:
+        return
+
+    start, end = x_range
+    if start is None or end is None:
+        xs = [x for trace in fig.data for x in trace.x]  # type: ignore[attr-defined]
+        if not xs:
+            return
+        start = min(xs) if start is None else start
+        end = max(xs) if end is None else end
+    fig.update_xaxes(range=[start, end])
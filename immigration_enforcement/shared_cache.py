@@ -0,0 +1,206 @@
+"""
+A cache shared by every process on a host, with single-flight locking.
+
+`st.cache_data` and the other in-memory caches are per process. When several Streamlit workers run on the same host,
+each would download TRAC's data and build the Border Patrol tables on its own, and when the data expires they would
+all reload it at once. Values stored with get_or_compute() are instead computed by one process and read by the others:
+
+  * If a fresh value is stored, it is returned.
+  * Otherwise the process takes an exclusive lock on the key, checks again (another process may have just stored
+    the value while it waited), and only then computes and stores the value. Other processes that need the key in
+    the meantime wait on the lock and then read the stored value, rather than also computing it.
+
+The storage is pluggable (see CacheBackend). By default values are files in the "shared" subdirectory of the
+package's cache directory, locked with `flock` (FileBackend). MemoryBackend keeps values in the current process only.
+
+    df = shared_cache.get_or_compute_frame("detentions", get_detention_data, ttl=14 * 60)
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, ContextManager, Iterator, Protocol
+import pandas as pd
+import immigration_enforcement.tracing as tracing
+from immigration_enforcement.cache_dir import get_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+class CacheBackend(Protocol):
+    def read(self, key: str) -> tuple[bytes, float] | None:
+        """
+        Return the value stored under `key` and when it was stored (seconds since the epoch), or None.
+        """
+        ...
+
+    def write(self, key: str, value: bytes) -> None: ...
+
+    def lock(self, key: str) -> ContextManager[None]:
+        """
+        Hold an exclusive lock on `key`, shared by every process that uses the same storage.
+        """
+        ...
+
+
+class FileBackend:
+    """
+    Stores each value in a file, and locks each key with `flock` on a separate lock file. Every process that uses
+    the same directory shares the values and the locks. On platforms without `flock`, locks are only shared by the
+    threads of one process.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._thread_locks: dict[str, threading.Lock] = {}
+        self._thread_locks_lock = threading.Lock()
+
+    def _get_path(self, key: str, suffix: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return self.directory / f"{digest}{suffix}"
+
+    def read(self, key: str) -> tuple[bytes, float] | None:
+        path = self._get_path(key, ".bin")
+        try:
+            stored_at = path.stat().st_mtime
+            return path.read_bytes(), stored_at
+        except FileNotFoundError:
+            return None
+
+    def write(self, key: str, value: bytes) -> None:
+        # Written to a temporary file and renamed, so that readers never see a partial value
+        path = self._get_path(key, ".bin")
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(value)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        if fcntl is None:
+            with self._thread_locks_lock:
+                thread_lock = self._thread_locks.setdefault(key, threading.Lock())
+            with thread_lock:
+                yield
+            return
+
+        # flock() locks conflict even between two file descriptors in the same process, so this also serializes
+        # the threads of one process
+        with open(self._get_path(key, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class MemoryBackend:
+    """
+    Keeps values in the current process only. Useful with a single worker, and in tests.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, tuple[bytes, float]] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def read(self, key: str) -> tuple[bytes, float] | None:
+        return self._values.get(key)
+
+    def write(self, key: str, value: bytes) -> None:
+        self._values[key] = (value, time.time())
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+
+_backend: CacheBackend | None = None
+
+
+def set_backend(backend: CacheBackend | None) -> None:
+    """
+    Use `backend` for the shared cache. None restores the default, a FileBackend in the package's cache directory.
+    """
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> CacheBackend:
+    # The default is created on each call, so that it follows changes to the cache directory (ex. in tests)
+    return _backend or FileBackend(get_cache_dir("shared"))
+
+
+def _get_fresh(entry: tuple[bytes, float] | None, ttl: float | None) -> bytes | None:
+    """
+    Return the stored value if there is one and it is not older than `ttl` seconds.
+    """
+    if entry is None:
+        return None
+    value, stored_at = entry
+    return value if ttl is None or time.time() - stored_at < ttl else None
+
+
+@contextmanager
+def lock(key: str) -> Iterator[None]:
+    """
+    Hold the shared cache's exclusive lock on `key`, ex. while building a file that other processes also need.
+    """
+    with get_backend().lock(key):
+        yield
+
+
+def get_or_compute(
+    key: str, compute: Callable[[], bytes], ttl: float | None = None
+) -> bytes:
+    """
+    Return the value stored under `key`, or compute and store it if there is none or it is older than `ttl`
+    seconds. Only one process at a time computes a given key.
+
+    Parameters:
+    - key: Identifies the value. Include a version of the inputs in it (ex. a data version) to invalidate it.
+    - compute: Returns the value.
+    - ttl: How long a stored value is fresh, in seconds. None means forever.
+    """
+    backend = get_backend()
+    with tracing.span("shared_cache.get", key=key) as s:
+        value = _get_fresh(backend.read(key), ttl)
+        if value is not None:
+            s.cache = "hit"
+            return value
+
+        with backend.lock(key):
+            # Another process may have computed the value while this one waited for the lock
+            value = _get_fresh(backend.read(key), ttl)
+            if value is not None:
+                s.cache = "hit"
+                return value
+
+            s.cache = "miss"
+            value = compute()
+            backend.write(key, value)
+            return value
+
+
+def get_or_compute_frame(
+    key: str, compute: Callable[[], pd.DataFrame], ttl: float | None = None
+) -> pd.DataFrame:
+    """
+    get_or_compute() for DataFrames, which are stored as Parquet. The index is not kept.
+    """
+
+    def compute_parquet() -> bytes:
+        buffer = io.BytesIO()
+        compute().to_parquet(buffer, index=False)
+        return buffer.getvalue()
+
+    return pd.read_parquet(io.BytesIO(get_or_compute(key, compute_parquet, ttl)))
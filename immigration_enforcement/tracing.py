@@ -0,0 +1,218 @@
+"""
+Lightweight timing of the app's hot paths.
+
+Each stage (fetching TRAC's data, parsing the Excel workbook, reshaping with pandas, `px.line`, styling...) is
+wrapped in a span, which records how long it took and, for cached stages, whether the cache was hit:
+
+    with tracing.span("detentions.parse") as s:
+        ...
+        s.cache = "hit"
+
+    @tracing.traced("detentions.style")
+    def _style_detentions_graph(fig): ...
+
+Tracing is off by default, and then a span or traced call costs well under a microsecond. It is turned on:
+  * for the whole process, by setting the IMMIGRATION_ENFORCEMENT_TRACE environment variable (or calling enable()).
+    Each finished span is logged to the "immigration_enforcement.tracing" logger at INFO level, as logfmt-style
+    key=value pairs with the span also attached to the log record as `record.span`.
+  * for the current thread only, by calling start_collection(). The finished spans are appended to the returned
+    list. The Streamlit app does this to show its debug panel for just one session.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, ContextManager, Iterator, Literal, ParamSpec, TypeVar
+from contextlib import contextmanager
+
+TRACE_ENV_VAR = "IMMIGRATION_ENFORCEMENT_TRACE"
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+CacheStatus = Literal["hit", "miss"] | None
+
+_enabled = bool(os.environ.get(TRACE_ENV_VAR))
+
+
+class _Local(threading.local):
+    # Class-level defaults: looking up a missing attribute on a threading.local is slow (it raises internally), and
+    # is_active() is called on every traced call.
+    collection: "list[Span] | None" = None
+    stack: "list[Span] | None" = None
+
+
+_local = _Local()
+
+
+@dataclass
+class Span:
+    """
+    One timed stage.
+
+    Attributes:
+    - name: The stage, ex. "backend.get_graph".
+    - start: When the stage started, in seconds since the epoch.
+    - duration: How long the stage took, in seconds. None until it finishes.
+    - cache: "hit" or "miss" for stages that are cached, otherwise None.
+    - depth: How many spans this one is nested in.
+    - attributes: Anything else worth recording, ex. the dataset a graph is for.
+    """
+
+    name: str
+    start: float
+    duration: float | None = None
+    cache: CacheStatus = None
+    depth: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class _NoopSpan:
+    """
+    What span() yields when tracing is off. Setting attributes on it does nothing.
+    """
+
+    cache: CacheStatus = None
+
+    @property
+    def attributes(self) -> dict[str, Any]:
+        return {}
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def enable() -> None:
+    """
+    Trace every thread in the process, and log each span.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_active() -> bool:
+    """
+    Return True if spans are being recorded in the current thread.
+    """
+    return _enabled or _local.collection is not None
+
+
+def start_collection() -> list[Span]:
+    """
+    Record spans in the current thread (even if tracing is not enabled for the process) until stop_collection() is
+    called, and return the list they are appended to as they finish.
+    """
+    collection: list[Span] = []
+    _local.collection = collection
+    return collection
+
+
+def stop_collection() -> None:
+    _local.collection = None
+
+
+def to_rows(spans: list[Span]) -> list[dict[str, Any]]:
+    """
+    Return the spans as table rows, in the order they started, with nested spans indented under their parents.
+    """
+    return [
+        {
+            "stage": "    " * s.depth + s.name,
+            "ms": round((s.duration or 0) * 1000, 2),
+            "cache": s.cache or "",
+            **{key: str(value) for key, value in s.attributes.items()},
+        }
+        for s in sorted(spans, key=lambda s: (s.start, s.depth))
+    ]
+
+
+def _get_stack() -> list[Span]:
+    if _local.stack is None:
+        _local.stack = []
+    return _local.stack
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Span | _NoopSpan]:
+    """
+    Time the code in the `with` block. Set `cache` on the yielded span to record a cache hit or miss.
+    """
+    if not is_active():
+        return _NOOP_SPAN  # Cheaper than entering a generator-based context manager
+    return _span(name, attributes)
+
+
+@contextmanager
+def _span(name: str, attributes: dict[str, Any]) -> Iterator[Span]:
+    stack = _get_stack()
+    s = Span(name, time.time(), depth=len(stack), attributes=attributes)
+    stack.append(s)
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - start
+        stack.pop()
+        _record(s)
+
+
+def set_cache(status: CacheStatus) -> None:
+    """
+    Record a cache hit or miss on the innermost span in the current thread. Useful inside a function that only runs
+    on a cache miss, ex. the function decorated with st.cache_data.
+    """
+    if is_active():
+        stack = _get_stack()
+        if stack:
+            stack[-1].cache = status
+
+
+def traced(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Decorator that wraps every call to the function in a span.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not is_active():
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _record(s: Span) -> None:
+    if _local.collection is not None:
+        _local.collection.append(s)
+
+    if _enabled and logger.isEnabledFor(logging.INFO):
+        fields = [f"span={s.name}", f"duration_ms={(s.duration or 0) * 1000:.2f}"]
+        if s.cache is not None:
+            fields.append(f"cache={s.cache}")
+        fields += [f"{key}={value}" for key, value in s.attributes.items()]
+        logger.info(" ".join(fields), extra={"span": s.to_dict()})
@@ -0,0 +1,205 @@
+"""
+Checks on the data this package loads, cheap enough to run every time it is loaded.
+
+Each `find_*_problems` function returns a list of human-readable problems (empty if there are none), so that every
+problem in a dataset is reported at once rather than just the first. The matching `check_*` function raises a
+ValidationError listing all of them:
+
+    check_columns(df.columns, ["Fiscal Year", "Month (abbv)"], "CBP encounters file")
+    check_monthly_dates(df["date"], "Southwest Land Border encounters")
+"""
+
+import difflib
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Iterable
+
+
+class ValidationError(ValueError):
+    """
+    Raised when a dataset fails validation. `problems` lists everything that is wrong with it.
+    """
+
+    def __init__(self, source: str, problems: list[str]) -> None:
+        self.source = source
+        self.problems = problems
+        super().__init__(
+            f"{source} failed validation:\n" + "\n".join(f"  * {p}" for p in problems)
+        )
+
+
+def _normalize_column(column: str) -> str:
+    """
+    Reduce a column name to lowercase letters and digits, so that ex. "Fiscal\\nYear", "Fiscal Year" and
+    "fiscal_year" compare equal.
+    """
+    return re.sub(r"[^a-z0-9]", "", column.lower())
+
+
+def find_column_problems(columns: Iterable[Any], expected: list[str]) -> list[str]:
+    """
+    Return a problem for each expected column that is missing. If an unexpected column looks like a missing one
+    (same name apart from case, whitespace and punctuation, or a close spelling), it is reported as a likely rename.
+    """
+    columns = [str(c) for c in columns]
+    unexpected = [c for c in columns if c not in expected]
+    normalized = {_normalize_column(c): c for c in unexpected}
+
+    problems = []
+    for column in expected:
+        if column in columns:
+            continue
+
+        candidate = normalized.get(_normalize_column(column))
+        if candidate is None:
+            matches = difflib.get_close_matches(column, unexpected, n=1, cutoff=0.8)
+            candidate = matches[0] if matches else None
+
+        if candidate is None:
+            problems.append(f"Column {column!r} is missing")
+        else:
+            problems.append(
+                f"Column {column!r} is missing. Was it renamed to {candidate!r}?"
+            )
+    return problems
+
+
+def _runs(mask: "np.ndarray[Any, np.dtype[np.bool_]]") -> list[tuple[int, int]]:
+    """
+    Return the (first, last) positions of each run of True values in mask.
+    """
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _format_month_range(first: int, last: int) -> str:
+    """
+    Format a range of month ordinals (months since January 1970) as ex. "2020-03" or "2020-03 to 2020-05".
+    """
+    start, end = np.datetime64(int(first), "M"), np.datetime64(int(last), "M")
+    return str(start) if first == last else f"{start} to {end}"
+
+
+def find_monthly_date_problems(dates: "pd.Series[Any]") -> list[str]:
+    """
+    Return the problems with a series of monthly dates: missing values, dates that are not the first of a month,
+    and every range of months that is missing or appears more than once between the first and last month.
+
+    Dates are converted to integer month ordinals and counted with a single bincount, so this is O(n) in the
+    number of dates plus the number of months they span.
+    """
+    problems = []
+
+    # pd.to_datetime is slow even on datetimes, so only use it for other types (ex. datetime.date objects)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    values = dates.to_numpy(dtype="datetime64[ns]")
+    missing = np.isnat(values)
+    if missing.any():
+        problems.append(f"{missing.sum()} dates are missing")
+        values = values[~missing]
+    if len(values) == 0:
+        return problems
+
+    months = values.astype("datetime64[M]")
+    not_first = values != months.astype("datetime64[ns]")
+    if not_first.any():
+        problems.append(
+            f"{not_first.sum()} dates are not the first of a month, "
+            f"ex. {pd.Timestamp(values[not_first][0]).date()}"
+        )
+
+    ordinals = months.astype(np.int64)
+    first = ordinals.min()
+    counts = np.bincount(ordinals - first)
+
+    for start, end in _runs(counts == 0):
+        problems.append(f"Missing {_format_month_range(first + start, first + end)}")
+    for start, end in _runs(counts > 1):
+        problems.append(f"Duplicate {_format_month_range(first + start, first + end)}")
+
+    return problems
+
+
+def find_duplicate_date_problems(dates: "pd.Series[Any]") -> list[str]:
+    """
+    Return a problem listing the dates that appear more than once, if any.
+    """
+    duplicated = dates[dates.duplicated()].unique()
+    if len(duplicated) == 0:
+        return []
+    return [f"Duplicate dates: {', '.join(str(d) for d in duplicated)}"]
+
+
+def find_integer_problems(
+    df: pd.DataFrame, columns: list[str], dtype: str
+) -> list[str]:
+    """
+    Return a problem for each column that has missing values, non-integer values, or values that do not fit in
+    `dtype` (ex. "int32").
+    """
+    info = np.iinfo(dtype)
+    problems = []
+
+    # Checked a block at a time, since integer columns (the usual case) cannot have missing or fractional values
+    values = df[columns]
+    integer = [c for c in columns if pd.api.types.is_integer_dtype(values[c])]
+    others = [c for c in columns if c not in integer]
+    for column in others:
+        numbers = pd.to_numeric(values[column], errors="coerce")
+        if numbers.isna().any():
+            problems.append(f"Column {column!r} has missing or non-numeric values")
+        elif (numbers % 1 != 0).any():
+            problems.append(f"Column {column!r} has non-integer values")
+        else:
+            integer.append(column)
+
+    if integer and len(df):
+        block = values[integer].to_numpy(dtype=np.float64)
+        lows, highs = block.min(axis=0), block.max(axis=0)
+        for column, low, high in zip(integer, lows, highs):
+            if low < info.min or high > info.max:
+                problems.append(
+                    f"Column {column!r} has values outside the {dtype} range ({low:.0f} to {high:.0f})"
+                )
+    return problems
+
+
+def _raise_if_any(source: str, problems: list[str]) -> None:
+    if problems:
+        raise ValidationError(source, problems)
+
+
+def check_columns(columns: Iterable[Any], expected: list[str], source: str) -> None:
+    """
+    Raise a ValidationError if any expected column is missing. See find_column_problems().
+    """
+    _raise_if_any(source, find_column_problems(columns, expected))
+
+
+def check_monthly_dates(dates: "pd.Series[Any]", source: str) -> None:
+    """
+    Raise a ValidationError unless the dates are unique first-of-month dates, with none missing from the first to
+    the last. See find_monthly_date_problems().
+    """
+    _raise_if_any(source, find_monthly_date_problems(dates))
+
+
+def check_unique_dates(dates: "pd.Series[Any]", source: str) -> None:
+    """
+    Raise a ValidationError if any date appears more than once.
+    """
+    _raise_if_any(source, find_duplicate_date_problems(dates))
+
+
+def check_integers(
+    df: pd.DataFrame, columns: list[str], dtype: str, source: str
+) -> None:
+    """
+    Raise a ValidationError unless every value in `columns` is an integer that fits in `dtype`. See
+    find_integer_problems().
+    """
+    _raise_if_any(source, find_integer_problems(df, columns, dtype))
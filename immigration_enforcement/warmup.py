@@ -0,0 +1,169 @@
+"""
+Fill the caches that `backend.get_graph` reads before the first visitor asks for a graph.
+
+Without a warm-up, the first page view downloads TRAC's detention data and then parses the Border Patrol workbook,
+one after the other. warm_up() does both at the same time: the download, which mostly waits on the network, in a
+thread, and the parsing of any Border Patrol artifacts that are not built yet, which is CPU-bound, in separate
+processes. Each graph is then built once, so that the Streamlit caches and the figure cache are full.
+
+Streamlit only runs the app's script when a session starts, so to warm up before the first visitor, start the
+server through this module. It starts the warm-up in a background thread, then runs `streamlit run` in the same
+process, whose sessions share the caches the warm-up fills:
+
+    python -m immigration_enforcement.warmup --serve streamlit_app.py [streamlit options]
+
+The app also calls start_warm_up() at the top of every run, so that a server started with plain `streamlit run`
+warms up when it handles its first session (only the first call starts it). Either way no page waits on the
+warm-up, and pages that need a graph while it is running wait for the same cached computation rather than
+repeating it.
+
+To also have the disk caches (the HTTP cache and the Parquet artifacts) ready before the server starts, run the
+warm-up ahead of time:
+
+    python -m immigration_enforcement.warmup && streamlit run streamlit_app.py
+"""
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import immigration_enforcement.backend as be
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.tracing as tracing
+
+logger = logging.getLogger(__name__)
+
+# The artifacts the Border Patrol graphs are built from
+ARTIFACTS: list[tuple[Path, artifacts.Builder]] = [
+    (artifacts.KHSM_WORKBOOK, artifacts.read_khsm_workbook),
+    (artifacts.SBO_CSV, artifacts.read_sbo_encounters),
+]
+
+_started = False
+_lock = threading.Lock()
+
+
+def _build_artifact(source: Path, builder: artifacts.Builder) -> None:
+    # Runs in a worker process. The artifact is written to disk, so nothing needs to be sent back.
+    artifacts.load_artifact(source, builder)
+
+
+def _build_artifacts(workers: int | None) -> None:
+    """
+    Build the missing Border Patrol artifacts, each in its own process.
+    """
+    missing = [
+        (source, builder)
+        for source, builder in ARTIFACTS
+        if not artifacts.artifact_exists(source, builder)
+    ]
+    if not missing:
+        return
+
+    # "spawn" rather than "fork": the Streamlit server is multi-threaded, and forking it is not safe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers or len(missing), mp_context=context
+    ) as pool:
+        for future in [pool.submit(_build_artifact, *args) for args in missing]:
+            future.result()
+
+
+def _build_graphs(specs: list[be.GraphSpec]) -> None:
+    for spec in specs:
+        be.get_graph(*spec)
+
+
+def warm_up(workers: int | None = None) -> None:
+    """
+    Download TRAC's data while building the Border Patrol artifacts, then build every graph get_graph() can draw.
+
+    Parameters:
+    - workers: The maximum number of processes used to build artifacts. Defaults to one per missing artifact.
+    """
+    with tracing.span("warmup.warm_up"):
+        with ThreadPoolExecutor(max_workers=1) as threads:
+            # The first graph downloads TRAC's data, and the others reuse it. The detention graphs are listed without
+            # reading the Border Patrol data, so the download starts right away.
+            detentions_done: Future[None] = threads.submit(
+                _build_graphs, be.get_detention_graph_specs()
+            )
+            _build_artifacts(workers)
+            # Listing the border regions reads the KHSM workbook's artifact, so only once it is built
+            _build_graphs(be.get_border_graph_specs())
+            detentions_done.result()
+
+
+def _warm_up_in_background() -> None:
+    start = time.perf_counter()
+    try:
+        warm_up()
+    except Exception:
+        # The app still works, it is just slower on the first view. The error shows up again there if it persists.
+        logger.exception("Warm-up failed")
+        return
+    logger.info("Warm-up finished in %.1f s", time.perf_counter() - start)
+
+
+def start_warm_up() -> bool:
+    """
+    Start warm_up() in a background thread, unless it was already started in this process. Returns True if it was
+    started by this call.
+    """
+    global _started
+    with _lock:
+        if _started:
+            return False
+        _started = True
+
+    # Streamlit's caches are shared by every session in the process, so filling them from this thread helps all of
+    # them. Streamlit warns that the thread has no script context, which is expected.
+    threading.Thread(target=_warm_up_in_background, name="warm-up", daemon=True).start()
+    return True
+
+
+def serve(script: str, streamlit_args: list[str]) -> None:
+    """
+    Start the warm-up in the background, then run the Streamlit app in this process until the server stops.
+
+    Parameters:
+    - script: The app's script, ex. "streamlit_app.py".
+    - streamlit_args: Options for `streamlit run`, ex. ["--server.port", "8080"].
+    """
+    from streamlit.web import cli
+
+    start_warm_up()
+    cli.main(["run", script, *streamlit_args], prog_name="streamlit")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Fill the caches that the app's graphs are built from."
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="SCRIPT",
+        help="Run the Streamlit app SCRIPT in this process while the caches fill in the background. "
+        "Any other options are passed to `streamlit run`.",
+    )
+    args, streamlit_args = parser.parse_known_args(argv)
+    if args.serve:
+        serve(args.serve, streamlit_args)
+        return
+    if streamlit_args:
+        parser.error(f"unrecognized arguments: {' '.join(streamlit_args)}")
+
+    # Streamlit warns about running outside of `streamlit run` on every cached call
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    warm_up()
+    print(f"Warmed up the caches in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
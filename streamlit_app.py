@@ -1,6 +1,15 @@
 import streamlit as st
 import immigration_enforcement.backend as be
 import immigration_enforcement.text.footnotes as footnotes
+import immigration_enforcement.tracing as tracing
+import immigration_enforcement.warmup as warmup
+
+# Fill the caches for every graph in the background, once per server process (see warmup.py)
+warmup.start_warm_up()
+
+# Add "?debug=1" to the URL to see how long each stage of the page took (see tracing.py)
+debug = st.query_params.get("debug") == "1"
+spans = tracing.start_collection() if debug else None
 
 st.title("How Has U.S. Immigration Enforcement Changed?")
 st.markdown(
@@ -52,7 +61,13 @@ with border_tab:
         [here](https://arilamstein.com/blog/2025/10/16/visualizing-border-patrol-encounters-under-the-second-trump-administration/).
         """
     )
-    fig = be.get_graph("Border Patrol", None, None)
+    region = st.selectbox("Region", be.get_border_regions())
+    fig = be.get_graph("Border Patrol", None, None, region)
     st.plotly_chart(fig, use_container_width=True)
 with about_tab:
     st.write(open("immigration_enforcement/text/about.md").read())
+
+if spans is not None:
+    tracing.stop_collection()
+    with st.expander("Debug: timings", expanded=True):
+        st.dataframe(tracing.to_rows(spans), use_container_width=True)
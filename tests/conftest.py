@@ -0,0 +1,11 @@
+import pytest
+from immigration_enforcement.cache_dir import CACHE_DIR_ENV_VAR
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_cache_dir(tmp_path_factory):
+    """Keep the on-disk caches written during tests out of the user's home directory."""
+    mp = pytest.MonkeyPatch()
+    mp.setenv(CACHE_DIR_ENV_VAR, str(tmp_path_factory.mktemp("cache")))
+    yield
+    mp.undo()
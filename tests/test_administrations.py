@@ -0,0 +1,84 @@
+"""Tests for the administrations module."""
+
+from datetime import datetime
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+import immigration_enforcement.administrations as administrations
+
+
+def _df():
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2019-01-01", periods=100, freq="MS"),
+            "count": range(100),
+        }
+    )
+
+
+def test_get_administrations():
+    everyone = administrations.get_administrations()
+    assert everyone == administrations.ADMINISTRATIONS
+
+    recent = administrations.get_administrations(since=datetime(2019, 1, 1))
+    assert [a.president for a in recent] == ["Joe Biden", "Donald Trump"]
+
+    unlabeled = administrations.get_administrations(label_latest=False)
+    assert unlabeled[-1].president == ""
+    assert unlabeled[-1].start == datetime(2025, 1, 20)
+
+
+def test_get_template_is_built_once():
+    name = administrations.get_template(since=datetime(2019, 1, 1), base="plotly")
+
+    assert (
+        administrations.get_template(since=datetime(2019, 1, 1), base="plotly") == name
+    )
+    template = pio.templates[name]
+    assert [shape.x0 for shape in template.layout.shapes] == [
+        datetime(2021, 1, 20),
+        datetime(2025, 1, 20),
+    ]
+    # plotly.js only draws the template's shapes that have a unique name
+    names = [shape.name for shape in template.layout.shapes]
+    assert all(names) and len(set(names)) == len(names)
+    # The base template's styling is kept
+    assert template.layout.colorway == pio.templates["plotly"].layout.colorway
+
+
+def test_annotate():
+    df = _df()
+    template = administrations.get_template(
+        since=datetime(2019, 1, 1), legend_on_top=True
+    )
+    fig = px.line(df, x="date", y="count", template=template)
+
+    administrations.annotate(fig, template, max_y=df["count"].max())
+
+    assert [a.text for a in fig.layout.annotations] == ["Joe Biden", "Donald Trump"]
+    assert {a.y for a in fig.layout.annotations} == {99}
+    assert len(fig.layout.template.layout.shapes) == 2
+    assert fig.layout.template.layout.legend.orientation == "h"
+    assert fig.layout.margin.t is None  # The template's margin is used
+
+
+def test_annotate_applies_template():
+    df = _df()
+    template = administrations.get_template(legend_on_top=True)
+    fig = px.line(df, x="date", y="count")
+
+    administrations.annotate(fig, template, max_y=99)
+
+    assert len(fig.layout.template.layout.shapes) == 5
+    assert fig.layout.margin.t == 100
+    assert len(fig.layout.annotations) == 5
+
+
+def test_annotate_empty_figure():
+    df = _df().iloc[:0]
+    template = administrations.get_template(since=datetime(2019, 1, 1))
+    fig = px.line(df, x="date", y="count", template=template)
+
+    administrations.annotate(fig, template, max_y=df["count"].max())
+
+    assert {a.y for a in fig.layout.annotations} == {0.0}
@@ -0,0 +1,230 @@
+"""Tests for the api module."""
+
+import gzip
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+import pandas as pd
+import pytest
+import immigration_enforcement.api as api
+import immigration_enforcement.backend as be
+import immigration_enforcement.detentions as detentions
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+FIXTURE = Path(__file__).parents[1] / "benchmarks" / "fixtures" / "pop_agen_table.json"
+
+
+@pytest.fixture(autouse=True)
+def dataset():
+    """Serve the detention data from the benchmark fixture, rather than from TRAC."""
+    dataset = detentions.DetentionDataset(
+        detentions.parse_detention_data(FIXTURE.read_bytes())
+    ).freeze()
+    api.clear_cache()
+    be.clear_figure_cache()
+    with patch.object(detentions.DetentionDataset, "load", return_value=dataset):
+        yield dataset
+    api.clear_cache()
+    be.clear_figure_cache()
+
+
+def test_get_table_names():
+    names = api.get_table_names()
+
+    assert "detentions" in names
+    assert "detentions-criminality-pct-ice" in names
+    assert "border-encounters-southwest-land-border" in names
+    assert "border-encounters-coastal-border" in names
+
+
+def test_get_graph_names():
+    graphs = api.get_graph_names()
+
+    assert graphs["criminality-percent-ice"] == ("Criminality", "Percent", "ICE", None)
+    assert len(graphs) == len(be.get_graph_specs())
+
+
+def test_table_csv(dataset):
+    response = api.handle("/tables/detentions-aa-count.csv", {})
+
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/csv")
+    df = pd.read_csv(io.BytesIO(response.body))
+    assert list(df.columns) == ["date", "Arresting Authority", "count"]
+    assert len(df) == len(dataset.aa_count)
+
+
+def test_table_json_date_filter(dataset):
+    response = api.handle("/tables/detentions.json?start=2025-01-01&end=2025-06-30", {})
+
+    rows = json.loads(response.body)
+    dates = [row["date"] for row in rows]
+    expected = dataset.df[
+        (dataset.df["date"] >= "2025-01-01") & (dataset.df["date"] <= "2025-06-30")
+    ]
+    assert len(rows) == len(expected) > 0
+    assert min(dates) >= "2025-01-01" and max(dates) <= "2025-06-30"
+    assert rows[0]["ice_all"] == expected["ice_all"].iloc[0]
+
+
+def test_filter_dates():
+    df = pd.DataFrame(
+        {"date": pd.date_range("2024-01-01", periods=5, freq="MS"), "n": range(5)}
+    )
+
+    assert list(api.filter_dates(df, date(2024, 2, 1), None)["n"]) == [1, 2, 3, 4]
+    assert list(api.filter_dates(df, None, date(2024, 2, 1))["n"]) == [0, 1]
+    assert api.filter_dates(df, None, None) is df
+
+
+def test_border_encounters_table():
+    response = api.handle(
+        "/tables/border-encounters-southwest-land-border.csv?start=2024-10-01", {}
+    )
+
+    df = pd.read_csv(io.BytesIO(response.body))
+    assert list(df.columns) == ["date", "encounters"]
+    assert df["date"].min() == "2024-10-01"
+
+
+def test_etag_and_not_modified():
+    first = api.handle("/tables/detentions.json", {})
+    etag = first.headers["ETag"]
+
+    second = api.handle("/tables/detentions.json", {"If-None-Match": etag})
+    assert second.status == 304
+    assert second.body == b""
+    assert second.headers["ETag"] == etag
+
+    # Weak comparison, and a list of tags
+    third = api.handle(
+        "/tables/detentions.json", {"if-none-match": f'"other", W/{etag}'}
+    )
+    assert third.status == 304
+
+    # A different representation has a different ETag
+    other = api.handle("/tables/detentions.csv", {"If-None-Match": etag})
+    assert other.status == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_body_is_built_once_per_data_version(dataset):
+    with patch.object(
+        api, "_serialize_table", wraps=api._serialize_table
+    ) as mock_serialize:
+        api.handle("/tables/detentions.csv", {})
+        api.handle("/tables/detentions.csv", {})
+        assert mock_serialize.call_count == 1
+
+        # New data is a new dataset object, so the body is rebuilt
+        refreshed = detentions.DetentionDataset(dataset.df.iloc[1:]).freeze()
+        with patch.object(detentions.DetentionDataset, "load", return_value=refreshed):
+            response = api.handle("/tables/detentions.csv", {})
+        assert mock_serialize.call_count == 2
+
+    assert len(pd.read_csv(io.BytesIO(response.body))) == len(dataset.df) - 1
+
+
+def test_gzip():
+    plain = api.handle("/tables/detentions.csv", {})
+    compressed = api.handle(
+        "/tables/detentions.csv", {"Accept-Encoding": "gzip, deflate, br"}
+    )
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.body) == plain.body
+    assert len(compressed.body) < len(plain.body)
+
+    refused = api.handle("/tables/detentions.csv", {"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused.headers
+
+
+def test_gzip_etag():
+    plain = api.handle("/tables/detentions.csv", {})
+    compressed = api.handle("/tables/detentions.csv", {"Accept-Encoding": "gzip"})
+    etag, gzip_etag = plain.headers["ETag"], compressed.headers["ETag"]
+
+    # The copies have different bytes, so different ETags
+    assert gzip_etag == etag[:-1] + '-gz"'
+
+    not_modified = api.handle(
+        "/tables/detentions.csv",
+        {"Accept-Encoding": "gzip", "If-None-Match": gzip_etag},
+    )
+    assert not_modified.status == 304
+    assert not_modified.headers["ETag"] == gzip_etag
+    weak = api.handle(
+        "/tables/detentions.csv",
+        {"Accept-Encoding": "gzip", "If-None-Match": f"W/{gzip_etag}"},
+    )
+    assert weak.status == 304
+
+    # Each tag only matches its own copy
+    plain_for_gzip = api.handle(
+        "/tables/detentions.csv", {"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert plain_for_gzip.status == 200
+    assert plain_for_gzip.headers["Content-Encoding"] == "gzip"
+    gzip_for_plain = api.handle("/tables/detentions.csv", {"If-None-Match": gzip_etag})
+    assert gzip_for_plain.status == 200
+    assert "Content-Encoding" not in gzip_for_plain.headers
+
+
+def test_graph():
+    response = api.handle("/graphs/arresting-authority-count.json", {})
+
+    fig = json.loads(response.body)
+    assert response.status == 200
+    assert fig["layout"]["title"]["text"] == (
+        "ICE Detainees by Date* and Arresting Authority"
+    )
+
+
+@pytest.mark.parametrize(
+    "target, status",
+    [
+        ("/tables/nope.csv", 404),
+        ("/graphs/nope.json", 404),
+        ("/nope", 404),
+        ("/tables/detentions.csv?start=yesterday", 400),
+        ("/tables/detentions.csv?start=2025-02-01&end=2025-01-01", 400),
+    ],
+)
+def test_errors(target, status):
+    response = api.handle(target, {})
+
+    assert response.status == status
+    assert "error" in json.loads(response.body)
+
+
+def test_index():
+    index = json.loads(api.handle("/", {}).body)
+
+    assert index["tables"]["detentions"]["csv"] == "/tables/detentions.csv"
+    assert (
+        index["graphs"]["criminality-count-all"] == "/graphs/criminality-count-all.json"
+    )
+
+
+def test_server():
+    server = api.create_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/tables/detentions.csv"
+    try:
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            assert response.read().startswith(b"date,")
+
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request)
+        assert excinfo.value.code == 304
+    finally:
+        server.shutdown()
+        server.server_close()
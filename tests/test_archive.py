@@ -0,0 +1,108 @@
+"""Tests for the archive module."""
+
+import pandas as pd
+import pytest
+import immigration_enforcement.archive as archive
+
+
+def _snapshot(counts: dict[str, int]) -> pd.DataFrame:
+    """A table like TRAC's, with one row per date, newest first."""
+    dates = sorted(counts, reverse=True)
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(dates),
+            "ice_all": [counts[d] for d in dates],
+            "cbp_all": [1] * len(dates),
+        }
+    )
+
+
+FIRST = _snapshot({"2025-08-24": 10, "2025-09-07": 20})
+SECOND = _snapshot({"2025-08-24": 10, "2025-09-07": 25, "2025-09-21": 30})
+
+
+def test_empty_archive(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    assert a.snapshots == []
+    assert a.load().empty
+
+
+def test_append_writes_only_new_and_revised_rows(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(FIRST, "first")
+    entry = a.append(SECOND, "second")
+
+    assert entry["added"] == 1
+    assert entry["revised"] == 1
+    assert entry["removed"] == []
+    part = pd.read_parquet(tmp_path / entry["file"])
+    assert sorted(part["date"].dt.strftime("%Y-%m-%d")) == ["2025-09-07", "2025-09-21"]
+
+    pd.testing.assert_frame_equal(a.load(), SECOND)
+    pd.testing.assert_frame_equal(a.load(snapshot=0), FIRST)
+
+
+def test_append_skips_same_response(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(FIRST, "first")
+
+    assert a.append(FIRST, "first") is None
+    assert len(a.snapshots) == 1
+
+
+def test_append_unchanged_data_writes_no_rows(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(FIRST, "first")
+    entry = a.append(FIRST.copy(), "reformatted")
+
+    assert entry["file"] is None
+    assert entry["added"] == entry["revised"] == 0
+    pd.testing.assert_frame_equal(a.load(), FIRST)
+
+
+def test_removed_rows(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(SECOND, "second")
+    entry = a.append(SECOND.iloc[:2], "truncated")
+    assert entry["removed"] == ["2025-08-24"]
+    pd.testing.assert_frame_equal(a.load(), SECOND.iloc[:2])
+
+    # A removed row that comes back is added again
+    a.append(SECOND, "restored")
+    pd.testing.assert_frame_equal(a.load(), SECOND)
+
+
+def test_diff(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(FIRST, "first")
+    a.append(SECOND.iloc[:2], "second")
+
+    diff = a.diff(0, 1)
+
+    assert list(diff["change"]) == ["added", "revised", "removed"]
+    assert list(diff["date"].dt.strftime("%Y-%m-%d")) == [
+        "2025-09-21",
+        "2025-09-07",
+        "2025-08-24",
+    ]
+    assert list(diff["ice_all"]) == [30, 25, 10]
+    assert a.diff(1, 1).empty
+
+
+def test_load_mixes_date_and_datetime_keys(tmp_path):
+    # Snapshots archived before the detention data had a schema have datetime.date keys
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(FIRST.assign(date=FIRST["date"].dt.date), "first")
+    entry = a.append(SECOND, "second")
+
+    assert entry["added"] == 1 and entry["revised"] == 1
+    pd.testing.assert_frame_equal(a.load(), SECOND)
+    pd.testing.assert_frame_equal(a.load(snapshot=0), FIRST)
+    assert list(a.diff(0, 1)["change"]) == ["added", "revised"]
+
+
+def test_load_unknown_snapshot(tmp_path):
+    a = archive.SnapshotArchive(tmp_path)
+    a.append(FIRST, "first")
+    with pytest.raises(ValueError):
+        a.load(snapshot=1)
@@ -0,0 +1,98 @@
+"""Tests for the artifacts module."""
+
+import os
+import shutil
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import pandas as pd
+from unittest.mock import patch
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    first = artifacts.hash_file(path)
+
+    assert first == artifacts.hash_file(path)
+
+    path.write_text("a,b\n1,3\n")
+    # The same size, so only the modification time tells the versions apart. Some file systems only keep whole
+    # seconds, so it is set explicitly.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert first != artifacts.hash_file(path)
+
+
+def test_hash_file_reads_file_once(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+
+    with patch("builtins.open", wraps=open) as mock_open:
+        first = artifacts.hash_file(path)
+        assert artifacts.hash_file(path) == first
+    assert mock_open.call_count == 1
+
+
+def test_read_khsm_workbook():
+    df = artifacts.read_khsm_workbook(artifacts.KHSM_WORKBOOK)
+
+    assert list(df.columns) == [
+        "sheet",
+        "fiscal_year",
+        "month",
+        "region",
+        "citizenship",
+        "family_status",
+        "sector",
+        "encounters",
+    ]
+    assert "Monthly Region" in set(df["sheet"])
+    assert "Annual Citizenship" in set(df["sheet"])
+
+
+def test_load_khsm_monthly_region():
+    df = artifacts.load_khsm_monthly_region()
+
+    assert list(df.columns) == ["fiscal_year", "month", "region", "encounters"]
+    assert df["month"].iloc[0] == "October"
+    assert set(df["region"]) == {
+        "Coastal Border",
+        "Northern Land Border",
+        "Southwest Land Border",
+    }
+
+
+def test_read_sbo_encounters():
+    df = artifacts.read_sbo_encounters(artifacts.SBO_CSV)
+
+    assert isinstance(df["Component"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_integer_dtype(df["Encounter Count"])
+
+
+def test_load_artifact_matches_source_and_is_reused(tmp_path):
+    source = tmp_path / "sbo.csv"
+    shutil.copy(artifacts.SBO_CSV, source)
+
+    built = artifacts.load_artifact(source, artifacts.read_sbo_encounters)
+
+    # The second load must come from the artifact, not the source file
+    with patch.object(pd, "read_csv") as mock_read_csv:
+        loaded = artifacts.load_artifact(source, artifacts.read_sbo_encounters)
+    mock_read_csv.assert_not_called()
+
+    pd.testing.assert_frame_equal(built, loaded)
+
+
+def test_load_artifact_rebuilds_when_source_changes(tmp_path):
+    source = tmp_path / "sbo.csv"
+    source.write_text("Fiscal Year,Encounter Count\n2024,1\n")
+    first = artifacts.load_artifact(source, artifacts.read_sbo_encounters)
+
+    source.write_text("Fiscal Year,Encounter Count\n2024,2\n")
+    second = artifacts.load_artifact(source, artifacts.read_sbo_encounters)
+
+    assert first["Encounter Count"].iloc[0] == 1
+    assert second["Encounter Count"].iloc[0] == 2
+
+    # The artifact for the old version of the file is removed
+    old_artifacts = list(artifacts.get_cache_dir("artifacts").glob("sbo.*.parquet"))
+    assert len(old_artifacts) == 1
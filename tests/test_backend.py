@@ -1,5 +1,10 @@
+import datetime
 import immigration_enforcement.backend as be
+import immigration_enforcement.detentions as detentions
+import immigration_enforcement.tracing as tracing
+import pandas as pd
 from plotly.graph_objects import Figure
+from unittest.mock import patch
 import pytest
 
 
@@ -33,3 +38,98 @@ def test_get_graph_bp():
 def test_invalid_dataset():
     with pytest.raises(ValueError):
         be.get_graph(dataset="ooga booga", display="Percent", authority=None)
+
+
+@pytest.fixture
+def mock_dataset():
+    df = pd.DataFrame(
+        [
+            {
+                "date": datetime.date(2025, 9, 21),
+                "ice_all": 46015,
+                "cbp_all": 13747,
+                "total_all": 59762,
+                "ice_other": 16523,
+                "cbp_other": 11223,
+                "total_other": 27746,
+                "ice_pend": 13767,
+                "cbp_pend": 1242,
+                "total_pend": 15009,
+                "ice_conv": 15725,
+                "cbp_conv": 1282,
+                "total_conv": 17007,
+            }
+        ]
+    )
+    return detentions.DetentionDataset(df)
+
+
+def test_get_graph_caches_figures(mock_dataset):
+    be.clear_figure_cache()
+
+    with patch.object(detentions.DetentionDataset, "load", return_value=mock_dataset):
+        count = be.get_graph("Arresting Authority", "Count", None)
+        pct = be.get_graph("Arresting Authority", "Percent", None)
+        assert be.get_graph("Arresting Authority", "Count", None) is count
+        assert be.get_graph("Arresting Authority", "Percent", "ICE") is pct
+
+    info = be.get_figure_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+
+
+def test_get_graph_rebuilds_when_data_changes(mock_dataset):
+    be.clear_figure_cache()
+
+    revised_df = mock_dataset.df.copy()
+    revised_df.loc[0, "ice_all"] += 1
+    revised = detentions.DetentionDataset(revised_df)
+
+    with patch.object(detentions.DetentionDataset, "load", return_value=mock_dataset):
+        old = be.get_graph("Criminality", "Count", "All")
+    with patch.object(detentions.DetentionDataset, "load", return_value=revised):
+        new = be.get_graph("Criminality", "Count", "All")
+
+    assert old is not new
+    assert be.get_figure_cache_info().misses == 2
+
+
+def test_figure_cache_evicts_least_recently_used():
+    cache = be.FigureCache(maxsize=2)
+    figs = [Figure() for _ in range(3)]
+
+    cache.put(("a", None, None, None, "v1"), figs[0])
+    cache.put(("b", None, None, None, "v1"), figs[1])
+    cache.get(("a", None, None, None, "v1"))  # "a" is now more recently used than "b"
+    cache.put(("c", None, None, None, "v1"), figs[2])
+
+    assert cache.get(("a", None, None, None, "v1")) is figs[0]
+    assert cache.get(("b", None, None, None, "v1")) is None
+    assert cache.info().currsize == 2
+
+
+def test_get_graph_bp_region():
+    sw = be.get_graph(dataset="Border Patrol", display=None, authority=None)
+    north = be.get_graph("Border Patrol", None, None, region="Northern Land Border")
+
+    assert sw is not north
+    assert "Northern Land Border" in north.layout.title.text
+    assert be.get_border_regions()[0] == "Southwest Land Border"
+
+
+def test_get_graph_records_cache_hits_and_misses(mock_dataset):
+    be.clear_figure_cache()
+    spans = tracing.start_collection()
+
+    try:
+        with patch.object(
+            detentions.DetentionDataset, "load", return_value=mock_dataset
+        ):
+            be.get_graph("Criminality", "Count", "ICE")
+            be.get_graph("Criminality", "Count", "ICE")
+    finally:
+        tracing.stop_collection()
+
+    graph_spans = [s for s in spans if s.name == "backend.get_graph"]
+    assert [s.cache for s in graph_spans] == ["miss", "hit"]
+    # Building the figure is broken down into stages
+    assert {"px.line", "detentions._style_detentions_graph"} <= {s.name for s in spans}
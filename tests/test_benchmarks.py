@@ -0,0 +1,37 @@
+"""Tests for the benchmark suite in benchmarks/run.py."""
+
+import json
+import pytest
+import pandas as pd
+import benchmarks.run as run
+
+
+def test_scale_detention_records():
+    records = json.loads(run.FIXTURE.read_bytes())
+    scaled = run.scale_detention_records(records, 10)
+
+    assert len(scaled) == 10 * len(records)
+    dates = pd.to_datetime([r["date"] for r in scaled], format="%m/%d/%Y")
+    assert dates.is_unique
+    assert dates.is_monotonic_decreasing
+    assert scaled[0] == records[0]
+
+
+def test_is_regression():
+    assert run.is_regression(0.2, 0.1, tolerance=1.5)
+    assert not run.is_regression(0.14, 0.1, tolerance=1.5)
+    # Too small to be more than noise
+    assert not run.is_regression(0.0015, 0.0005, tolerance=1.5)
+
+
+@pytest.mark.parametrize("benchmark", run.BENCHMARKS, ids=lambda b: b.name)
+def test_benchmarks_run_offline(benchmark):
+    assert run.time_function(benchmark.prepare(1), repeat=1) > 0
+
+
+def test_scaled_benchmarks_clean_up():
+    with run.scratch_directory() as directory:
+        assert run.time_function(run._aggregate_sbo_encounters(10), repeat=1) > 0
+        assert list(directory.iterdir())
+
+    assert not directory.exists()
@@ -0,0 +1,74 @@
+"""Tests for the cube module."""
+
+import pytest
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.cube as cube
+import immigration_enforcement.borderpatrol.encounters as encounters
+import pandas as pd
+
+
+@pytest.fixture(scope="module")
+def encounters_cube():
+    return cube.get_encounters_cube()
+
+
+def test_dimensions(encounters_cube):
+    assert encounters_cube.dimensions == [
+        "Component",
+        "Demographic",
+        "Citizenship Grouping",
+        "Title of Authority",
+        "Encounter Type",
+    ]
+    # Marginals of up to 3 of the 5 dimensions are precomputed: 1 + 5 + 10 + 10
+    assert len(encounters_cube.marginals) == 26
+
+
+def test_query_matches_raw_data(encounters_cube):
+    filters = {
+        "Title of Authority": "Title 8",
+        "Encounter Type": "Apprehensions",
+        "Citizenship Grouping": "Mexico",
+        "Component": "U.S. Border Patrol",
+    }
+    actual = encounters_cube.query(filters=filters)
+
+    raw = pd.read_csv(artifacts.SBO_CSV)
+    for column, value in filters.items():
+        raw = raw[raw[column] == value]
+
+    assert list(actual.columns) == ["date", "encounters"]
+    assert actual["encounters"].sum() == raw["Encounter Count"].sum()
+    assert actual["date"].is_unique
+
+
+def test_query_by_dimension(encounters_cube):
+    actual = encounters_cube.query(
+        filters={"Demographic": ["UAC", "FMUA"]}, by=["Demographic"]
+    )
+
+    assert list(actual.columns) == ["date", "Demographic", "encounters"]
+    assert set(actual["Demographic"]) == {"UAC", "FMUA"}
+
+
+def test_query_matches_ytd_encounters(encounters_cube):
+    """The cube and the YTD loader should agree on Border Patrol's monthly totals."""
+    ytd = encounters._get_ytd_sw_border_encounters()
+
+    actual = encounters_cube.query(filters={"Component": "U.S. Border Patrol"})
+    actual = actual[actual["date"].isin(ytd["date"])].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(actual, ytd, check_dtype=False)
+
+
+def test_query_unknown_value_is_empty(encounters_cube):
+    assert encounters_cube.query(filters={"Demographic": "Nobody"}).empty
+
+
+def test_query_unknown_dimension(encounters_cube):
+    with pytest.raises(ValueError):
+        encounters_cube.query(by=["Sector"])
+
+
+def test_get_encounters_cube_is_built_once():
+    assert cube.get_encounters_cube() is cube.get_encounters_cube()
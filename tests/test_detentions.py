@@ -1,7 +1,10 @@
 """Tests for the detentions module."""
 
+import json
 import pytest
+import immigration_enforcement.archive as archive
 import immigration_enforcement.detentions as detentions
+import immigration_enforcement.validation as validation
 from unittest.mock import patch
 import pandas as pd
 import datetime
@@ -30,15 +33,17 @@ def test_get_detention_data():
     ]
 
     # This is a unit test - so assume the API returns the actual data it returned today
-    with patch("immigration_enforcement.detentions.requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_json
+    with patch("immigration_enforcement.http_cache.fetch") as mock_fetch:
+        mock_fetch.return_value = json.dumps(mock_json).encode()
 
         df = detentions.get_detention_data()
 
     expected_columns = set(mock_json[0].keys())
     assert isinstance(df, pd.DataFrame)
     assert set(df.columns) == expected_columns
-    assert df.date.dtype == object
+    assert df.date.dtype == "datetime64[ns]"
+    assert (df.dtypes.drop("date") == "int32").all()
+    assert df.loc[0, "date"] == pd.Timestamp("2025-09-21")
     assert df.loc[0, "ice_all"] == 46015
 
 
@@ -159,3 +164,255 @@ def test_get_max_y_value_from_figure(mock_detention_df):
     actual_max = detentions._get_max_y_value_from_figure(fig)
 
     assert actual_max == expected_max
+
+
+def test_get_max_y_value_from_figure_skips_missing_values():
+    fig = Figure()
+    assert detentions._get_max_y_value_from_figure(fig) == 0.0
+
+    fig.add_scatter(x=[1, 2, 3], y=[1, None, 3])
+    fig.add_scatter(x=[1, 2], y=[2, 2])
+    assert detentions._get_max_y_value_from_figure(fig) == 3.0
+
+
+def test_style_detentions_graph(mock_detention_df):
+    fig = px.line(mock_detention_df, x="date", y="ice_all")
+
+    fig = detentions._style_detentions_graph(fig, max_y=123)
+
+    assert [a.text for a in fig.layout.annotations] == ["Joe Biden", "Donald Trump"]
+    assert {a.y for a in fig.layout.annotations} == {123}
+    assert fig.layout.template.layout.legend.orientation == "h"
+
+
+def test_detention_dataset_tables(mock_detention_df):
+    dataset = detentions.DetentionDataset(mock_detention_df)
+
+    assert list(dataset.aa_count.columns) == ["date", "Arresting Authority", "count"]
+    assert list(dataset.aa_count["Arresting Authority"].unique()) == [
+        "ICE",
+        "CBP",
+        "Total",
+    ]
+    assert list(dataset.aa_pct["Arresting Authority"].unique()) == ["ICE", "CBP"]
+
+    # 46015 / 59762 = 77%
+    first = dataset.aa_pct.iloc[0]
+    assert (first["Arresting Authority"], first["percent"]) == ("ICE", 77)
+
+    for authority in ["All", "ICE", "CBP"]:
+        count = dataset.criminality_count[authority]
+        pct = dataset.criminality_pct[authority]
+        assert count["Criminal Status"].nunique() == 4
+        assert pct["Criminal Status"].nunique() == 3
+        assert len(count) == 4 * len(mock_detention_df)
+
+    # 1282 / 13747 = 9%
+    cbp_conv = dataset.criminality_pct["CBP"].iloc[0]
+    assert (cbp_conv["Criminal Status"], cbp_conv["percent"]) == (
+        "Convicted Criminal",
+        9,
+    )
+
+    # The source frame is not modified
+    assert "ICE" not in mock_detention_df.columns
+
+
+def test_detention_dataset_version(mock_detention_df):
+    dataset = detentions.DetentionDataset(mock_detention_df)
+    assert dataset.version == detentions.DetentionDataset(mock_detention_df).version
+
+    revised = mock_detention_df.copy()
+    revised.loc[0, "ice_all"] += 1
+    assert dataset.version != detentions.DetentionDataset(revised).version
+
+
+def test_get_detention_data_rejects_counts_out_of_range():
+    record = {column: 1 for column in detentions.COUNT_COLUMNS}
+    body = json.dumps([{**record, "date": "09/21/2025", "ice_all": 2**31}]).encode()
+
+    with patch("immigration_enforcement.http_cache.fetch", return_value=body):
+        with pytest.raises(validation.ValidationError, match="ice_all"):
+            detentions.get_detention_data()
+
+
+def test_apply_detention_schema(mock_detention_df):
+    # Ex. data archived before the schema was introduced
+    df = detentions.apply_detention_schema(mock_detention_df)
+
+    assert dict(df.dtypes.astype(str)) == detentions.DETENTION_SCHEMA
+    assert detentions.apply_detention_schema(df) is df
+
+
+def test_detention_dataset_percent_dtype(mock_detention_df):
+    dataset = detentions.DetentionDataset(mock_detention_df)
+
+    assert dataset.aa_pct["percent"].dtype == detentions.PERCENT_DTYPE
+    assert dataset.criminality_pct["ICE"]["percent"].dtype == detentions.PERCENT_DTYPE
+
+
+def test_frozen_dataset_is_read_only(mock_detention_df):
+    dataset = detentions.DetentionDataset(mock_detention_df.copy()).freeze()
+
+    with pytest.raises(ValueError):
+        dataset.df.loc[0, "ice_all"] = 0
+    with pytest.raises(ValueError):
+        dataset.aa_pct.loc[0, "percent"] = 0
+    with pytest.raises(ValueError):
+        dataset.criminality_count["ICE"]["count"] += 1
+    with pytest.raises(TypeError):
+        dataset.criminality_pct["ICE"] = dataset.aa_pct
+    with pytest.raises(AttributeError):
+        dataset.aa_count = dataset.aa_pct
+
+    # Derived tables are new objects, and can be modified
+    derived = dataset.aa_count[dataset.aa_count["count"] > 0]
+    derived.loc[:, "count"] = 0
+
+
+def test_frozen_dataset_holds_read_only_arrays(mock_detention_df):
+    df = mock_detention_df.copy()
+    dataset = detentions.DetentionDataset(df).freeze()
+    tables = [
+        dataset.df,
+        dataset.aa_count,
+        dataset.aa_pct,
+        *dataset.criminality_count.values(),
+        *dataset.criminality_pct.values(),
+    ]
+
+    # Fails if pandas copies the arrays into writeable ones (ex. by consolidating them), even after a few reads
+    for table in tables:
+        table.set_index("date")
+        table.to_numpy()
+        for column in table.columns:
+            assert not table[column].to_numpy().flags.writeable, column
+            with pytest.raises(ValueError):
+                table.loc[0, column] = table.loc[1, column]
+
+    # The frame the dataset was created from is not frozen
+    df.loc[0, "ice_all"] = 0
+
+
+def test_chart_with_empty_x_range(mock_detention_df):
+    dataset = detentions.DetentionDataset(mock_detention_df)
+
+    fig = detentions.get_aa_count_chart(
+        dataset=dataset, x_range=(datetime.date(2100, 1, 1), None)
+    )
+
+    # The maximum of no data is NaN, which would hide the labels
+    assert fig.layout.annotations
+    assert {a.y for a in fig.layout.annotations} == {0.0}
+
+
+def test_charts_do_not_modify_frozen_dataset(mock_detention_df):
+    dataset = detentions.DetentionDataset(mock_detention_df.copy())
+    expected = [
+        detentions.get_aa_count_chart(dataset=dataset).to_json(),
+        detentions.get_aa_pct_chart(dataset=dataset).to_json(),
+        detentions.get_criminality_count_chart("ICE", dataset=dataset).to_json(),
+        detentions.get_criminality_pct_chart("CBP", dataset=dataset).to_json(),
+    ]
+
+    dataset.freeze()
+    actual = [
+        detentions.get_aa_count_chart(dataset=dataset).to_json(),
+        detentions.get_aa_pct_chart(dataset=dataset).to_json(),
+        detentions.get_criminality_count_chart("ICE", dataset=dataset).to_json(),
+        detentions.get_criminality_pct_chart("CBP", dataset=dataset).to_json(),
+    ]
+    detentions.get_aa_count_chart(
+        dataset=dataset, max_points=5, x_range=(datetime.date(2025, 9, 1), None)
+    )
+
+    assert actual == expected
+    assert dataset.version == detentions.DetentionDataset(mock_detention_df).version
+
+
+def test_cached_dataset_is_shared_and_frozen(mock_detention_df):
+    detentions._detention_dataset.clear()
+    with (
+        patch(
+            "immigration_enforcement.detentions.get_archived_detention_data",
+            return_value=None,
+        ),
+        patch(
+            "immigration_enforcement.shared_cache.get_or_compute_frame",
+            return_value=mock_detention_df.copy(),
+        ),
+    ):
+        first = detentions.DetentionDataset.load(use_cache=True)
+        second = detentions.DetentionDataset.load(use_cache=True)
+    detentions._detention_dataset.clear()
+
+    assert first is second
+    with pytest.raises(ValueError):
+        first.df.loc[0, "ice_all"] = 0
+
+
+def test_get_detention_data_is_archived(tmp_path, mock_detention_df):
+    body = json.dumps(
+        [
+            {**row, "date": row["date"].strftime("%m/%d/%Y")}
+            for row in mock_detention_df.to_dict("records")
+        ]
+    ).encode()
+
+    with (
+        patch("immigration_enforcement.http_cache.fetch", return_value=body),
+        patch(
+            "immigration_enforcement.detentions.get_detention_archive",
+            return_value=archive.SnapshotArchive(tmp_path),
+        ),
+    ):
+        df = detentions.get_detention_data()
+        detentions.get_detention_data()
+        archived = detentions.get_archived_detention_data()
+
+    assert len(archive.SnapshotArchive(tmp_path).snapshots) == 1
+    pd.testing.assert_frame_equal(archived, df)
+
+
+@pytest.mark.parametrize("error", [OSError("disk full"), ValueError("bad archive")])
+def test_get_detention_data_archive_failure(mock_detention_df, caplog, error):
+    body = json.dumps(
+        [
+            {**row, "date": row["date"].strftime("%m/%d/%Y")}
+            for row in mock_detention_df.to_dict("records")
+        ]
+    ).encode()
+
+    with (
+        patch("immigration_enforcement.http_cache.fetch", return_value=body),
+        patch(
+            "immigration_enforcement.detentions.get_detention_archive",
+            side_effect=error,
+        ),
+    ):
+        df = detentions.get_detention_data()
+
+    assert len(df) == len(mock_detention_df)
+    assert "Could not archive TRAC's detention data" in caplog.text
+
+
+def test_get_archived_detention_data_empty(tmp_path):
+    with patch(
+        "immigration_enforcement.detentions.get_detention_archive",
+        return_value=archive.SnapshotArchive(tmp_path),
+    ):
+        assert detentions.get_archived_detention_data() is None
+
+
+def test_charts_share_one_dataset(mock_detention_df):
+    with patch("immigration_enforcement.detentions.get_detention_data") as mock_get:
+        mock_get.return_value = mock_detention_df
+
+        dataset = detentions.DetentionDataset.load()
+        detentions.get_aa_count_chart(dataset=dataset)
+        detentions.get_aa_pct_chart(dataset=dataset)
+        for authority in ["All", "ICE", "CBP"]:
+            detentions.get_criminality_count_chart(authority, dataset=dataset)
+            detentions.get_criminality_pct_chart(authority, dataset=dataset)
+
+    assert mock_get.call_count == 1
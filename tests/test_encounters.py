@@ -2,9 +2,12 @@
 
 import pytest
 import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.shared_cache as shared_cache
 from datetime import datetime
 import pandas as pd
 from plotly.graph_objs import Figure
+from unittest.mock import patch
+import streamlit as st
 
 
 @pytest.mark.parametrize(
@@ -91,16 +94,59 @@ def test_get_sw_border_encounters_graph():
     assert len(fig.data) == 1  # Simple time series of encounters
 
 
-def test_assert_monthly_date_integrity_passes_on_valid_data():
-    dates = pd.date_range("2020-10-01", "2021-09-01", freq="MS")
-    df = pd.DataFrame({"date": dates, "encounters": 100})
-    encounters._assert_monthly_date_integrity(df)  # Should not raise
+def test_get_sw_border_encounters_graph_use_cache(monkeypatch):
+    st.cache_data.clear()
+    monkeypatch.setattr(shared_cache, "_backend", shared_cache.MemoryBackend())
 
+    with patch(
+        "immigration_enforcement.borderpatrol.encounters.get_sw_border_encounters",
+        wraps=encounters.get_sw_border_encounters,
+    ) as mock_get:
+        fig = encounters.get_sw_border_encounters_graph(use_cache=True)
+        encounters.get_sw_border_encounters_graph(use_cache=True)
 
-def test_assert_monthly_date_integrity_fails_on_missing_month():
-    dates = pd.date_range("2020-10-01", "2021-09-01", freq="MS").delete(
-        1
-    )  # Remove second month
-    df = pd.DataFrame({"date": dates, "encounters": 100})
-    with pytest.raises(AssertionError):
-        encounters._assert_monthly_date_integrity(df)
+    assert isinstance(fig, Figure)
+    assert mock_get.call_count == 1  # The merge happens once, not once per call
+
+
+def test_get_border_regions():
+    regions = encounters.get_border_regions()
+
+    assert regions[0] == "Southwest Land Border"
+    assert set(regions) == {
+        "Southwest Land Border",
+        "Northern Land Border",
+        "Coastal Border",
+    }
+
+
+@pytest.mark.parametrize("region", ["Northern Land Border", "Coastal Border"])
+def test_get_border_encounters(region):
+    df = encounters.get_border_encounters(region)
+
+    _test_encounters_df_structure(df)
+
+
+def test_get_border_encounters_graph():
+    fig = encounters.get_border_encounters_graph("Coastal Border")
+
+    assert isinstance(fig, Figure)
+    assert fig.layout.title.text == "Border Patrol Encounters at the Coastal Border"
+
+
+def test_get_sw_border_encounters_graph_viewport():
+    fig = encounters.get_sw_border_encounters_graph(
+        max_points=50, x_range=(datetime(2019, 1, 1), datetime(2024, 12, 31))
+    )
+
+    xs = pd.to_datetime(fig.data[0].x)
+    assert len(xs) <= 50
+    assert xs.min() >= pd.Timestamp("2019-01-01")
+    # The 2022-2023 highs survive downsampling
+    df = encounters.get_sw_border_encounters()
+    window = df[df["date"].between("2019-01-01", "2024-12-31")]
+    assert max(fig.data[0].y) == window["encounters"].max()
+    assert list(fig.layout.xaxis.range) == [
+        datetime(2019, 1, 1),
+        datetime(2024, 12, 31),
+    ]
@@ -0,0 +1,72 @@
+"""Tests for the fiscal_calendar module."""
+
+import pytest
+import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.borderpatrol.fiscal_calendar as fiscal_calendar
+import pandas as pd
+
+
+def test_month_number_spellings():
+    months = pd.Series(["October", "OCT", "Oct", "01 October", "12 September", "JAN"])
+
+    assert list(fiscal_calendar.month_number(months)) == [10, 10, 10, 10, 9, 1]
+
+
+def test_month_number_categorical():
+    months = pd.Series(["NOV", "DEC", "NOV"], dtype="category")
+
+    assert list(fiscal_calendar.month_number(months)) == [11, 12, 11]
+
+
+def test_month_number_unknown():
+    with pytest.raises(ValueError) as e:
+        fiscal_calendar.month_number(pd.Series(["October", "Octember"]))
+    assert "Octember" in str(e.value)
+
+
+def test_parse_fiscal_year():
+    labels = pd.Series(
+        ["2022", "2025 (FYTD)", "2022"], dtype="category", index=[5, 6, 7]
+    )
+    years = fiscal_calendar.parse_fiscal_year(labels)
+
+    assert list(years) == [2022, 2025, 2022]
+    assert list(years.index) == [5, 6, 7]
+
+    assert list(fiscal_calendar.parse_fiscal_year(pd.Series([2000, 2001]))) == [
+        2000,
+        2001,
+    ]
+
+
+def test_to_calendar_date():
+    fiscal_year = pd.Series([2025, 2025, 2025, 2000], index=[3, 4, 5, 6])
+    month = pd.Series([10, 12, 1, 9], index=[3, 4, 5, 6])
+
+    dates = fiscal_calendar.to_calendar_date(fiscal_year, month)
+
+    assert list(dates) == list(
+        pd.to_datetime(["2024-10-01", "2024-12-01", "2025-01-01", "2000-09-01"])
+    )
+    assert list(dates.index) == [3, 4, 5, 6]
+    assert pd.api.types.is_datetime64_ns_dtype(dates)
+
+
+def test_fiscal_to_calendar_date_matches_scalar_version():
+    fiscal_dates = pd.Series(pd.date_range("2023-01-15", "2025-12-15", freq="MS"))
+
+    expected = fiscal_dates.apply(encounters._convert_fiscal_date_to_calendar_date)
+
+    pd.testing.assert_series_equal(
+        fiscal_calendar.fiscal_to_calendar_date(fiscal_dates), expected
+    )
+
+
+def test_fiscal_year_quarter_and_month_index():
+    dates = pd.Series(
+        pd.to_datetime(["2024-10-01", "2024-12-31", "2025-01-01", "2025-09-30"])
+    )
+
+    assert list(fiscal_calendar.fiscal_year(dates)) == [2025, 2025, 2025, 2025]
+    assert list(fiscal_calendar.fiscal_quarter(dates)) == [1, 1, 2, 4]
+    assert list(fiscal_calendar.fytd_month_index(dates)) == [1, 3, 4, 12]
@@ -0,0 +1,134 @@
+"""Tests for the http_cache module, run against a local stand-in for the TRAC server."""
+
+import threading
+import pytest
+import requests
+import immigration_enforcement.http_cache as http_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+
+class _StandInServer(ThreadingHTTPServer):
+    body = b'[{"date": "09/21/2025", "ice_all": 46015}]'
+    etag = '"v1"'
+    last_modified = "Sun, 21 Sep 2025 00:00:00 GMT"
+    send_validators = True
+    requests_seen: list[dict[str, str]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _StandInServer
+
+    def do_GET(self):
+        self.server.requests_seen.append(dict(self.headers))
+
+        if self.path != "/pop_agen_table.json":
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        if self.server.send_validators and (
+            self.headers.get("If-None-Match") == self.server.etag
+        ):
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if self.server.send_validators:
+            self.send_header("ETag", self.server.etag)
+            self.send_header("Last-Modified", self.server.last_modified)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = _StandInServer(("127.0.0.1", 0), _Handler)
+    server.requests_seen = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server, path="/pop_agen_table.json"):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+def test_fetch_downloads_then_revalidates(server, tmp_path):
+    first = http_cache.fetch(_url(server), cache_dir=tmp_path)
+    second = http_cache.fetch(_url(server), cache_dir=tmp_path)
+
+    assert first == second == server.body
+    assert "If-None-Match" not in server.requests_seen[0]
+    assert server.requests_seen[1]["If-None-Match"] == server.etag
+    assert server.requests_seen[1]["If-Modified-Since"] == server.last_modified
+
+
+def test_fetch_returns_new_body_when_upstream_changes(server, tmp_path):
+    http_cache.fetch(_url(server), cache_dir=tmp_path)
+
+    server.body = b'[{"date": "10/05/2025", "ice_all": 47000}]'
+    server.etag = '"v2"'
+
+    assert http_cache.fetch(_url(server), cache_dir=tmp_path) == server.body
+    assert http_cache.fetch(_url(server), cache_dir=tmp_path) == server.body
+    assert server.requests_seen[2]["If-None-Match"] == '"v2"'
+
+
+def test_fetch_without_validators_always_downloads(server, tmp_path):
+    server.send_validators = False
+
+    http_cache.fetch(_url(server), cache_dir=tmp_path)
+    http_cache.fetch(_url(server), cache_dir=tmp_path)
+
+    assert all("If-None-Match" not in headers for headers in server.requests_seen)
+
+
+def test_fetch_raises_on_http_error(server, tmp_path):
+    with pytest.raises(requests.HTTPError):
+        http_cache.fetch(_url(server, "/missing.json"), cache_dir=tmp_path)
+
+
+def test_fetch_serves_cached_copy_when_upstream_is_down(server, tmp_path):
+    url = _url(server)
+    http_cache.fetch(url, cache_dir=tmp_path)
+
+    with patch(
+        "immigration_enforcement.http_cache.http_client.get",
+        side_effect=requests.ConnectionError("upstream is down"),
+    ):
+        assert http_cache.fetch(url, cache_dir=tmp_path) == server.body
+
+        # Without a cached copy, the error is raised
+        with pytest.raises(requests.ConnectionError):
+            http_cache.fetch(url, cache_dir=tmp_path / "empty")
+
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+def test_fetch_serves_cached_copy_on_server_error(server, tmp_path, caplog):
+    url = _url(server)
+    http_cache.fetch(url, cache_dir=tmp_path)
+
+    with patch(
+        "immigration_enforcement.http_cache.http_client.get",
+        return_value=_response(503),
+    ):
+        assert http_cache.fetch(url, cache_dir=tmp_path) == server.body
+        assert "(HTTP 503), serving the cached copy" in caplog.text
+
+        # Without a cached copy, the error is raised
+        with pytest.raises(requests.HTTPError):
+            http_cache.fetch(url, cache_dir=tmp_path / "empty")
@@ -0,0 +1,154 @@
+"""Tests for the http_client module."""
+
+import threading
+import pytest
+import requests
+import immigration_enforcement.http_client as http_client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+
+class _FlakyServer(ThreadingHTTPServer):
+    failures_before_success = 0
+    hits = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _FlakyServer
+
+    def do_GET(self):
+        self.server.hits += 1
+        if self.server.hits <= self.server.failures_before_success:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = _FlakyServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_retries_transient_errors(server):
+    server.failures_before_success = 2
+    session = http_client.make_session(backoff_factor=0, backoff_jitter=0)
+
+    response = http_client.get(_url(server), session=session)
+
+    assert response.status_code == 200
+    assert server.hits == 3
+
+
+def test_get_gives_up_after_bounded_retries(server):
+    server.failures_before_success = 100
+    session = http_client.make_session(
+        total_retries=2, backoff_factor=0, backoff_jitter=0
+    )
+
+    response = http_client.get(_url(server), session=session)
+
+    assert response.status_code == 503
+    assert server.hits == 3  # The first attempt plus two retries
+
+
+def test_get_uses_timeouts():
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+
+    http_client.get("https://example.test/data.json", session=session)
+
+    assert session.get.call_args.kwargs["timeout"] == http_client.DEFAULT_TIMEOUT
+
+
+def test_get_shares_one_session():
+    assert http_client.get_session() is http_client.get_session()
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    clock = _Clock()
+    breaker = http_client.CircuitBreaker(
+        failure_threshold=2, reset_timeout=30, clock=clock
+    )
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    with pytest.raises(http_client.CircuitOpenError):
+        breaker.before_call("example.test")
+
+
+def test_circuit_breaker_half_open_trial():
+    clock = _Clock()
+    breaker = http_client.CircuitBreaker(
+        failure_threshold=1, reset_timeout=30, clock=clock
+    )
+    breaker.record_failure()
+
+    clock.now = 31
+    assert breaker.state == "half-open"
+    breaker.before_call("example.test")  # The trial request is allowed
+
+    # Other requests fail fast while the trial is in flight
+    with pytest.raises(http_client.CircuitOpenError):
+        breaker.before_call("example.test")
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_get_fails_fast_when_circuit_is_open():
+    session = MagicMock()
+    session.get.side_effect = requests.ConnectionError("upstream is down")
+    url = "https://down.example.test/data.json"
+    breaker = http_client.get_circuit_breaker("down.example.test")
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.ConnectionError):
+            http_client.get(url, session=session)
+
+    session.get.reset_mock()
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(url, session=session)
+    session.get.assert_not_called()
+
+
+def test_get_counts_rate_limiting_as_failure():
+    session = MagicMock()
+    session.get.return_value.status_code = 429
+    url = "https://throttled.example.test/data.json"
+    breaker = http_client.get_circuit_breaker("throttled.example.test")
+
+    for _ in range(breaker.failure_threshold):
+        assert http_client.get(url, session=session).status_code == 429
+
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(url, session=session)
@@ -0,0 +1,28 @@
+"""Tests that importing the package does not import its heavy, optional-at-import-time dependencies."""
+
+import subprocess
+import sys
+import pytest
+
+HEAVY_MODULES = ["streamlit", "plotly", "requests"]
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "immigration_enforcement.borderpatrol.encounters",
+        "immigration_enforcement.borderpatrol.store",
+        "immigration_enforcement.detentions",
+        "immigration_enforcement.backend",
+        "immigration_enforcement.api",
+    ],
+)
+def test_import_does_not_load_heavy_modules(module):
+    script = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
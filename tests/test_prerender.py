@@ -0,0 +1,139 @@
+"""Tests for the prerender module."""
+
+import json
+import pytest
+import immigration_enforcement.backend as be
+import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.detentions as detentions
+import immigration_enforcement.prerender as prerender
+from pathlib import Path
+from plotly.graph_objs import Figure
+from unittest.mock import patch
+
+FIXTURE = Path(__file__).parents[1] / "benchmarks" / "fixtures" / "pop_agen_table.json"
+
+
+@pytest.fixture(scope="module")
+def mock_dataset():
+    with patch(
+        "immigration_enforcement.http_cache.fetch", return_value=FIXTURE.read_bytes()
+    ):
+        return detentions.DetentionDataset(detentions.get_detention_data())
+
+
+@pytest.fixture(scope="module")
+def out_dir(tmp_path_factory, mock_dataset):
+    out_dir = tmp_path_factory.mktemp("prerendered")
+    with patch.object(detentions.DetentionDataset, "load", return_value=mock_dataset):
+        prerender.prerender(out_dir, formats=["json"], workers=2)
+    return out_dir
+
+
+def test_get_graph_specs():
+    specs = be.get_graph_specs()
+
+    assert len(specs) == 2 + 2 * 3 + len(be.get_border_regions())
+    assert len(set(specs)) == len(specs)
+    # Every spec is already normalized
+    assert all(be.normalize_graph_spec(*spec) == spec for spec in specs)
+
+
+def test_get_slug():
+    assert (
+        prerender.get_slug(("Criminality", "Percent", "ICE", None))
+        == "criminality-percent-ice"
+    )
+    assert (
+        prerender.get_slug(("Border Patrol", None, None, "Southwest Land Border"))
+        == "border-patrol-southwest-land-border"
+    )
+
+
+def test_prerender_writes_manifest_and_figures(out_dir, mock_dataset):
+    manifest = json.loads((out_dir / prerender.MANIFEST).read_text())
+
+    assert len(manifest["figures"]) == len(be.get_graph_specs())
+    assert manifest["data_versions"]["detentions"] == mock_dataset.version
+    for entry in manifest["figures"]:
+        assert (out_dir / entry["files"]["json"]).exists()
+    assert (
+        "Border Patrol Encounters at the Northern Land Border"
+        in (out_dir / "index.html").read_text()
+    )
+
+
+def test_prerender_rejects_unknown_formats(tmp_path):
+    with pytest.raises(ValueError):
+        prerender.prerender(tmp_path, formats=["gif"])
+
+
+def test_prerendered_figures_match_get_graph(out_dir, mock_dataset):
+    figures = prerender.PrerenderedFigures(out_dir)
+    spec = ("Criminality", "Percent", "ICE", None)
+
+    with patch.object(detentions.DetentionDataset, "load", return_value=mock_dataset):
+        expected = be.get_graph(*spec)
+
+    assert figures.get(spec).to_json() == Figure(expected).to_json()
+    assert figures.get(spec) is figures.get(spec)
+    assert figures.get(("Criminality", "Percent", "FBI", None)) is None
+
+
+def test_get_graph_serves_prerendered_figures(out_dir, monkeypatch):
+    monkeypatch.setenv(be.PRERENDERED_DIR_ENV_VAR, str(out_dir))
+    be.clear_figure_cache()
+
+    # No data is loaded
+    with patch.object(detentions.DetentionDataset, "load") as mock_load:
+        fig = be.get_graph("Arresting Authority", "Count", "ICE")
+
+    mock_load.assert_not_called()
+    assert fig.layout.title.text == "ICE Detainees by Date* and Arresting Authority"
+
+
+def test_get_graph_without_manifest(tmp_path, monkeypatch, mock_dataset, caplog):
+    monkeypatch.setenv(be.PRERENDERED_DIR_ENV_VAR, str(tmp_path))
+    be.clear_figure_cache()
+
+    # The graph is built from the data instead
+    with patch.object(detentions.DetentionDataset, "load", return_value=mock_dataset):
+        fig = be.get_graph("Arresting Authority", "Count", "ICE")
+        be.get_graph("Criminality", "Count", "ICE")
+
+    assert fig.layout.title.text == "ICE Detainees by Date* and Arresting Authority"
+    assert caplog.text.count(f"{prerender.MANIFEST} does not exist") == 1
+
+
+def test_get_graph_logs_stale_prerendered_figures(
+    out_dir, tmp_path, monkeypatch, caplog
+):
+    manifest = json.loads((out_dir / prerender.MANIFEST).read_text())
+    versions = manifest["data_versions"]
+    (tmp_path / "figures").symlink_to(out_dir / "figures")
+    monkeypatch.setenv(be.PRERENDERED_DIR_ENV_VAR, str(tmp_path))
+
+    # Current data: nothing is logged
+    (tmp_path / prerender.MANIFEST).write_text(json.dumps(manifest))
+    with patch.object(be, "_get_current_data_versions", return_value=versions):
+        assert be.get_graph("Arresting Authority", "Count", "ICE") is not None
+    assert "older data" not in caplog.text
+
+    # Older Border Patrol data. The figures are still served.
+    manifest["data_versions"] = {**versions, "border_patrol": "old"}
+    (tmp_path / prerender.MANIFEST).write_text(json.dumps(manifest))
+    be._load_prerendered_figures.cache_clear()
+    with patch.object(be, "_get_current_data_versions", return_value=versions):
+        assert be.get_graph("Arresting Authority", "Count", "ICE") is not None
+    assert "drawn from older data (border_patrol old)" in caplog.text
+    assert f"border_patrol {versions['border_patrol']}" in caplog.text
+    assert "detentions" not in caplog.text
+
+
+def test_get_current_data_versions(mock_dataset):
+    with patch.object(
+        detentions, "get_archived_detention_data", return_value=mock_dataset.df
+    ):
+        versions = be._get_current_data_versions()
+
+    assert versions["detentions"] == mock_dataset.version
+    assert versions["border_patrol"] == encounters.get_data_version()
@@ -0,0 +1,156 @@
+"""Tests for the refresh module."""
+
+import threading
+import time
+import pytest
+from immigration_enforcement.refresh import RefreshingValue
+
+
+class Loader:
+    """Returns 1, 2, 3... and can be made to fail or block."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+        self.loaded = threading.Event()
+
+    def __call__(self):
+        self.release.wait(timeout=5)
+        if self.fail:
+            raise ConnectionError("TRAC is down")
+        self.calls += 1
+        self.loaded.set()
+        return self.calls
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def test_first_get_loads():
+    loader = Loader()
+    value = RefreshingValue(loader, ttl=600)
+
+    assert not value.is_loaded()
+    assert value.get() == 1
+    assert value.get() == 1
+    assert loader.calls == 1
+    value.clear()
+
+
+def test_refreshes_before_ttl():
+    loader = Loader()
+    value = RefreshingValue(loader, ttl=0.2, refresh_ahead=0.1)
+
+    assert value.get() == 1
+    wait_for(lambda: value.get() == 2)
+    # Refreshed about refresh_ahead before the TTL
+    assert loader.calls == 2
+    value.clear()
+
+
+def test_serves_current_value_while_refreshing():
+    loader = Loader()
+    value = RefreshingValue(loader, ttl=0.2, refresh_ahead=0.1)
+    assert value.get() == 1
+
+    loader.release.clear()  # The next load blocks
+    loader.loaded.clear()
+    time.sleep(0.2)
+
+    # The value has expired, but get() does not wait for the refresh
+    start = time.monotonic()
+    assert value.get() == 1
+    assert time.monotonic() - start < 0.05
+
+    loader.release.set()
+    assert loader.loaded.wait(timeout=5)
+    wait_for(lambda: value.get() == 2)
+    value.clear()
+
+
+def test_keeps_value_when_refresh_fails(caplog):
+    loader = Loader()
+    value = RefreshingValue(loader, ttl=0.2, refresh_ahead=0.1, retry_interval=0.05)
+    assert value.get() == 1
+
+    loader.fail = True
+    wait_for(lambda: "Refreshing value failed" in caplog.text)
+    assert value.get() == 1
+
+    # Retried until it succeeds
+    loader.fail = False
+    wait_for(lambda: value.get() == 2)
+    value.clear()
+
+
+def test_first_load_error_is_raised():
+    loader = Loader()
+    loader.fail = True
+    value = RefreshingValue(loader, ttl=600)
+
+    with pytest.raises(ConnectionError):
+        value.get()
+    assert not value.is_loaded()
+
+
+def test_concurrent_first_gets_load_once():
+    loader = Loader()
+    loader.release.clear()
+    value = RefreshingValue(loader, ttl=600)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(value.get())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    loader.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1] * 8
+    assert loader.calls == 1
+    value.clear()
+
+
+def test_clear_cancels_refresh():
+    loader = Loader()
+    value = RefreshingValue(loader, ttl=0.1, refresh_ahead=0.05)
+    value.get()
+    value.clear()
+
+    time.sleep(0.2)
+    assert loader.calls == 1
+    assert value.get() == 2
+    value.clear()
+
+
+def test_load_stale_is_served_first():
+    loader = Loader()
+    loader.release.clear()  # The fresh load blocks
+    value = RefreshingValue(loader, ttl=600, load_stale=lambda: 0)
+
+    # The stale value is served without waiting, and refreshed right away
+    assert value.get() == 0
+    loader.release.set()
+    wait_for(lambda: value.get() == 1)
+    value.clear()
+
+
+def test_load_stale_none_loads():
+    loader = Loader()
+    value = RefreshingValue(loader, ttl=600, load_stale=lambda: None)
+
+    assert value.get() == 1
+    value.clear()
+
+
+def test_refresh_ahead_must_be_less_than_ttl():
+    with pytest.raises(ValueError):
+        RefreshingValue(Loader(), ttl=60, refresh_ahead=60)
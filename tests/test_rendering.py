@@ -0,0 +1,100 @@
+"""Tests for the rendering module."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import immigration_enforcement.rendering as rendering
+
+
+def _daily_series(n=10_000, peak_at=6_000):
+    rng = np.random.default_rng(0)
+    values = rng.normal(100, 5, n)
+    values[peak_at] = 1_000  # A one-day spike that must survive downsampling
+    return pd.DataFrame(
+        {"date": pd.date_range("2000-01-01", periods=n, freq="D"), "count": values}
+    )
+
+
+def test_get_render_mode():
+    assert rendering.get_render_mode(300) == "svg"
+    assert rendering.get_render_mode(rendering.WEBGL_THRESHOLD + 1) == "webgl"
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    df = _daily_series()
+    x = df["date"].to_numpy().astype(np.int64).astype(float)
+    y = df["count"].to_numpy()
+
+    indices = rendering.lttb(x, y, 200)
+
+    assert len(indices) <= 200
+    assert np.all(np.diff(indices) > 0)
+    assert {0, len(df) - 1, int(y.argmax()), int(y.argmin())} <= set(indices)
+
+
+def test_lttb_with_gaps():
+    df = _daily_series()
+    x = df["date"].to_numpy().astype(np.int64).astype(float)
+    y = df["count"].to_numpy().copy()
+    y[1_000:1_500] = np.nan  # A gap in the data
+    y[3_000] = np.nan
+    y[-1] = np.nan
+
+    indices = rendering.lttb(x, y, 200)
+
+    # Every gap is kept once, so the line is still broken there, and every other pick has a value
+    assert [int(i) for i in indices if np.isnan(y[i])] == [1_000, 3_000, len(y) - 1]
+    assert len(indices) <= 200 + 3
+    assert np.all(np.diff(indices) > 0)
+    assert {0, len(y) - 2, 6_000, int(np.nanargmin(y))} <= set(indices)
+
+    # Nothing to pick from
+    assert list(rendering.lttb(x, np.full(len(y), np.nan), 200)) == [0]
+
+
+def test_lttb_short_series_is_unchanged():
+    x = np.arange(10.0)
+    assert list(rendering.lttb(x, x, 100)) == list(range(10))
+
+    with pytest.raises(ValueError):
+        rendering.lttb(np.arange(10.0), np.arange(10.0), 3)
+
+
+def test_downsample_per_line():
+    df = _daily_series()
+    long = pd.concat(
+        [df.assign(authority="ICE"), df.assign(authority="CBP", count=df["count"] / 2)]
+    )
+
+    result = rendering.downsample(long, "date", "count", "authority", max_points=500)
+
+    # The extremes may already have been picked, which leaves a point or two spare
+    assert result.groupby("authority").size().between(490, 500).all()
+    assert result["count"].max() == 1_000
+    # Rows stay in their original order, so line colors are assigned as before
+    assert list(result["authority"].unique()) == ["ICE", "CBP"]
+
+
+def test_downsample_viewport():
+    df = _daily_series()
+    start, end = pd.Timestamp("2010-01-01"), pd.Timestamp("2010-12-31")
+
+    result = rendering.downsample(df, "date", "count", x_range=(start, end))
+    assert len(result) == 365
+    assert result["date"].min() == start and result["date"].max() == end
+
+    # Open-ended ranges, and datetime.date objects like TRAC's dates
+    df["date"] = df["date"].dt.date
+    result = rendering.downsample(df, "date", "count", x_range=(None, start.date()))
+    assert result["date"].max() == start.date()
+
+
+def test_prepare_switches_to_webgl():
+    df = _daily_series()
+
+    _, render_mode = rendering.prepare(df, "date", "count")
+    assert render_mode == "webgl"
+
+    downsampled, render_mode = rendering.prepare(df, "date", "count", max_points=500)
+    assert 490 <= len(downsampled) <= 500
+    assert render_mode == "svg"
@@ -0,0 +1,97 @@
+"""Tests for the sbo module."""
+
+import pytest
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.sbo as sbo
+import immigration_enforcement.validation as validation
+import pandas as pd
+
+
+def test_get_dimensions():
+    assert sbo.get_dimensions(artifacts.SBO_CSV) == [
+        "Fiscal Year",
+        "Month (abbv)",
+        "Component",
+        "Demographic",
+        "Citizenship Grouping",
+        "Title of Authority",
+        "Encounter Type",
+    ]
+
+
+def test_aggregate_encounters_matches_full_read():
+    raw = pd.read_csv(artifacts.SBO_CSV)
+    by = ["Fiscal Year", "Component"]
+
+    expected = raw.groupby(by)["Encounter Count"].sum()
+    # A small chunk size forces many chunks to be combined
+    actual = sbo.aggregate_encounters(artifacts.SBO_CSV, by=by, chunksize=100)
+
+    assert list(actual.columns) == [*by, "Encounter Count"]
+    assert isinstance(actual["Component"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_series_equal(
+        actual.astype({c: str for c in by})
+        .set_index(by)["Encounter Count"]
+        .sort_index(),
+        expected.sort_index(),
+    )
+
+
+def test_aggregate_encounters_filters_while_streaming():
+    raw = pd.read_csv(artifacts.SBO_CSV)
+    mask = (raw["Fiscal Year"] == "2025 (FYTD)") & (
+        raw["Component"] == "U.S. Border Patrol"
+    )
+
+    actual = sbo.aggregate_encounters(
+        artifacts.SBO_CSV,
+        by=["Month (abbv)"],
+        filters={"Fiscal Year": ["2025 (FYTD)"], "Component": ["U.S. Border Patrol"]},
+        chunksize=250,
+    )
+
+    assert list(actual.columns) == ["Month (abbv)", "Encounter Count"]
+    assert actual["Encounter Count"].sum() == raw.loc[mask, "Encounter Count"].sum()
+    assert len(actual) == raw.loc[mask, "Month (abbv)"].nunique()
+
+
+def test_aggregate_encounters_no_matching_rows():
+    actual = sbo.aggregate_encounters(
+        artifacts.SBO_CSV, by=["Demographic"], filters={"Component": ["Coast Guard"]}
+    )
+
+    assert actual.empty
+    assert list(actual.columns) == ["Demographic", "Encounter Count"]
+
+
+def test_aggregate_encounters_defaults_to_all_dimensions(tmp_path):
+    path = tmp_path / "encounters.csv"
+    path.write_text(
+        "Fiscal Year,Month Grouping,Component,Encounter Count\n"
+        "2024,FYTD,U.S. Border Patrol,1\n"
+        "2024,FYTD,U.S. Border Patrol,2\n"
+        "2024,FYTD,Office of Field Operations,4\n"
+    )
+
+    actual = sbo.aggregate_encounters(path, chunksize=1)
+
+    assert list(actual.columns) == ["Fiscal Year", "Component", "Encounter Count"]
+    assert list(actual["Encounter Count"]) == [3, 4]
+
+
+def test_get_fytd_label():
+    fiscal_years = pd.Series(["2023", "2024", "2025 (FYTD)", "2025 (FYTD)"])
+    assert sbo.get_fytd_label(fiscal_years) == "2025 (FYTD)"
+
+    with pytest.raises(ValueError):
+        sbo.get_fytd_label(pd.Series(["2023", "2024"]))
+
+
+def test_aggregate_encounters_renamed_column(tmp_path):
+    path = tmp_path / "renamed.csv"
+    df = pd.read_csv(artifacts.SBO_CSV, nrows=10)
+    df.rename(columns={"Month (abbv)": "Month"}).to_csv(path, index=False)
+
+    with pytest.raises(validation.ValidationError) as e:
+        sbo.aggregate_encounters(path, by=["Fiscal Year", "Month (abbv)"])
+    assert "'Month (abbv)' is missing" in e.value.problems[0]
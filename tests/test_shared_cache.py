@@ -0,0 +1,108 @@
+"""Tests for the shared_cache module."""
+
+import multiprocessing
+import os
+import threading
+import time
+import pandas as pd
+import pytest
+import immigration_enforcement.shared_cache as shared_cache
+from pathlib import Path
+
+
+@pytest.fixture(params=["file", "memory"])
+def backend(request, tmp_path, monkeypatch):
+    backend = (
+        shared_cache.FileBackend(tmp_path)
+        if request.param == "file"
+        else shared_cache.MemoryBackend()
+    )
+    monkeypatch.setattr(shared_cache, "_backend", backend)
+    return backend
+
+
+def test_get_or_compute_stores_value(backend):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"value"
+
+    assert shared_cache.get_or_compute("key", compute) == b"value"
+    assert shared_cache.get_or_compute("key", compute) == b"value"
+    assert len(calls) == 1
+
+
+def test_get_or_compute_recomputes_after_ttl(backend):
+    shared_cache.get_or_compute("key", lambda: b"old")
+    assert shared_cache.get_or_compute("key", lambda: b"new", ttl=60) == b"old"
+
+    time.sleep(0.05)
+    assert shared_cache.get_or_compute("key", lambda: b"new", ttl=0.01) == b"new"
+
+
+def test_get_or_compute_single_flight_threads(backend):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return b"value"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(shared_cache.get_or_compute("key", compute))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b"value"] * 8
+    assert len(calls) == 1
+
+
+def _compute_in_worker(directory: str, log: str) -> bytes:
+    def compute():
+        with open(log, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.2)
+        return b"value"
+
+    shared_cache.set_backend(shared_cache.FileBackend(Path(directory)))
+    return shared_cache.get_or_compute("key", compute)
+
+
+def test_get_or_compute_single_flight_processes(tmp_path):
+    log = tmp_path / "computed.log"
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(4) as pool:
+        results = pool.starmap(_compute_in_worker, [(str(tmp_path), str(log))] * 4)
+
+    assert results == [b"value"] * 4
+    assert len(log.read_text().splitlines()) == 1
+
+
+def test_get_or_compute_error_is_not_stored(backend):
+    def fail():
+        raise ConnectionError("upstream is down")
+
+    with pytest.raises(ConnectionError):
+        shared_cache.get_or_compute("key", fail)
+    assert shared_cache.get_or_compute("key", lambda: b"value") == b"value"
+
+
+def test_get_or_compute_frame(backend):
+    df = pd.DataFrame(
+        {"date": pd.date_range("2025-01-01", periods=3, freq="MS"), "n": [1, 2, 3]}
+    )
+
+    pd.testing.assert_frame_equal(
+        shared_cache.get_or_compute_frame("df", lambda: df), df
+    )
+    pd.testing.assert_frame_equal(
+        shared_cache.get_or_compute_frame("df", lambda: df.iloc[:0]), df
+    )
@@ -0,0 +1,128 @@
+"""Tests for the store module."""
+
+import pytest
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.encounters as encounters
+import immigration_enforcement.borderpatrol.store as store
+import immigration_enforcement.validation as validation
+import pandas as pd
+from immigration_enforcement.cache_dir import CACHE_DIR_ENV_VAR
+
+
+def _monthly(start: str, periods: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.date_range(start, periods=periods, freq="MS"),
+            "encounters": range(periods),
+        }
+    )
+
+
+def test_empty_store(tmp_path):
+    s = store.EncountersStore(tmp_path)
+    assert s.releases == []
+    assert s.last_date() is None
+    assert s.load().empty
+
+
+def test_append_only_adds_new_months(tmp_path):
+    s = store.EncountersStore(tmp_path)
+    assert s.append(_monthly("2024-01-01", 6), "first.csv", "a") == 6
+
+    # The second release overlaps the first by 4 months
+    assert s.append(_monthly("2024-03-01", 6), "second.csv", "b") == 2
+
+    df = s.load()
+    assert list(df["date"]) == list(
+        pd.date_range("2024-01-01", "2024-08-01", freq="MS")
+    )
+    assert s.last_date() == pd.Timestamp("2024-08-01")
+    assert [r["rows"] for r in s.releases] == [6, 2]
+
+
+def test_append_rejects_gap_after_stored_months(tmp_path):
+    s = store.EncountersStore(tmp_path)
+    s.append(_monthly("2024-01-01", 6), "first.csv", "a")
+
+    with pytest.raises(validation.ValidationError):
+        s.append(_monthly("2024-09-01", 3), "second.csv", "b")
+
+    # Nothing was added
+    assert len(s.releases) == 1
+    assert len(s.load()) == 6
+
+
+def test_append_only_validates_new_months(tmp_path, monkeypatch):
+    s = store.EncountersStore(tmp_path)
+    s.append(_monthly("2024-01-01", 6), "first.csv", "a")
+
+    validated = []
+    monkeypatch.setattr(
+        validation,
+        "check_monthly_dates",
+        lambda dates, source: validated.append(list(dates)),
+    )
+    s.append(_monthly("2024-01-01", 8), "second.csv", "b")
+
+    # The last stored month, then the new ones
+    assert validated == [
+        [
+            pd.Timestamp("2024-06-01"),
+            pd.Timestamp("2024-07-01"),
+            pd.Timestamp("2024-08-01"),
+        ]
+    ]
+
+
+def test_ingest_sbo_csv(tmp_path):
+    s = store.EncountersStore(tmp_path)
+    added = s.ingest_sbo_csv(artifacts.SBO_CSV)
+
+    df = s.load()
+    assert added == len(df) > 0
+    assert (df["encounters"] > 0).all()
+
+    # The same file is only ingested once
+    assert s.ingest_sbo_csv(artifacts.SBO_CSV) == 0
+    assert len(s.releases) == 1
+
+
+def test_get_sw_border_store(tmp_path):
+    s = store.get_sw_border_store(tmp_path)
+    pd.testing.assert_frame_equal(s.load(), encounters.get_sw_border_encounters())
+
+    # The months of the bundled CSV file are already in the store
+    assert s.ingest_sbo_csv(artifacts.SBO_CSV) == 0
+
+
+def test_append_logs_revised_months(tmp_path, caplog):
+    s = store.EncountersStore(tmp_path)
+    s.append(_monthly("2024-01-01", 6), "first.csv", "a")
+
+    revised = _monthly("2024-01-01", 7)
+    revised.loc[revised["date"] == "2024-03-01", "encounters"] = 1_000
+    assert s.append(revised, "second.csv", "b") == 1
+
+    # The stored value is kept, and the revision is reported
+    assert s.load().set_index("date").loc["2024-03-01", "encounters"] == 2
+    assert s.releases[-1]["revised"] == ["2024-03"]
+    assert "second.csv revises 1 months" in caplog.text
+    assert "2024-03" in caplog.text
+
+
+def test_ingested_months_reach_sw_border_encounters(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path))
+    bundled = encounters.get_sw_border_encounters()
+    version = encounters.get_data_version()
+
+    s = store.get_sw_border_store()
+    next_month = bundled["date"].max() + pd.DateOffset(months=1)
+    s.append(_monthly(str(next_month.date()), 2), "new.csv", "c")
+
+    df = encounters.get_sw_border_encounters()
+    assert len(df) == len(bundled) + 2
+    assert df["date"].iloc[-1] == next_month + pd.DateOffset(months=1)
+    pd.testing.assert_frame_equal(df.iloc[: len(bundled)], bundled)
+
+    # Caches keyed by the data version are invalidated
+    assert encounters.get_data_version() != version
@@ -0,0 +1,80 @@
+"""Tests for the tracing module."""
+
+import logging
+import pytest
+import immigration_enforcement.tracing as tracing
+
+
+@pytest.fixture(autouse=True)
+def _reset_tracing():
+    yield
+    tracing.disable()
+    tracing.stop_collection()
+
+
+@tracing.traced("double")
+def double(x):
+    return 2 * x
+
+
+def test_disabled_by_default():
+    assert not tracing.is_active()
+
+    with tracing.span("stage") as s:
+        s.cache = "hit"  # Ignored
+    assert s.cache is None
+    assert double(2) == 4
+
+
+def test_collection_records_nested_spans():
+    spans = tracing.start_collection()
+
+    with tracing.span("outer", dataset="Criminality") as outer:
+        outer.cache = "miss"
+        assert double(3) == 6
+    tracing.stop_collection()
+    double(4)  # Not recorded
+
+    assert [s.name for s in spans] == ["double", "outer"]  # In the order they finished
+    inner, outer = spans
+    assert (inner.depth, outer.depth) == (1, 0)
+    assert outer.cache == "miss"
+    assert outer.attributes == {"dataset": "Criminality"}
+    assert outer.duration >= inner.duration > 0
+
+    rows = tracing.to_rows(spans)
+    assert [row["stage"] for row in rows] == ["outer", "    double"]
+    assert rows[0]["dataset"] == "Criminality"
+
+
+def test_set_cache_marks_innermost_span():
+    spans = tracing.start_collection()
+
+    with tracing.span("cached") as s:
+        s.cache = "hit"
+        tracing.set_cache("miss")
+
+    assert spans[0].cache == "miss"
+
+
+def test_span_recorded_when_block_raises():
+    spans = tracing.start_collection()
+
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError
+
+    assert [s.name for s in spans] == ["failing"]
+
+
+def test_enabled_spans_are_logged(caplog):
+    tracing.enable()
+
+    with caplog.at_level(logging.INFO, logger=tracing.logger.name):
+        with tracing.span("stage", region="Coastal Border") as s:
+            s.cache = "hit"
+
+    [record] = caplog.records
+    assert record.getMessage().startswith("span=stage duration_ms=")
+    assert "cache=hit region=Coastal Border" in record.getMessage()
+    assert record.span["name"] == "stage"
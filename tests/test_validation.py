@@ -0,0 +1,105 @@
+"""Tests for the validation module."""
+
+import pytest
+import immigration_enforcement.validation as validation
+import pandas as pd
+
+
+def _months(start: str, end: str) -> pd.Series:
+    return pd.Series(pd.date_range(start, end, freq="MS"))
+
+
+def test_monthly_dates_valid():
+    validation.check_monthly_dates(_months("2020-10-01", "2021-09-01"), "test")
+
+
+def test_monthly_dates_empty():
+    assert (
+        validation.find_monthly_date_problems(pd.Series([], dtype="datetime64[ns]"))
+        == []
+    )
+
+
+def test_monthly_dates_reports_every_problem():
+    dates = _months("2020-01-01", "2020-12-01")
+    dates = dates.drop([2, 3, 4, 8])  # March - May and September are missing
+    dates = pd.concat([dates, _months("2020-06-01", "2020-07-01")])  # Duplicated
+
+    assert validation.find_monthly_date_problems(dates) == [
+        "Missing 2020-03 to 2020-05",
+        "Missing 2020-09",
+        "Duplicate 2020-06 to 2020-07",
+    ]
+
+
+def test_monthly_dates_not_first_of_month():
+    dates = pd.Series(pd.to_datetime(["2020-01-01", "2020-02-15", None]))
+
+    problems = validation.find_monthly_date_problems(dates)
+    assert problems == [
+        "1 dates are missing",
+        "1 dates are not the first of a month, ex. 2020-02-15",
+    ]
+
+
+def test_monthly_dates_unsorted_and_python_dates():
+    dates = pd.Series([d.date() for d in _months("2020-01-01", "2020-06-01")[::-1]])
+    assert validation.find_monthly_date_problems(dates) == []
+
+
+def test_check_monthly_dates_raises():
+    dates = _months("2020-10-01", "2021-09-01").drop(1)
+
+    with pytest.raises(validation.ValidationError) as e:
+        validation.check_monthly_dates(dates, "Test data")
+
+    assert e.value.problems == ["Missing 2020-11"]
+    assert "Test data" in str(e.value)
+
+
+def test_column_problems_detects_renames():
+    problems = validation.find_column_problems(
+        ["Fiscal Year", "Month (abbrev)", "Component", "Encounter Count"],
+        ["Fiscal\nYear", "Month (abbv)", "Component", "Encounter Count", "Region"],
+    )
+    assert problems == [
+        "Column 'Fiscal\\nYear' is missing. Was it renamed to 'Fiscal Year'?",
+        "Column 'Month (abbv)' is missing. Was it renamed to 'Month (abbrev)'?",
+        "Column 'Region' is missing",
+    ]
+
+
+def test_check_columns():
+    validation.check_columns(["date", "ice_all", "extra"], ["date", "ice_all"], "test")
+
+    with pytest.raises(validation.ValidationError):
+        validation.check_columns(["date", "ice_total"], ["date", "ice_all"], "test")
+
+
+def test_check_unique_dates():
+    validation.check_unique_dates(pd.Series(["09/21/2025", "09/07/2025"]), "test")
+
+    with pytest.raises(validation.ValidationError) as e:
+        validation.check_unique_dates(
+            pd.Series(["09/21/2025", "09/07/2025", "09/21/2025"]), "test"
+        )
+    assert e.value.problems == ["Duplicate dates: 09/21/2025"]
+
+
+def test_integer_problems():
+    df = pd.DataFrame(
+        {
+            "ok": [1, 2],
+            "missing": [1, None],
+            "fraction": [1, 1.5],
+            "large": [1, 2**31],
+        }
+    )
+
+    problems = validation.find_integer_problems(df, list(df.columns), "int32")
+
+    assert len(problems) == 3
+    assert "missing" in problems[0]
+    assert "non-integer" in problems[1]
+    assert "outside the int32 range" in problems[2]
+    assert validation.find_integer_problems(df, ["ok"], "int16") == []
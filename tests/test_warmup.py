@@ -0,0 +1,106 @@
+"""Tests for the warmup module."""
+
+import threading
+import time
+import immigration_enforcement.backend as be
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.detentions as detentions
+import immigration_enforcement.warmup as warmup
+from pathlib import Path
+from unittest.mock import patch
+from immigration_enforcement.cache_dir import CACHE_DIR_ENV_VAR
+
+FIXTURE = Path(__file__).parents[1] / "benchmarks" / "fixtures" / "pop_agen_table.json"
+
+
+def test_warm_up_fills_caches(tmp_path, monkeypatch):
+    # An empty cache directory, so the artifacts have to be built
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path))
+    assert not any(artifacts.artifact_exists(*args) for args in warmup.ARTIFACTS)
+
+    with patch(
+        "immigration_enforcement.http_cache.fetch", return_value=FIXTURE.read_bytes()
+    ):
+        dataset = detentions.DetentionDataset(detentions.get_detention_data())
+    be.clear_figure_cache()
+
+    # When each stage started and finished
+    times: dict[str, list[float]] = {}
+
+    def load_detentions(*args, **kwargs):
+        # Stands in for the download from TRAC
+        if "download" not in times:
+            times["download"] = [time.perf_counter()]
+            time.sleep(0.5)
+            times["download"].append(time.perf_counter())
+        return dataset
+
+    build_artifacts = warmup._build_artifacts
+
+    def timed_build_artifacts(workers):
+        # Nothing may have read the Border Patrol data on this process before the artifacts are built
+        times["missing_artifacts"] = [
+            not artifacts.artifact_exists(*args) for args in warmup.ARTIFACTS
+        ]
+        times["artifacts"] = [time.perf_counter()]
+        build_artifacts(workers)
+        times["artifacts"].append(time.perf_counter())
+
+    with (
+        patch.object(detentions.DetentionDataset, "load", side_effect=load_detentions),
+        patch.object(warmup, "_build_artifacts", side_effect=timed_build_artifacts),
+    ):
+        warmup.warm_up()
+
+    assert all(artifacts.artifact_exists(*args) for args in warmup.ARTIFACTS)
+    assert be.get_figure_cache_info().currsize == len(be.get_graph_specs())
+
+    # The download and the artifact builds run at the same time
+    assert times["missing_artifacts"] == [True, True]
+    (download_start, download_end), (artifacts_start, artifacts_end) = (
+        times["download"],
+        times["artifacts"],
+    )
+    assert download_start < artifacts_end and artifacts_start < download_end
+
+
+def test_start_warm_up_runs_once(monkeypatch):
+    monkeypatch.setattr(warmup, "_started", False)
+    done = threading.Event()
+
+    with patch.object(warmup, "warm_up", side_effect=done.set) as mock_warm_up:
+        assert warmup.start_warm_up()
+        assert not warmup.start_warm_up()
+        assert done.wait(timeout=5)
+
+    mock_warm_up.assert_called_once()
+
+
+def test_warm_up_in_background_logs_errors(caplog):
+    with patch.object(warmup, "warm_up", side_effect=ConnectionError("offline")):
+        warmup._warm_up_in_background()
+
+    assert "Warm-up failed" in caplog.text
+
+
+def test_serve_starts_warm_up_before_the_server(monkeypatch):
+    monkeypatch.setattr(warmup, "_started", False)
+    calls = []
+
+    with (
+        patch.object(
+            warmup, "start_warm_up", side_effect=lambda: calls.append("warm-up")
+        ),
+        patch(
+            "streamlit.web.cli.main", side_effect=lambda *a, **k: calls.append((a, k))
+        ),
+    ):
+        warmup.main(["--serve", "streamlit_app.py", "--server.port", "8080"])
+
+    assert calls == [
+        "warm-up",
+        (
+            (["run", "streamlit_app.py", "--server.port", "8080"],),
+            {"prog_name": "streamlit"},
+        ),
+    ]
@@ -0,0 +1,67 @@
+"""Tests for the workbook module."""
+
+import pytest
+import immigration_enforcement.borderpatrol.artifacts as artifacts
+import immigration_enforcement.borderpatrol.workbook as workbook
+import pandas as pd
+from unittest.mock import patch
+
+
+@pytest.fixture(scope="module")
+def khsm_workbook():
+    return workbook.get_khsm_workbook()
+
+
+def test_sheet_names(khsm_workbook):
+    assert len(khsm_workbook.sheet_names) == 16
+    assert "Monthly Rgn and Sector" in khsm_workbook.sheet_names
+
+
+def test_sheet_only_has_its_own_columns(khsm_workbook):
+    monthly = khsm_workbook.sheet("Monthly Family Status")
+    assert list(monthly.columns) == [
+        "fiscal_year",
+        "month",
+        "family_status",
+        "encounters",
+        "date",
+    ]
+
+    annual = khsm_workbook.sheet("Annual Count")
+    assert list(annual.columns) == ["fiscal_year", "encounters"]
+
+
+def test_region_encounters(khsm_workbook):
+    assert khsm_workbook.regions == [
+        "Coastal Border",
+        "Northern Land Border",
+        "Southwest Land Border",
+    ]
+
+    df = khsm_workbook.region_encounters("Northern Land Border")
+    assert list(df.columns) == ["date", "encounters"]
+    assert pd.api.types.is_datetime64_ns_dtype(df["date"])
+    assert df["date"].min() == pd.Timestamp("1999-10-01")
+
+    # The regions add up to the "Monthly Count" sheet (DHS rounds each figure, so allow a small difference)
+    total = sum(
+        khsm_workbook.region_encounters(r)["encounters"].sum()
+        for r in khsm_workbook.regions
+    )
+    expected = khsm_workbook.sheet("Monthly Count")["encounters"].sum()
+    assert total == pytest.approx(expected, rel=1e-4)
+
+
+def test_unknown_sheet_and_region(khsm_workbook):
+    with pytest.raises(ValueError):
+        khsm_workbook.sheet("Monthly Weather")
+    with pytest.raises(ValueError):
+        khsm_workbook.region_encounters("Atlantis")
+
+
+def test_workbook_is_parsed_once(khsm_workbook):
+    with patch.object(artifacts, "load_khsm_workbook") as mock_load:
+        for region in khsm_workbook.regions:
+            workbook.get_khsm_workbook().region_encounters(region)
+
+    mock_load.assert_not_called()